@@ -1,23 +1,42 @@
 """
 Custom integration to integrate Netgear WAX access points with Home Assistant.
 """
-import asyncio
+from collections import deque
+import dataclasses
+import math
+import random
 import time
-from typing import Any, List, Dict
+from typing import Any, Callable, Deque, Iterable, List, Dict, FrozenSet, Optional, Set, Tuple
 import logging
 
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
 from homeassistant.core_config import Config
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, PERCENTAGE
+from homeassistant.util.ssl import get_default_no_verify_context
 
-from .client import Stat, NetgearClient
+from .analytics import FleetAnalytics, RadioReading
+from .cache import NetgearStateCache
+from .client import Radio, Stat, Station, NetgearClient, SsidIndex
 from .client_wax import NetgearWaxClient, DeviceState, Ssid
+from .history import Bucket, StatHistory
+from .metrics import NetgearMetrics, PollTiming, SetupTiming
+from .profiler import PollProfiler
+from .rates import TrafficRateTracker
+from .resilience import CircuitBreaker, RequestSlots
+from .services import async_setup_services
+from .stations import StationTable
+from .syslog import NetgearSyslogListener, SyslogEvent, parse_syslog
+from .utils import deep_getsizeof, stat_field, station_field
+from .ssid_commands import SsidCommandPipeline
 
 from .const import (
     CONF_PASSWORD,
@@ -27,6 +46,41 @@ from .const import (
     DOMAIN,
     PLATFORMS,
     STARTUP_MESSAGE, CONF_MAC,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_METRICS,
+    CONF_SYSLOG,
+    CONF_SYSLOG_PORT,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    ADAPTIVE_SPEEDUP_FACTOR,
+    ADAPTIVE_SLOWDOWN_FACTOR,
+    ADAPTIVE_LATENCY_RATIO,
+    ADAPTIVE_UTILIZATION_DELTA,
+    ADAPTIVE_TRAFFIC_BYTES_PER_SECOND,
+    BREAKER_OPEN,
+    DATA_FLEET,
+    DATA_SYSLOG,
+    DEFAULT_SYSLOG_PORT,
+    DIAGNOSTICS_POLLS,
+    DEVICE_TRACKER,
+    EVENT_STATION_JOINED,
+    EVENT_STATION_LEFT,
+    EVENT_RECEIVED,
+    FIELD_BREAKER,
+    FIELD_SSIDS,
+    FIELD_STATIONS,
+    FLEET_ACCESS_POINTS_PER_SLOT,
+    FLEET_JITTER_SECONDS,
+    FLEET_MIN_CONCURRENT_REQUESTS,
+    PLATFORMS_DISABLED_BY_DEFAULT,
+    RADIO_BANDS,
+    SIGNAL_FLEET_ANALYTICS,
+    SYSLOG_CONFIG,
+    SYSLOG_RADIO,
+    SYSLOG_REFRESH_DELAY_SECONDS,
+    SYSLOG_STATION_JOINED,
+    SYSLOG_STATION_LEFT,
 )
 
 SCAN_INTERVAL_SECONDS = timedelta(seconds=60)
@@ -40,6 +94,7 @@ async def async_setup(hass: HomeAssistant, config: Config):
     https://developers.home-assistant.io/docs/asyncio_working_with_async/
     """
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 
@@ -54,20 +109,53 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     address = entry.data.get(CONF_ADDRESS)
     port = int(entry.data.get(CONF_PORT))
     mac = entry.data.get(CONF_MAC)
+    min_interval = timedelta(seconds=entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL))
+    max_interval = timedelta(seconds=entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL))
 
-    coordinator = NetgearDataUpdateCoordinator(hass, address, port, username, password, mac)
-    await coordinator.async_config_entry_first_refresh()
+    track_stations = entry.options.get(DEVICE_TRACKER, DEVICE_TRACKER not in PLATFORMS_DISABLED_BY_DEFAULT)
+    metrics = entry.options.get(CONF_METRICS, False)
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+    coordinator = NetgearDataUpdateCoordinator(hass, address, port, username, password, mac,
+                                               min_interval, max_interval, track_stations, metrics,
+                                               NetgearStateCache(hass, entry.entry_id))
+
+    # With a stored state the entities are created right away and the first poll runs in the background, so startup
+    # doesn't wait on the access point. Without one (first setup) the access point has to answer first.
+    started = time.perf_counter()
+    restored = await coordinator.async_restore()
+    restored_at = time.perf_counter()
+    first_refresh = None
+    if not restored:
+        await coordinator.async_config_entry_first_refresh()
+        first_refresh = time.perf_counter() - restored_at
+
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    scheduler = get_fleet_scheduler(hass)
+    scheduler.register(coordinator)
+    if restored:
+        scheduler.poll_now(coordinator)
+
+    if entry.options.get(CONF_SYSLOG, False):
+        coordinator.syslog = get_syslog_listener(hass, entry.options.get(CONF_SYSLOG_PORT, DEFAULT_SYSLOG_PORT))
+        await coordinator.syslog.async_register(address, coordinator.on_receive)
 
     # https://developers.home-assistant.io/docs/config_entries_index/
-    for platform in PLATFORMS:
-        if entry.options.get(platform, True):
-            coordinator.platforms.append(platform)
-            await hass.config_entries.async_forward_entry_setups(entry, [platform])
+    # The platforms are set up together rather than one after the other
+    platforms_started = time.perf_counter()
+    coordinator.platforms = [
+        platform for platform in PLATFORMS
+        if entry.options.get(platform, platform not in PLATFORMS_DISABLED_BY_DEFAULT)
+    ]
+    await hass.config_entries.async_forward_entry_setups(entry, coordinator.platforms)
+
+    finished = time.perf_counter()
+    coordinator.setup_timing = SetupTiming(time.time(), finished - started, restored_at - started, first_refresh,
+                                           finished - platforms_started)
+    _LOGGER.debug("Set up %s in %.3f seconds (%s)", address, finished - started,
+                  "restored" if restored else f"first refresh {first_refresh:.3f} seconds")
 
     entry.add_update_listener(async_reload_entry)
 
@@ -81,58 +169,376 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 class NetgearDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the Netgear API."""
 
-    def __init__(self, hass: HomeAssistant, address: str, port: int, username: str, password: str, mac: str) -> None:
+    def __init__(self, hass: HomeAssistant, address: str, port: int, username: str, password: str, mac: str,
+                 min_interval: timedelta = SCAN_INTERVAL_SECONDS, max_interval: timedelta = SCAN_INTERVAL_SECONDS,
+                 track_stations: bool = False, metrics: bool = False,
+                 cache: Optional[NetgearStateCache] = None) -> None:
         """Initialize"""
-        # TODO: Support multiple clients here
+        # The client owns a connection pool for this access point, so polls reuse open connections instead of paying
+        # for a TLS handshake each time
         self.client: NetgearClient = NetgearWaxClient(username, password, address, port,
-                                                      async_get_clientsession(hass, verify_ssl=False))
+                                                      ssl_context=get_default_no_verify_context())
+        self.client.track_stations = track_stations
+        # Request and poll metrics are only collected when the metrics option is on
+        self.metrics: Optional[NetgearMetrics] = NetgearMetrics() if metrics else None
+        self.client.metrics = self.metrics
+        # For the diagnostics download
+        self.poll_history: Deque[PollTiming] = deque(maxlen=DIAGNOSTICS_POLLS)
+        self.setup_timing: Optional[SetupTiming] = None
+        self.profiler = PollProfiler()
+        self.stations = StationTable()
         self.platforms = []
+        # Where the last known state is saved, see async_restore
+        self.cache = cache
         self._initialized = False
+        # True until the first poll after the state was restored from the cache
+        self._restored = False
         self._mac = mac
         self._state: DeviceState
-        self._ssids: List[Ssid]
+        self._ssids = SsidIndex()
         self._firmware_last_checked: int = 0
         self._address = address
-
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL_SECONDS)
+        self._min_interval = min(min_interval, max_interval)
+        self._max_interval = max(min_interval, max_interval)
+        self._poll_interval = min(max(SCAN_INTERVAL_SECONDS, self._min_interval), self._max_interval)
+        self._last_poll_time: Optional[float] = None
+        self.last_poll_latency: Optional[float] = None
+        # Fields that changed in the last update, None when everything should be treated as changed
+        self._changed_fields: Optional[FrozenSet[str]] = None
+        self._traffic_rates = TrafficRateTracker()
+        # Channel utilization of each radio at several resolutions, the hourly buckets go to long-term statistics
+        self.history = StatHistory()
+        # Set when the syslog option is on, see on_receive
+        self.syslog: Optional[NetgearSyslogListener] = None
+        self.syslog_events = 0
+        self._unsub_syslog_poll: Optional[Callable[[], None]] = None
+
+        # Polling is driven by the NetgearFleetScheduler, so the coordinator doesn't schedule its own refreshes
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=None)
+
+        self.ssid_commands = SsidCommandPipeline(hass, self.client, self, get_fleet_scheduler(hass).request_slots)
 
     async def async_stop(self, event: Any):
         """ Stop anything we need to stop """
-        # Log out is important, the device limits concurrent logins
-        await self.client.async_logout()
+        self.ssid_commands.cancel()
+        if self._unsub_syslog_poll is not None:
+            self._unsub_syslog_poll()
+            self._unsub_syslog_poll = None
+        if self.cache is not None:
+            # Stat values aren't saved on every poll, keep the latest ones for the next start. They're written now
+            # rather than after the save delay, so removing the entry right after unloading it leaves nothing behind.
+            await self.cache.async_close(self._state if self._initialized else None, self._ssids.ssids)
+        try:
+            # Log out is important, the device limits concurrent logins
+            await self.client.async_logout()
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.debug("Failed to log out", exc_info=exception)
+        finally:
+            await self.client.async_close()
+
+    async def async_restore(self) -> bool:
+        """ Loads the last known state from the cache so entities can be created before the access point answers.
+        Returns false when nothing was cached """
+        cached = await self.cache.async_load() if self.cache is not None else None
+        if cached is None:
+            return False
+
+        self._state, ssids = cached
+        self._set_ssids(ssids)
+        self._initialized = True
+        self._restored = True
+        self.data = self._state
+        return True
 
     async def _async_update_data(self) -> DeviceState:
         """Reload information by fetching from the API"""
-        # Only check for firmware updates every 6 hours
-        check_firmware = False
+        started = time.perf_counter()
+        success = False
         try:
-            check_firmware = (time.time() - self._firmware_last_checked) > 21600
-
-            if check_firmware:
-                self._firmware_last_checked = time.time()
-                await self.client.check_for_firmware_updates()
-        except Exception as exception:
-            # Not vital for this API to run so we'll pass on errors
-            _LOGGER.info("Failed to check for firmware updates", exc_info=exception)
-            pass
-
+            with self.profiler.sample():
+                state = await self._async_poll()
+            success = True
+            return state
+        finally:
+            duration = time.perf_counter() - started
+            self.poll_history.append(PollTiming(time.time(), duration, success, self._poll_interval.total_seconds()))
+            if self.metrics is not None:
+                self.metrics.record_poll(duration)
+
+    async def _async_poll(self) -> DeviceState:
+        """ Fetches the state and SSIDs and works out what changed """
+        # Only check for firmware updates every 6 hours, the client reads the outcome on the next poll
+        check_firmware = (time.time() - self._firmware_last_checked) > 21600
+        if check_firmware:
+            self._firmware_last_checked = time.time()
+
+        previous = self._state if self._initialized else None
+        previous_ssids = self._ssids.ssids
+        previous_breaker_state = self.client.breaker.state
+        started = time.monotonic()
         try:
-            self._state = await self.client.async_get_state(check_firmware)
-            self._ssids = await self.client.async_get_ssids()
+            self._state, ssids = await self.client.async_get_state_and_ssids(check_firmware)
+            self._set_ssids(ssids)
             self._initialized = True
         except Exception as exception:
             _LOGGER.debug("Failed to read current state", exc_info=exception)
-            raise UpdateFailed() from exception
+            self._changed_fields = None
+            self._set_poll_interval(self._poll_interval * ADAPTIVE_SLOWDOWN_FACTOR)
+            raise UpdateFailed(str(exception)) from exception
+
+        if previous is not None and previous.firmware_update_available and not self._state.firmware_update_available:
+            # The pending update was installed, so the firmware version changed
+            self.client.invalidate_device_info()
+
+        now = time.monotonic()
+        self.last_poll_latency = now - started
+        self._adapt_poll_interval(previous, self._state, now)
+        self._last_poll_time = now
+        changed_rates = self._update_traffic_rates(self._state, now)
+        self._update_history(self._state, time.time())
+        # The stations weren't cached, the ones found by the first poll after a restore didn't just join
+        changed_stations = self._update_stations(self._state, previous is not None and not self._restored)
+
+        if previous is None or self._restored or not self.last_update_success:
+            # First update or recovering from a failure, every entity has to write its state
+            self._restored = False
+            self._changed_fields = None
+        else:
+            changed = self._diff_state(previous, self._state) | changed_rates | changed_stations
+            if previous_ssids != self._ssids.ssids:
+                changed.add(FIELD_SSIDS)
+            if previous_breaker_state != self.client.breaker.state:
+                changed.add(FIELD_BREAKER)
+            self._changed_fields = frozenset(changed)
+
+        if self.cache is not None:
+            self.cache.async_save(self._state, self._ssids.ssids)
 
         return self._state
 
+    def _update_traffic_rates(self, state: DeviceState, now: float) -> Set[str]:
+        """ Adds the traffic counters to the rate tracker, returns the change tracking fields of rates that moved """
+        changed = set()
+        for lan, stat in (state.stats or {}).items():
+            previous_rate = self._traffic_rates.get_rate(lan)
+            if self._traffic_rates.add(lan, now, stat) != previous_rate:
+                changed.add(stat_field(lan, "throughput"))
+        return changed
+
+    def _update_history(self, state: DeviceState, timestamp: float):
+        """ Adds the channel utilization of each radio to the history """
+        for lan, stat in (state.stats or {}).items():
+            if lan.startswith("wlan"):
+                bucket = self.history.add(lan, timestamp, stat.utilization)
+                if bucket is not None:
+                    self._publish_statistics(lan, bucket)
+
+    def _publish_statistics(self, lan: str, bucket: Bucket):
+        """ Adds an hour of channel utilization to Home Assistant's long-term statistics """
+        if "recorder" not in self.hass.config.components:
+            return
+
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{self.get_device_name()} {lan} utilization",
+            source=DOMAIN,
+            statistic_id=self.get_statistic_id(lan),
+            unit_of_measurement=PERCENTAGE,
+        )
+        statistic = StatisticData(
+            start=datetime.fromtimestamp(bucket.start, timezone.utc),
+            mean=bucket.mean,
+            min=bucket.min,
+            max=bucket.max,
+        )
+        async_add_external_statistics(self.hass, metadata, [statistic])
+
+    def _update_stations(self, state: DeviceState, fire_events: bool) -> Set[str]:
+        """ Updates the station table and fires join/leave events. Returns the change tracking fields of the stations
+        that joined, left or changed """
+        if state.stations is None:
+            return set()
+
+        changes = self.stations.update(state.stations)
+        if fire_events:
+            for mac in changes.joined:
+                self.hass.bus.async_fire(EVENT_STATION_JOINED, self._station_event(self.stations.get(mac)))
+            for station in changes.left.values():
+                self.hass.bus.async_fire(EVENT_STATION_LEFT, self._station_event(station))
+
+        changed = {station_field(mac) for mac in changes.joined | changes.left.keys() | changes.updated}
+        if changes.joined or changes.left:
+            changed.add(FIELD_STATIONS)
+        return changed
+
+    def _station_event(self, station: Station) -> dict:
+        return {
+            "mac": station.mac,
+            "ssid": station.ssid,
+            "wlan_id": station.wlan_id,
+            "access_point": self._mac,
+            "access_point_name": self.get_device_name(),
+        }
+
+    @staticmethod
+    def _diff_state(previous: DeviceState, state: DeviceState) -> Set[str]:
+        """ Returns the names of the DeviceState fields that differ. Stats are reported per interface and value,
+        see stat_field. Stations are tracked by the station table """
+        changed = set()
+        for field in dataclasses.fields(DeviceState):
+            if field.name not in ("stats", "stations") and getattr(previous, field.name) != getattr(state, field.name):
+                changed.add(field.name)
+
+        previous_stats = previous.stats or {}
+        stats = state.stats or {}
+        for lan in previous_stats.keys() | stats.keys():
+            previous_stat = previous_stats.get(lan)
+            stat = stats.get(lan)
+            if previous_stat is None or stat is None or previous_stat.utilization != stat.utilization:
+                changed.add(stat_field(lan, "utilization"))
+            if previous_stat is None or stat is None or previous_stat.bytes_transferred != stat.bytes_transferred:
+                changed.add(stat_field(lan, "bytes_transferred"))
+
+        return changed
+
+    def has_changed(self, fields: FrozenSet[str]) -> bool:
+        """ Returns true if any of the fields changed in the last update """
+        return self._changed_fields is None or not self._changed_fields.isdisjoint(fields)
+
+    @callback
+    def async_publish_changes(self, fields: Iterable[str]):
+        """ Lets the entities watching any of the fields know they changed outside of a refresh """
+        self._changed_fields = frozenset(fields)
+        self.async_update_listeners()
+
+    @property
+    def poll_interval(self) -> timedelta:
+        """ How long the fleet scheduler waits between polls of this access point """
+        return self._poll_interval
+
+    def _adapt_poll_interval(self, previous: Optional[DeviceState], state: DeviceState, now: float):
+        """
+        Polls faster while the access point is busy and slower while it's idle or slow to respond. The interval
+        always stays between the configured min and max.
+        """
+        if previous is None or self._last_poll_time is None:
+            return
+
+        if self.last_poll_latency > self._poll_interval.total_seconds() * ADAPTIVE_LATENCY_RATIO:
+            # The device is struggling to answer, give it some room
+            self._set_poll_interval(self._poll_interval * ADAPTIVE_SLOWDOWN_FACTOR)
+        elif self._is_changing(previous, state, now - self._last_poll_time):
+            self._set_poll_interval(self._poll_interval * ADAPTIVE_SPEEDUP_FACTOR)
+        else:
+            self._set_poll_interval(self._poll_interval * ADAPTIVE_SLOWDOWN_FACTOR)
+
+    @staticmethod
+    def _is_changing(previous: DeviceState, state: DeviceState, elapsed: float) -> bool:
+        """ Returns true if the connected clients, channel utilization or traffic are changing quickly """
+        if previous.total_number_of_devices != state.total_number_of_devices:
+            return True
+
+        previous_stats = previous.stats or {}
+        for lan, stat in (state.stats or {}).items():
+            previous_stat = previous_stats.get(lan)
+            if previous_stat is None:
+                continue
+            if abs(stat.utilization - previous_stat.utilization) >= ADAPTIVE_UTILIZATION_DELTA:
+                return True
+            if elapsed > 0 and abs(stat.bytes_transferred - previous_stat.bytes_transferred) / elapsed \
+                    >= ADAPTIVE_TRAFFIC_BYTES_PER_SECOND:
+                return True
+
+        return False
+
+    def _set_poll_interval(self, interval: timedelta):
+        self._poll_interval = min(max(interval, self._min_interval), self._max_interval)
+
+    @callback
     def on_receive(self, data_bytes: bytes):
-        data = data_bytes.decode("utf-8", errors="ignore")
-        self.hass.bus.fire("netgear_event_received", data)
+        """ Handles a syslog message from the access point. Messages that say something changed fire
+        netgear_event_received, and the ones that change what the entities show are answered with a poll """
+        event = parse_syslog(data_bytes)
+        if event is None:
+            return
+
+        self.syslog_events += 1
+        self.hass.bus.async_fire(EVENT_RECEIVED, {
+            "kind": event.kind,
+            "interface": event.interface,
+            "mac": event.mac,
+            "message": event.message,
+            "access_point": self._mac,
+            "access_point_name": self.get_device_name() if self._initialized else None,
+        })
+
+        if event.kind == SYSLOG_CONFIG:
+            # The device name, SSIDs or radio settings may have changed
+            self.client.invalidate_device_info()
+            self.client.invalidate_radios()
+        elif event.kind == SYSLOG_RADIO:
+            # Channel switch, DFS or a radio going up or down
+            self.client.invalidate_radios()
+        if self._needs_poll(event):
+            self._request_poll()
+
+    def _needs_poll(self, event: SyslogEvent) -> bool:
+        """ Returns false for station events the station table already reflects """
+        if self.client.track_stations and event.mac:
+            if event.kind == SYSLOG_STATION_JOINED:
+                return event.mac not in self.stations
+            if event.kind == SYSLOG_STATION_LEFT:
+                return event.mac in self.stations
+        return True
+
+    def _request_poll(self):
+        """ Polls after SYSLOG_REFRESH_DELAY_SECONDS. Events arriving meanwhile are covered by the same poll """
+        if self._unsub_syslog_poll is None:
+            self._unsub_syslog_poll = async_call_later(self.hass, SYSLOG_REFRESH_DELAY_SECONDS, self._async_poll_soon)
+
+    @callback
+    def _async_poll_soon(self, _now):
+        self._unsub_syslog_poll = None
+        if not self.is_paused():
+            get_fleet_scheduler(self.hass).poll_now(self)
 
     def get_mac(self) -> str:
         return self._mac
 
+    def get_breaker(self) -> CircuitBreaker:
+        return self.client.breaker
+
+    def get_statistic_id(self, lan: str) -> str:
+        """ Returns the id of the long-term statistics of a radio's utilization, example:
+        netgear_wax:aabbccddeeff_wlan1_utilization """
+        return f"{DOMAIN}:{self._mac.replace(':', '').lower()}_{lan}_utilization"
+
+    def get_metrics(self) -> Optional[NetgearMetrics]:
+        return self.metrics
+
+    def get_ssid_index(self) -> SsidIndex:
+        return self._ssids
+
+    def get_memory_usage(self) -> Dict[str, int]:
+        """ Returns the bytes used by the cached state, SSIDs, stations, traffic rates and recent requests """
+        return {
+            "state": deep_getsizeof(self._state) if self._initialized else 0,
+            "ssids": deep_getsizeof(self._ssids),
+            "stations": deep_getsizeof(self.stations),
+            "traffic_rates": deep_getsizeof(self._traffic_rates),
+            "history": deep_getsizeof(self.history),
+            "exchanges": deep_getsizeof(self.client.exchanges),
+        }
+
+    def get_relogin_count(self) -> int:
+        """ Returns how many times the device dropped the session and the client had to log in again """
+        return self.client.relogin_count
+
+    def is_paused(self) -> bool:
+        """ Returns true while the circuit breaker keeps requests to the access point paused """
+        return self.client.breaker.state == BREAKER_OPEN
+
     def get_ip_address(self) -> str:
         """
         Returns the IP address, example: 192.168.1.2
@@ -148,15 +554,40 @@ class NetgearDataUpdateCoordinator(DataUpdateCoordinator):
     def get_firmware_version(self) -> str:
         return self._state.firmware_version
 
-    def get_ssids(self) -> List[Ssid]:
-        return self._ssids
+    def get_ssids(self) -> Tuple[Ssid, ...]:
+        return self._ssids.ssids
+
+    def _set_ssids(self, ssids: List[Ssid]) -> bool:
+        """ Replaces the SSIDs, keeping the current index when the list didn't change. Returns true if it changed """
+        if tuple(ssids) == self._ssids.ssids:
+            return False
+        self._ssids = SsidIndex(ssids)
+        return True
+
+    @callback
+    def async_set_ssids(self, ssids: List[Ssid]):
+        """ Replaces the SSIDs with a fresh read and lets the entities watching them know, if they changed """
+        if self._set_ssids(ssids):
+            self.async_publish_changes({FIELD_SSIDS})
+
+    def get_ssids_by_ssid_id(self, ssid_id: str) -> Tuple[Ssid, ...]:
+        """ Returns the SSIDs with the id, example: SSID1. There's one per radio and vap """
+        return self._ssids.by_ssid_id.get(ssid_id, ())
 
-    def get_ssids_by_ssid_id(self, ssid_id: str) -> List[Ssid]:
-        ssids = []
-        for ssid in self._ssids:
-            if ssid_id == ssid.ssid_id:
-                ssids.append(ssid)
-        return ssids
+    def get_ssids_by_name(self, name: str) -> Tuple[Ssid, ...]:
+        """ Returns the SSIDs with the network name """
+        return self._ssids.by_name.get(name, ())
+
+    def get_ssids_by_wlan_id(self, wlan_id: str) -> Tuple[Ssid, ...]:
+        """ Returns the SSIDs on the radio, example: wlan0 """
+        return self._ssids.by_wlan_id.get(wlan_id, ())
+
+    def get_ssid_by_unique_id(self, unique_id: str) -> Optional[Ssid]:
+        return self._ssids.by_unique_id.get(unique_id)
+
+    def get_ssid_names(self) -> Tuple[str, ...]:
+        """ Returns the distinct SSID network names """
+        return tuple(self._ssids.by_name)
 
     def is_firmware_update_available(self) -> bool:
         return self._state.firmware_update_available
@@ -167,26 +598,202 @@ class NetgearDataUpdateCoordinator(DataUpdateCoordinator):
     def get_stats(self) -> Dict[str, Stat]:
         return self._state.stats
 
+    def get_throughput(self, lan: str) -> Optional[float]:
+        """ Returns the smoothed traffic rate of the interface in bytes/second, None until there's enough data """
+        return self._traffic_rates.get_rate(lan)
+
+    def get_radios(self) -> Tuple[Radio, ...]:
+        """ Returns the configuration of each radio, empty until it was fetched """
+        return self._state.radios
+
+    def get_radio(self, wlan_id: str) -> Optional[Radio]:
+        return next((radio for radio in self._state.radios if radio.wlan_id == wlan_id), None)
+
+    def get_radio_readings(self) -> List[RadioReading]:
+        """ Returns the channel utilization of each radio along with its channel and width, for the fleet analytics """
+        readings = []
+        for lan, stat in (self.get_stats() or {}).items():
+            if not lan.startswith("wlan"):
+                continue
+            radio = self.get_radio(lan)
+            if radio is None or not radio.channel:
+                readings.append(RadioReading(lan, RADIO_BANDS.get(lan, lan), stat.utilization))
+            else:
+                readings.append(RadioReading(lan, RADIO_BANDS.get(lan, lan), stat.utilization, radio.channel,
+                                             radio.channel_width or None))
+        return readings
+
+
+class NetgearFleetScheduler:
+    """
+    Polls every registered coordinator from one task pool. Polls are spread evenly over the poll interval with a
+    little jitter and run in a bounded number of request_slots, so load stays flat as access points are added. There's
+    one slot for every access_points_per_slot access points and at least min_concurrent_requests. Each poll refreshes
+    its coordinator, which hands the result to that config entry's entities.
+    """
+
+    def __init__(self, hass: HomeAssistant, min_concurrent_requests: int = FLEET_MIN_CONCURRENT_REQUESTS,
+                 access_points_per_slot: int = FLEET_ACCESS_POINTS_PER_SLOT,
+                 jitter_seconds: float = FLEET_JITTER_SECONDS) -> None:
+        self._hass = hass
+        self._min_concurrent_requests = min_concurrent_requests
+        self._access_points_per_slot = access_points_per_slot
+        # Polls and SSID commands of all access points share these
+        self.request_slots = RequestSlots(min_concurrent_requests)
+        self._jitter_seconds = jitter_seconds
+        self._coordinators: List[NetgearDataUpdateCoordinator] = []
+        # Coordinator to the time.monotonic() time it should next be polled
+        self._next_poll: Dict[NetgearDataUpdateCoordinator, float] = {}
+        self._polling: Set[NetgearDataUpdateCoordinator] = set()
+        self._unsub_timer: Optional[Callable[[], None]] = None
+        self.analytics = FleetAnalytics()
+        # The coordinator whose sensor platform has the fleet sensors
+        self._analytics_owner: Optional[NetgearDataUpdateCoordinator] = None
+
+    @property
+    def coordinators(self) -> List[NetgearDataUpdateCoordinator]:
+        return list(self._coordinators)
+
+    def register(self, coordinator: NetgearDataUpdateCoordinator):
+        """ Adds the coordinator to the fleet and spreads the next poll of every coordinator over one interval """
+        if coordinator in self._next_poll:
+            return
+        self._coordinators.append(coordinator)
+        self._resize_request_slots()
+        if coordinator.data is not None:
+            self._update_analytics(coordinator)
+
+        now = time.monotonic()
+        count = len(self._coordinators)
+        for index, member in enumerate(self._coordinators):
+            interval = member.poll_interval.total_seconds()
+            self._next_poll[member] = now + interval * (index + 1) / count + self._jitter()
+        self._schedule()
+
+    def unregister(self, coordinator: NetgearDataUpdateCoordinator):
+        """ Stops polling the coordinator """
+        if coordinator not in self._next_poll:
+            return
+        self._coordinators.remove(coordinator)
+        self._next_poll.pop(coordinator)
+        self._resize_request_slots()
+        self.analytics.remove(coordinator.get_mac())
+        self._schedule()
+
+    def _resize_request_slots(self):
+        self.request_slots.limit = max(self._min_concurrent_requests,
+                                       math.ceil(len(self._coordinators) / self._access_points_per_slot))
+
+    def _jitter(self) -> float:
+        return random.uniform(-self._jitter_seconds, self._jitter_seconds)
+
+    def _schedule(self):
+        """ Sets a timer for the coordinator that's due next """
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+        if not self._next_poll:
+            return
+
+        delay = max(0.0, min(self._next_poll.values()) - time.monotonic())
+        self._unsub_timer = async_call_later(self._hass, delay, self._async_poll_due)
+
+    @callback
+    def _async_poll_due(self, _now):
+        """ Starts a poll for every coordinator that's due """
+        self._unsub_timer = None
+        now = time.monotonic()
+
+        for coordinator, due in list(self._next_poll.items()):
+            if due > now:
+                continue
+
+            # Advance from the due time rather than now so the spacing between access points is kept. If we've
+            # fallen a whole interval behind, start over from now.
+            interval = coordinator.poll_interval.total_seconds()
+            self._next_poll[coordinator] = max(due + interval, now) + self._jitter()
+
+            # A poll that's still queued or running covers this one. An access point that's been failing isn't polled
+            # until its circuit breaker lets a probe through, its entities stay unavailable meanwhile.
+            if coordinator.is_paused():
+                continue
+            self.poll_now(coordinator)
+
+        self._schedule()
+
+    def poll_now(self, coordinator: NetgearDataUpdateCoordinator):
+        """ Polls the coordinator without waiting for its turn. The poll still needs one of the request slots, and a
+        poll that's already queued or running covers it """
+        if coordinator in self._polling:
+            return
+        self._polling.add(coordinator)
+        self._hass.async_create_background_task(self._async_poll(coordinator), name=f"{DOMAIN} poll")
+
+    async def _async_poll(self, coordinator: NetgearDataUpdateCoordinator):
+        try:
+            async with self.request_slots:
+                await coordinator.async_refresh()
+            if coordinator.last_update_success and coordinator in self._next_poll:
+                self._update_analytics(coordinator)
+        finally:
+            self._polling.discard(coordinator)
+
+    def claim_analytics(self, coordinator: NetgearDataUpdateCoordinator) -> bool:
+        """ Returns true if the coordinator's sensor platform should have the fleet sensors. The first one to ask
+        keeps them until it releases them """
+        if self._analytics_owner is None:
+            self._analytics_owner = coordinator
+        return self._analytics_owner is coordinator
+
+    def release_analytics(self, coordinator: NetgearDataUpdateCoordinator):
+        """ Called once the coordinator's fleet sensors were removed, so another sensor platform can add them """
+        if self._analytics_owner is coordinator:
+            self._analytics_owner = None
+            async_dispatcher_send(self._hass, SIGNAL_FLEET_ANALYTICS)
+
+    def _update_analytics(self, coordinator: NetgearDataUpdateCoordinator):
+        self.analytics.update(coordinator.get_mac(), coordinator.get_device_name(), coordinator.get_radio_readings())
+        async_dispatcher_send(self._hass, SIGNAL_FLEET_ANALYTICS)
+
+
+def get_fleet_scheduler(hass: HomeAssistant) -> NetgearFleetScheduler:
+    """ Returns the scheduler shared by all config entries, creating it if needed """
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET not in data:
+        data[DATA_FLEET] = NetgearFleetScheduler(hass)
+    return data[DATA_FLEET]
+
+
+def get_syslog_listener(hass: HomeAssistant, port: int) -> NetgearSyslogListener:
+    """ Returns the syslog listener on the port shared by all config entries, creating it if needed """
+    listeners = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SYSLOG, {})
+    if port not in listeners:
+        listeners[port] = NetgearSyslogListener(port)
+    return listeners[port]
+
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    get_fleet_scheduler(hass).unregister(coordinator)
+    if coordinator.syslog is not None:
+        coordinator.syslog.unregister(coordinator.on_receive)
     await coordinator.async_stop({})
-    unloaded = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, platform)
-                for platform in PLATFORMS
-                if platform in coordinator.platforms
-            ]
-        )
-    )
+    unloaded = await hass.config_entries.async_unload_platforms(entry, coordinator.platforms)
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # This entry's fleet sensors are gone, another entry adds them
+        get_fleet_scheduler(hass).release_analytics(coordinator)
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored state of a removed entry."""
+    await NetgearStateCache(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -0,0 +1,199 @@
+"""Fleet channel utilization analytics for netgear_wax."""
+import math
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .const import (
+    ANALYTICS_HOTTEST,
+    ANALYTICS_MAX_AGE_SECONDS,
+    ANALYTICS_WINDOW_SECONDS,
+    BAND_2_4_GHZ,
+    BAND_5_GHZ,
+    BAND_6_GHZ,
+)
+
+
+class RadioReading(NamedTuple):
+    """ The latest reading of one radio of an access point """
+    lan: str
+    band: str
+    utilization: int
+    # Only known once the radio configuration was read
+    channel: Optional[int] = None
+    # Channel width in MHz
+    width: Optional[int] = None
+
+
+class RadioScore(NamedTuple):
+    mac: str
+    name: str
+    reading: RadioReading
+    # Moving average of the utilization over ANALYTICS_WINDOW_SECONDS
+    score: float
+    updated: float
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """ Nearest rank percentile of sorted values """
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def channel_span(band: str, channel: int, width: Optional[int]) -> Optional[Tuple[int, int]]:
+    """ Returns the (low, high) frequencies in MHz a radio occupies. Bonded 5 and 6 GHz channels cover the aligned
+    block the primary channel is in, 2.4 GHz channels are taken to extend upwards. Approximate, but enough to tell
+    which radios share spectrum """
+    width = width or 20
+    if band == BAND_2_4_GHZ:
+        center = 2484 if channel == 14 else 2407 + 5 * channel
+        return center - 10, center - 10 + width
+    if band == BAND_5_GHZ:
+        # Blocks start at 36, and again at 149 above the gap before UNII-3
+        base, origin = (149 if channel >= 149 else 36), 5000
+    elif band == BAND_6_GHZ:
+        base, origin = 1, 5950
+    else:
+        return None
+    step = max(width // 20, 1) * 4
+    first = base + (channel - base) // step * step
+    low = origin + 5 * first - 10
+    return low, low + width
+
+
+class FleetAnalytics:
+    """
+    Channel utilization across every access point of the fleet: percentiles per band, the most congested access
+    points by a moving average of their busiest radio, and radios on overlapping channels.
+
+    Readings are added after each poll. The summary is computed when asked for and cached until the next reading, so
+    sensors and the service share one computation no matter how many read it. Radios that haven't reported for
+    max_age seconds (their access point is offline) are left out.
+    """
+
+    def __init__(self, window: float = ANALYTICS_WINDOW_SECONDS, hottest: int = ANALYTICS_HOTTEST,
+                 max_age: float = ANALYTICS_MAX_AGE_SECONDS) -> None:
+        self._window = window
+        self._hottest = hottest
+        self._max_age = max_age
+        # (access point MAC, interface) to its latest score
+        self._radios: Dict[Tuple[str, str], RadioScore] = {}
+        self._summary: Optional[dict] = None
+        self.version = 0
+
+    def update(self, mac: str, name: str, readings: Iterable[RadioReading], now: Optional[float] = None):
+        """ Adds the latest readings of an access point """
+        now = time.monotonic() if now is None else now
+        for reading in readings:
+            key = (mac, reading.lan)
+            previous = self._radios.get(key)
+            if previous is None:
+                score = float(reading.utilization)
+            else:
+                # Time aware exponential moving average, polls aren't evenly spaced
+                weight = 1 - math.exp(-max(now - previous.updated, 0) / self._window)
+                score = previous.score + weight * (reading.utilization - previous.score)
+            self._radios[key] = RadioScore(mac, name, reading, score, now)
+        self._changed()
+
+    def remove(self, mac: str):
+        """ Forgets an access point that was removed """
+        for key in [key for key in self._radios if key[0] == mac]:
+            del self._radios[key]
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._summary = None
+
+    @property
+    def bands(self) -> List[str]:
+        return sorted({radio.reading.band for radio in self._radios.values()})
+
+    def summary(self, now: Optional[float] = None) -> dict:
+        if self._summary is None or now is not None:
+            self._summary = self._summarize(time.monotonic() if now is None else now)
+        return self._summary
+
+    def _summarize(self, now: float) -> dict:
+        radios = [radio for radio in self._radios.values() if now - radio.updated <= self._max_age]
+
+        by_band: Dict[str, List[int]] = {}
+        for radio in radios:
+            by_band.setdefault(radio.reading.band, []).append(radio.reading.utilization)
+        bands = {}
+        for band, values in sorted(by_band.items()):
+            values.sort()
+            bands[band] = {
+                "radios": len(values),
+                "mean": round(sum(values) / len(values), 1),
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p95": percentile(values, 95),
+                "max": values[-1],
+            }
+
+        # An access point is as congested as its busiest radio
+        busiest: Dict[str, RadioScore] = {}
+        for radio in radios:
+            if radio.mac not in busiest or radio.score > busiest[radio.mac].score:
+                busiest[radio.mac] = radio
+        hottest = [
+            {
+                "mac": radio.mac,
+                "name": radio.name,
+                "radio": radio.reading.lan,
+                "band": radio.reading.band,
+                "utilization": radio.reading.utilization,
+                "score": round(radio.score, 1),
+            }
+            for radio in sorted(busiest.values(), key=lambda radio: radio.score, reverse=True)[:self._hottest]
+        ]
+
+        return {
+            "bands": bands,
+            "hottest": hottest,
+            "co_channel": self._co_channel(radios),
+        }
+
+    @staticmethod
+    def _co_channel(radios: List[RadioScore]) -> dict:
+        """ Finds radios of different access points whose channels overlap, by sweeping their spans in frequency
+        order. overlaps is None until channels are known """
+        spans = []
+        for radio in radios:
+            reading = radio.reading
+            if reading.channel is None:
+                continue
+            span = channel_span(reading.band, reading.channel, reading.width)
+            if span is not None:
+                spans.append((span[0], span[1], radio))
+        if not spans:
+            return {"overlaps": None, "access_points": [], "channels": {}}
+
+        spans.sort(key=lambda span: span[0])
+        overlaps = 0
+        # Access point MAC to (name, radios of other access points overlapping one of its radios)
+        neighbors: Dict[str, List] = {}
+        active: List[Tuple[int, int, RadioScore]] = []
+        for low, high, radio in spans:
+            active = [span for span in active if span[1] > low]
+            for _, _, other in active:
+                if other.mac != radio.mac:
+                    overlaps += 1
+                    for access_point in (radio, other):
+                        neighbors.setdefault(access_point.mac, [access_point.name, 0])[1] += 1
+            active.append((low, high, radio))
+
+        channels: Dict[str, Dict[int, List[str]]] = {}
+        for _, _, radio in spans:
+            channels.setdefault(radio.reading.band, {}).setdefault(radio.reading.channel, []).append(radio.name)
+
+        return {
+            "overlaps": overlaps,
+            "access_points": [
+                {"mac": mac, "name": name, "overlaps": count}
+                for mac, (name, count) in sorted(neighbors.items(), key=lambda item: item[1][1], reverse=True)
+            ],
+            "channels": {band: dict(sorted(by_channel.items())) for band, by_channel in sorted(channels.items())},
+        }
@@ -0,0 +1,101 @@
+"""Persisted device state for netgear_wax."""
+import dataclasses
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .client import DeviceState, Radio, Ssid, Stat, StatMap, intern
+from .const import DOMAIN, STORAGE_SAVE_DELAY_SECONDS, STORAGE_VERSION
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Stations churn and are rebuilt by the first poll, the rest of DeviceState is stored. Stats and radios are encoded
+# separately.
+STATE_FIELDS = tuple(field.name for field in dataclasses.fields(DeviceState)
+                     if field.name not in ("stats", "stations", "radios"))
+
+
+class NetgearStateCache:
+    """
+    The last known state and SSIDs of one access point, kept in Home Assistant's storage.
+
+    A save is only scheduled when something entities are built from changed: the device info, the SSID list, the
+    radio configuration or the set of interfaces. Stat values change on every poll, they're written along with those
+    changes and when the coordinator stops. Once closed nothing is written anymore, so a removed entry's storage isn't
+    created again by a late save.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._saved_key: Optional[tuple] = None
+        self._state: Optional[DeviceState] = None
+        self._ssids: Tuple[Ssid, ...] = ()
+        self._closed = False
+
+    async def async_load(self) -> Optional[Tuple[DeviceState, Tuple[Ssid, ...]]]:
+        """ Returns the stored state and SSIDs, None if nothing was stored or it can't be read """
+        data = await self._store.async_load()
+        if data is None:
+            return None
+
+        try:
+            state, ssids = self._decode(data)
+        except (KeyError, TypeError, ValueError) as exception:
+            _LOGGER.warning("Ignoring the stored state, it couldn't be read: %r", exception)
+            return None
+
+        self._state, self._ssids = state, ssids
+        self._saved_key = self._key(state, ssids)
+        return state, ssids
+
+    def async_save(self, state: DeviceState, ssids: Tuple[Ssid, ...]):
+        """ Keeps the state and SSIDs for the next save, scheduling one if entities would be built differently """
+        if self._closed:
+            return
+        self._state, self._ssids = state, ssids
+        key = self._key(state, ssids)
+        if key != self._saved_key:
+            self._saved_key = key
+            self._store.async_delay_save(self._encode, STORAGE_SAVE_DELAY_SECONDS)
+
+    async def async_close(self, state: Optional[DeviceState], ssids: Tuple[Ssid, ...]):
+        """ Writes the state and SSIDs right away, replacing a pending delayed save, and ignores later saves. Only
+        closes when there's no state """
+        self._closed = True
+        if state is None:
+            return
+        self._state, self._ssids = state, ssids
+        self._saved_key = self._key(state, ssids)
+        await self._store.async_save(self._encode())
+
+    async def async_remove(self):
+        self._closed = True
+        await self._store.async_remove()
+
+    @staticmethod
+    def _key(state: DeviceState, ssids: Tuple[Ssid, ...]) -> tuple:
+        return tuple(getattr(state, name) for name in STATE_FIELDS if name != "total_number_of_devices") \
+            + (ssids, state.radios, frozenset(state.stats or ()))
+
+    def _encode(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "state": {name: getattr(state, name) for name in STATE_FIELDS},
+            "stats": {
+                lan: [stat.utilization, stat.bytes_transferred, stat.bytes_resolution]
+                for lan, stat in (state.stats or {}).items()
+            },
+            "ssids": [dataclasses.asdict(ssid) for ssid in self._ssids],
+            "radios": [dataclasses.asdict(radio) for radio in state.radios],
+        }
+
+    @staticmethod
+    def _decode(data: Dict[str, Any]) -> Tuple[DeviceState, Tuple[Ssid, ...]]:
+        values = {name: value for name, value in data["state"].items() if name in STATE_FIELDS}
+        stats = StatMap((lan, intern(Stat(*stat))) for lan, stat in data["stats"].items())
+        ssids = tuple(intern(Ssid(**ssid)) for ssid in data["ssids"])
+        # Stored before radios were fetched
+        radios = tuple(intern(Radio(**radio)) for radio in data.get("radios", ()))
+        return DeviceState(**values, stats=stats, radios=radios), ssids
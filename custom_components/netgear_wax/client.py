@@ -1,26 +1,137 @@
 """Netgear API Client."""
 import abc
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from types import MappingProxyType
+from typing import List, Dict, Iterable, Iterator, Mapping, Optional, Tuple, TypeVar, Union
+import weakref
 
+from .resilience import CircuitBreaker
 
-@dataclass(unsafe_hash=True)
+# The model classes are immutable, slotted value types. Build them with intern() so equal values share one instance,
+# across polls and across access points, which keeps memory flat for large fleets and makes equality checks between
+# polls mostly identity checks. Station rows are the exception: their byte counters change on every poll.
+
+_INTERNED: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+
+T = TypeVar("T")
+
+
+def intern(value: T) -> T:
+    """ Returns the shared instance equal to value, registering value if there's none. Only for the frozen model
+    classes in this module """
+    key = (type(value),) + tuple(getattr(value, name) for name in value.__dataclass_fields__)
+    return _INTERNED.setdefault(key, value)
+
+
+def share(previous: Optional[T], value: T) -> T:
+    """ Returns previous if it's equal to value so unchanged objects are reused between polls """
+    return previous if previous is not None and previous == value else value
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Ssid:
-    ssid_id = ""
+    ssid_id: str = ""
     ssid: str = ""
     vap: str = ""
     wlan_id: str = ""
     enabled: bool = False
     ssid_index: int = 0
+    unique_id: str = ""
+
+
+class SsidIndex:
+    """
+    Read only lookups over a list of SSIDs. Built once per refresh so entities don't scan the whole list on every
+    state write.
+    """
+    __slots__ = ("ssids", "by_ssid_id", "by_name", "by_wlan_id", "by_unique_id")
+
+    def __init__(self, ssids: Iterable[Ssid] = ()) -> None:
+        self.ssids: Tuple[Ssid, ...] = tuple(ssids)
+        self.by_ssid_id: Mapping[str, Tuple[Ssid, ...]] = self._group(self.ssids, lambda ssid: ssid.ssid_id)
+        self.by_name: Mapping[str, Tuple[Ssid, ...]] = self._group(self.ssids, lambda ssid: ssid.ssid)
+        self.by_wlan_id: Mapping[str, Tuple[Ssid, ...]] = self._group(self.ssids, lambda ssid: ssid.wlan_id)
+        self.by_unique_id: Mapping[str, Ssid] = MappingProxyType({ssid.unique_id: ssid for ssid in self.ssids})
+
+    @staticmethod
+    def _group(ssids: Tuple[Ssid, ...], key) -> Mapping[str, Tuple[Ssid, ...]]:
+        groups: Dict[str, List[Ssid]] = {}
+        for ssid in ssids:
+            groups.setdefault(key(ssid), []).append(ssid)
+        return MappingProxyType({k: tuple(v) for k, v in groups.items()})
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Stat:
     utilization: int
     bytes_transferred: int
+    # The device rounds traffic, example: 12.2 GB. This is how many bytes the last digit is worth.
+    bytes_resolution: int = 0
+
+
+class StatMap(Mapping[str, Stat]):
+    """ Read only, hashable mapping of interface (lan, wlan0, etc) to its Stat """
+    __slots__ = ("_stats", "_hash")
+
+    def __init__(self, stats: Union[Mapping[str, Stat], Iterable[Tuple[str, Stat]]] = ()) -> None:
+        self._stats: Dict[str, Stat] = dict(stats)
+        self._hash: Optional[int] = None
+
+    def __getitem__(self, lan: str) -> Stat:
+        return self._stats[lan]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._stats)
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, StatMap):
+            return self._stats == other._stats
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(frozenset(self._stats.items()))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"StatMap({self._stats!r})"
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Station:
+    """ A client (station) connected to the access point """
+    mac: str = ""
+    ssid: str = ""
+    # Radio, example: wlan0
+    wlan_id: str = ""
+    rssi: int = 0
+    # Link rate in Mbps
+    rate: int = 0
+    tx_bytes: int = 0
+    rx_bytes: int = 0
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Radio:
+    """ The configuration of one radio of the access point """
+    # Example: wlan0
+    wlan_id: str = ""
+    enabled: bool = True
+    # The operating channel, 0 when unknown
+    channel: int = 0
+    # Channel width in MHz, 0 when unknown
+    channel_width: int = 0
+    # As the device shows it, example: Full or 17 dBm
+    tx_power: str = ""
+    band_steering: bool = False
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, slots=True)
 class DeviceState:
     ssid: str = ""
     serial_number: str = ""
@@ -31,14 +142,21 @@ class DeviceState:
     model: str = ""
     total_number_of_devices: int = 0
     # Key is: wlan0, wlan1, etc
-    stats: Dict[str, Stat] = None
+    stats: StatMap = StatMap()
+    # Only fetched when station tracking is on, None otherwise
+    stations: Optional[Tuple[Station, ...]] = None
+    # Ordered by wlan_id
+    radios: Tuple[Radio, ...] = ()
 
 
 class NetgearClient(abc.ABC):
     """ NetgearWaxClient is the client for accessing Netgear WAX access points """
 
     def __init__(self) -> None:
-        pass
+        # When true, state requests also fetch the connected clients (DeviceState.stations)
+        self.track_stations = False
+        # Stops requests to an access point that keeps failing, see CircuitBreaker
+        self.breaker = CircuitBreaker()
 
     @abc.abstractmethod
     async def async_login(self):
@@ -57,11 +175,41 @@ class NetgearClient(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def async_enable_ssid(self, ssids: List[Ssid], enable: bool):
-        """ async_enable_ssid will turn an ssid on or off"""
+    async def async_get_state_and_ssids(self, check_firmware: Optional[bool] = False) -> Tuple[DeviceState, List[Ssid]]:
+        """ async_get_state_and_ssids gets the device state and the SSIDs in one round trip. With check_firmware the
+        device also checks for firmware updates, the next call reads the status """
+        pass
+
+    @abc.abstractmethod
+    async def async_get_stations(self) -> List[Station]:
+        """ async_get_stations gets the clients connected to the access point """
+        pass
+
+    @abc.abstractmethod
+    async def async_get_radios(self) -> List[Radio]:
+        """ async_get_radios gets the channel, channel width, transmit power and band steering of each radio """
+        pass
+
+    @abc.abstractmethod
+    async def async_enable_ssid(self, ssids: List[Ssid], enable: bool) -> dict:
+        """ async_enable_ssid will turn ssids on or off in one request"""
+        pass
+
+    @abc.abstractmethod
+    def invalidate_device_info(self):
+        """ invalidate_device_info makes the next state request fetch the slow changing device info again """
+        pass
+
+    @abc.abstractmethod
+    def invalidate_radios(self):
+        """ invalidate_radios makes the next state request fetch the radio configuration again """
         pass
 
     @abc.abstractmethod
     async def check_for_firmware_updates(self):
         """ check_for_firmware_updates tells the device to check for firmware updates"""
         pass
+
+    async def async_close(self):
+        """ async_close releases the connections held by the client """
+        pass
@@ -1,136 +1,464 @@
 """Netgear API Client."""
+import asyncio
+from collections import deque
+import functools
 import json
 import logging
+import ssl
+import sys
 import time
 
 import aiohttp
 from aiohttp import hdrs
 from aiohttp.client_reqrep import ClientResponse
-from typing import List, Optional
-
-from custom_components.netgear_wax.client import NetgearClient, DeviceState, Ssid, Stat
-from custom_components.netgear_wax.const import STATE_REQUEST_DATA
-from custom_components.netgear_wax.utils import parse_human_string, safe_cast
+from typing import Awaitable, Callable, Deque, FrozenSet, List, Optional, Tuple, TypeVar, Union
+
+from custom_components.netgear_wax.client import (
+    NetgearClient, DeviceState, Radio, Ssid, StatMap, Station, intern, share,
+)
+from custom_components.netgear_wax.const import (
+    CALL_DEADLINE_SECONDS,
+    CONNECT_TIMEOUT_SECONDS,
+    CONNECTION_KEEPALIVE_SECONDS,
+    CONNECTION_LIMIT,
+    DEVICE_INFO_TTL_SECONDS,
+    DIAGNOSTICS_EXCHANGES,
+    ENDPOINT_INDEX,
+    ENDPOINT_LOG_FILE,
+    ENDPOINT_LOGOUT,
+    ENDPOINT_SOCKET_COMMUNICATION,
+    FAST_STATE_QUERY,
+    PROBE_TIMEOUT_SECONDS,
+    QUERY_CONNECTIVITY,
+    QUERY_DEVICE_INFO,
+    QUERY_FIRMWARE,
+    QUERY_FRAGMENTS,
+    QUERY_RADIOS,
+    QUERY_STATIONS,
+    RADIOS_QUERY,
+    RADIOS_TTL_SECONDS,
+    REQUEST_TIMEOUT_SECONDS,
+    RESPONSE_CHUNK_BYTES,
+    RETRY_ATTEMPTS,
+    SESSION_REFRESH_SECONDS,
+    SSIDS_QUERY,
+    STATE_QUERY,
+    STATIONS_QUERY,
+)
+from custom_components.netgear_wax.metrics import Exchange, NetgearMetrics
+from custom_components.netgear_wax.resilience import CircuitOpenError, async_retry, is_transient
+from custom_components.netgear_wax.schema import (
+    BAND_STEERING_FIELD,
+    CLIENT_COUNT_SCHEMA,
+    DEVICE_INFO_SCHEMA,
+    FIRMWARE_SCHEMA,
+    RADIO_SCHEMA,
+    SSID_SCHEMA,
+    STAT_SCHEMA,
+    STATION_SCHEMA,
+    get_path,
+)
+from custom_components.netgear_wax.utils import merge_dicts
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+T = TypeVar("T")
+
+
+@functools.lru_cache(maxsize=None)
+def build_query(fragments: FrozenSet[str]) -> bytes:
+    """ Returns the serialized socketCommunication request for the given combination of query fragments. The result
+    is cached, so each combination is only merged and serialized once """
+    tree = {}
+    for name in sorted(fragments):
+        tree = merge_dicts(tree, QUERY_FRAGMENTS[name])
+    return json.dumps(tree).encode("utf-8")
+
 
 class NetgearWaxClient(NetgearClient):
     """ NetgearWaxClient is the client for accessing Netgear WAX access points """
 
-    def __init__(self, username: str, password: str, address: str, port: int, session: aiohttp.ClientSession) -> None:
+    def __init__(self, username: str, password: str, address: str, port: int,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 ssl_context: Union[ssl.SSLContext, bool] = False) -> None:
+        """ Without a session the client creates its own, with a connection pool for this access point only. The
+        device uses a self-signed certificate, ssl_context is usually a shared context that doesn't verify it """
         super().__init__()
         self._username = username
         self._password = password
         self._address = address
         self._session = session
+        self._owns_session = session is None
+        self._ssl_context = ssl_context
+        # Connections opened (each one a TCP and TLS handshake) and connections reused from the pool
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.retry_attempts = RETRY_ATTEMPTS
+        self.retries = 0
+        # Logins because the device dropped the session, and proactive replacements of aging sessions
+        self.relogin_count = 0
+        self.session_refresh_count = 0
+        # Request, decode and poll metrics, None unless the metrics option is on
+        self.metrics: Optional[NetgearMetrics] = None
+        # The last few requests, for the diagnostics download. Their bodies are only kept while the metrics option is
+        # on, and they're the ones the client already has, nothing is copied.
+        self.exchanges: Deque[Exchange] = deque(maxlen=DIAGNOSTICS_EXCHANGES)
         self._base_url = "https://{0}:{1}".format(address, port)
         self._lhttpdsid = ""
         self._security_token = ""
         self._internet_connectivity_check: Optional[float] = None
+        # The last state, used to fill in the slow changing fields that aren't fetched on every poll
+        self._device_info: Optional[DeviceState] = None
+        self._device_info_fetched: Optional[float] = None
+        self._radios_fetched: Optional[float] = None
+        # True after a check for firmware updates, until a state request reads the status the check came up with
+        self._firmware_status_due = False
+
+        # Only one login may run at a time. The generation is bumped on every login so callers that saw an expired
+        # session can tell whether somebody else already logged in while they were waiting on the lock
+        self._login_lock = asyncio.Lock()
+        self._session_generation = 0
+        self._session_started: Optional[float] = None
+        self.login_count = 0
+        self.last_login_latency: Optional[float] = None
+        self.total_login_latency = 0.0
 
         _LOGGER.debug("Creating client with username %s", username)
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """ Returns the session requests are sent with, creating the client's own session if needed """
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            keepalive_timeout=CONNECTION_KEEPALIVE_SECONDS,
+            ssl=self._ssl_context,
+        )
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+
+        # The cookies are sent explicitly on every request, a cookie jar would only resend stale ones
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+            cookie_jar=aiohttp.DummyCookieJar(),
+            trace_configs=[trace_config],
+        )
+
+    async def _on_connection_created(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.connections_reused += 1
+
+    async def async_close(self):
+        """ async_close closes the client's own session and its connections. A session passed in is left open """
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _async_call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """ Runs call, which may send several requests (a login and the request itself), with a deadline for each
+        attempt and retries for transient failures. While the circuit breaker is open calls fail fast, and once it's
+        half open the first call sends a probe before going ahead """
+        breaker = self.breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Requests to {self._address} are paused after repeated failures")
+
+        async def attempt() -> T:
+            async with asyncio.timeout(CALL_DEADLINE_SECONDS):
+                return await call()
+
+        def on_retry(exception: BaseException):
+            self.retries += 1
+
+        try:
+            if breaker.probing:
+                await self._async_probe()
+                breaker.record_success()
+            result = await async_retry(attempt, attempts=self.retry_attempts, on_retry=on_retry)
+        except Exception as exception:
+            if is_transient(exception):
+                breaker.record_failure()
+            else:
+                # The device answered, it's just not an answer we like
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.abort_probe()
+            raise
+
+        breaker.record_success()
+        return result
+
+    async def _async_probe(self):
+        """ Checks that the device answers at all. The unauthenticated start page is the cheapest request there is """
+        async with asyncio.timeout(PROBE_TIMEOUT_SECONDS):
+            await self._async_request(hdrs.METH_GET, ENDPOINT_INDEX)
+
     async def async_login(self):
         """ async_login sets the lhttpdsid and security token which are needed to issues requests """
+        async def login():
+            async with self._login_lock:
+                await self._async_login()
+
+        await self._async_call(login)
+
+    @property
+    def session_age(self) -> Optional[float]:
+        """ Returns the number of seconds since the current session was created, or None if not logged in """
+        if self._session_started is None:
+            return None
+        return time.monotonic() - self._session_started
+
+    def _is_session_fresh(self) -> bool:
+        age = self.session_age
+        return age is not None and age < SESSION_REFRESH_SECONDS
+
+    async def _async_ensure_session(self, stale_generation: Optional[int] = None):
+        """ Makes sure there's a usable session. If stale_generation is supplied, the session with that generation
+        was rejected by the device and a new one is needed, unless another caller already replaced it. Sessions
+        older than SESSION_REFRESH_SECONDS are replaced before the device expires them """
+        if stale_generation is None and self._is_session_fresh():
+            return
+
+        async with self._login_lock:
+            if stale_generation is not None and stale_generation != self._session_generation:
+                return
+
+            if stale_generation is not None:
+                # The device dropped our session, it may have rebooted into new firmware and picked new channels
+                self._device_info_fetched = None
+                self._radios_fetched = None
+                self.relogin_count += 1
+
+            if stale_generation is None and self._is_session_fresh():
+                return
+
+            if stale_generation is None and self._session_started is not None:
+                self.session_refresh_count += 1
+                # Log out first, the device limits concurrent logins and the old session would linger until it expires
+                try:
+                    await self._async_logout()
+                except Exception as exception:  # pylint: disable=broad-except
+                    _LOGGER.debug("Failed to log out of the expiring session", exc_info=exception)
+
+            await self._async_login()
+
+    async def _async_login(self):
+        """ Logs in, the caller must hold the login lock """
         _LOGGER.debug("Logging in with username %s", self._username)
+        started = time.monotonic()
 
         # Login step 1 - Get lhttpdsid cookie
-        response: ClientResponse = await self._session.get(self._base_url)
+        response, body = await self._async_request(hdrs.METH_GET, ENDPOINT_INDEX)
+        response.raise_for_status()
         cookies: dict = self.get_cookies(response)
         lhttpdsid = cookies.get("lhttpdsid")
         if lhttpdsid is None:
-            text = await response.text()
-            raise Exception("Could not get lhttpdsid cookie: " + text)
-        response.raise_for_status()
+            raise Exception("Could not get lhttpdsid cookie: " + body.decode("utf-8", "replace"))
 
         # Login step 2 - Get security token
         data = json.dumps({"system": {"basicSettings": {"adminName": self._username, "adminPasswd": self._password}}})
-        response = await self._session.post(url=self._base_url + "/socketCommunication", data=data,
-                                            cookies={"lhttpdsid": lhttpdsid})
+        response, body = await self._async_request(hdrs.METH_POST, ENDPOINT_SOCKET_COMMUNICATION, data,
+                                                   sensitive=True, cookies={"lhttpdsid": lhttpdsid})
         response.raise_for_status()
-        _LOGGER.debug("login security token response=%s", await response.text())
+        _LOGGER.debug("login security token response status=%s", response.status)
 
         # Older firmwares use a response header
         security_token = response.headers.get("security")
 
         # Newer firmewares return a security token in the response
-        text = ""
         if security_token is None:
-            text = await response.text()
-            result = json.loads(text)
+            result = self._decode(body)
             if "system" in result and "security_token" in result["system"]:
                 security_token = result["system"]["security_token"]
 
         if security_token is None:
-            raise Exception("Could not get security token: " + text)
+            raise Exception("Could not get security token: " + body.decode("utf-8", "replace"))
 
-        # TODO: is python thread safe? I have no idea. If not, we should guard when settings these two values
         self._lhttpdsid = lhttpdsid
         self._security_token = security_token
+        self._session_generation += 1
+        self._session_started = time.monotonic()
+
+        self.login_count += 1
+        self.last_login_latency = self._session_started - started
+        self.total_login_latency += self.last_login_latency
 
     async def async_logout(self):
         """ async_logout issues a log out action for the currently auth session"""
+        async with self._login_lock, asyncio.timeout(CALL_DEADLINE_SECONDS):
+            await self._async_logout()
+
+    async def _async_logout(self):
+        """ Logs out, the caller must hold the login lock """
+        self._session_started = None
         _LOGGER.debug("Logging out with username %s", self._username)
         data = json.dumps({self._username: self._username})
-        response = await self._session.post(url=self._base_url + "/logout", data=data,
-                                            cookies=self.get_auth_cookie(), headers=self.get_auth_header())
+        response, _ = await self._async_request(hdrs.METH_POST, ENDPOINT_LOGOUT, data, sensitive=True,
+                                                cookies=self.get_auth_cookie(), headers=self.get_auth_header())
         response.raise_for_status()
 
     async def async_get_state(self, check_firmware: Optional[bool] = False) -> DeviceState:
         """ async_get_state gets the current state from the access point (mac address, name, firmware, etc) """
-        data = STATE_REQUEST_DATA.copy()
+        fragments = self.state_fragments() | STATE_QUERY
+        result = await self._async_post_and_check_firmware(build_query(fragments), check_firmware)
+        return self._update_state(result, fragments)
+
+    # {"system":{"wlanSettings":{"wlanSettingTable":{"ssidSetDetails":
+    # {"SSID3":{"wlan0":{"vap1":{"vapProfileStatus":"1", "ssid":"AT&T"}},
+    #           "wlan1":{"vap1":{"vapProfileStatus":"1", "ssid":"AT&T"}}}}}}}}
+    async def async_get_ssids(self) -> List[Ssid]:
+        """ async_get_ssids gets the SSIDs from the access point. Returns a list of ssid"""
+        result = await self.async_post(build_query(SSIDS_QUERY))
+        return self.parse_ssids(result)
+
+    async def async_get_state_and_ssids(self, check_firmware: Optional[bool] = False) -> Tuple[DeviceState, List[Ssid]]:
+        """ async_get_state_and_ssids gets the device state and the SSIDs in a single request. The device merges
+        the query trees, so this costs one round trip instead of two """
+        fragments = self.state_fragments()
+        result = await self._async_post_and_check_firmware(build_query(fragments | SSIDS_QUERY), check_firmware)
+        return self._update_state(result, fragments), self.parse_ssids(result)
+
+    async def _async_post_and_check_firmware(self, data: str, check_firmware: Optional[bool]) -> dict:
+        """ Posts the query. With check_firmware the device is told to check for firmware updates at the same time,
+        rather than before, so the check doesn't hold up the read. The next state request reads the status the check
+        came up with """
+        if not check_firmware:
+            return await self.async_post(data)
+        result, _ = await asyncio.gather(self.async_post(data), self._async_try_check_for_firmware_updates())
+        return result
+
+    async def _async_try_check_for_firmware_updates(self):
+        """ Tells the device to check for firmware updates, the state is still worth having if that fails """
+        try:
+            await self.check_for_firmware_updates()
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.info("Failed to check for firmware updates", exc_info=exception)
+            return
+        self._firmware_status_due = True
+
+    async def async_get_stations(self) -> List[Station]:
+        """ async_get_stations gets the clients connected to the access point """
+        result = await self.async_post(build_query(STATIONS_QUERY))
+        return list(self.parse_stations(result))
+
+    async def async_get_radios(self) -> List[Radio]:
+        """ async_get_radios gets the channel, channel width, transmit power and band steering of each radio. Polls
+        get them with the state every RADIOS_TTL_SECONDS, this is for when they're needed right away """
+        result = await self.async_post(build_query(RADIOS_QUERY))
+        return list(self.parse_radios(result))
 
-        if (self._internet_connectivity_check is None or time.time() - self._internet_connectivity_check) > 3600:
-            system_data = data["system"]
-            monitor_data = system_data["monitor"]
-            monitor_data["internetConnectivityStatus"] = ""
+    def invalidate_device_info(self):
+        """ invalidate_device_info makes the next state request fetch the slow changing device info again """
+        self._device_info_fetched = None
 
+    def invalidate_radios(self):
+        """ invalidate_radios makes the next state request fetch the radio configuration again """
+        self._radios_fetched = None
+
+    def state_fragments(self) -> FrozenSet[str]:
+        """ Returns the query fragments for the device state. The device info and the radio configuration are added
+        when they're missing or older than DEVICE_INFO_TTL_SECONDS and RADIOS_TTL_SECONDS, the connectivity status
+        once an hour and the firmware status after a check for firmware updates """
+        fragments = FAST_STATE_QUERY
+
+        if self._device_info_fetched is None or time.time() - self._device_info_fetched > DEVICE_INFO_TTL_SECONDS:
+            fragments = fragments | {QUERY_DEVICE_INFO}
+
+        if self._radios_fetched is None or time.time() - self._radios_fetched > RADIOS_TTL_SECONDS:
+            fragments = fragments | {QUERY_RADIOS}
+
+        if self._internet_connectivity_check is None or time.time() - self._internet_connectivity_check > 3600:
+            fragments = fragments | {QUERY_CONNECTIVITY}
             self._internet_connectivity_check = time.time()
 
-        if check_firmware:
-            system_data = data["system"]
-            system_data["FwUpdate"] = {
-                    "ImageAvailable": "",
-                    "ImageVersion": ""
-            }
-
-            self._firmware_update_check = time.time()
-
-        request_data = json.dumps(data)
-
-        result = await self.async_post(request_data)
-        system = result["system"]
-        monitor = system["monitor"]
-
-        state = DeviceState()
-        state.firmware_version = monitor["sysVersion"]
-        state.device_name = result["system"]["basicSettings"]["apName"]
-        state.model = monitor["productId"]
-        state.mac_address = monitor["ethernetMacAddress"]
-        state.serial_number = monitor["sysSerialNumber"]
-        state.total_number_of_devices = monitor["totalNumberOfDevices"]
-        state.firmware_update_available = "FwUpdate" in system and "ImageAvailable" in system["FwUpdate"] and int(
-            system["FwUpdate"]["ImageAvailable"]) > 0
-        state.stats = {}
-
-        if "stats" in monitor:
-            stats = monitor["stats"]
-            for lan in ["lan", "wlan0", "wlan1", "wlan2"]:
-                if lan in stats:
-                    state.stats[lan] = Stat(
-                        safe_cast(stats[lan]["channelUtil"], int, 0) if "channelUtil" in stats[lan] else 0,
-                        parse_human_string(stats[lan]["traffic"]))
+        if self._firmware_status_due:
+            fragments = fragments | {QUERY_FIRMWARE}
 
+        if self.track_stations:
+            fragments = fragments | {QUERY_STATIONS}
+
+        return fragments
+
+    def _update_state(self, result: dict, fragments: FrozenSet[str]) -> DeviceState:
+        """ Parses the state and remembers it so the next polls can skip the device info """
+        state = self.parse_state(result, self._device_info)
+        if QUERY_DEVICE_INFO in fragments:
+            self._device_info_fetched = time.time()
+        if QUERY_RADIOS in fragments:
+            self._radios_fetched = time.time()
+        if QUERY_FIRMWARE in fragments:
+            self._firmware_status_due = False
+        self._device_info = state
         return state
 
-    # {"system":{"wlanSettings":{"wlanSettingTable":{"ssidSetDetails":
-    # {"SSID3":{"wlan0":{"vap1":{"vapProfileStatus":"1", "ssid":"AT&T"}},
-    #           "wlan1":{"vap1":{"vapProfileStatus":"1", "ssid":"AT&T"}}}}}}}}
-    async def async_get_ssids(self) -> List[Ssid]:
-        """ async_get_ssids gets the SSIDs from the access point. Returns a list of ssid"""
-        data = json.dumps({"system": {"wlanSettings": {"wlanSettingTable": {"ssidGetDetails": ""}}}})
-        result = await self.async_post(data)
+    @staticmethod
+    def parse_state(result: dict, previous: Optional[DeviceState] = None) -> DeviceState:
+        """ Returns the DeviceState found in a socketCommunication response. Fields the response doesn't have, like
+        the device info on most polls, are copied from previous. Parts equal to previous are shared with it, and
+        previous itself is returned if nothing changed """
+        fields = {}
+        if previous is not None:
+            fields.update(
+                firmware_version=previous.firmware_version,
+                device_name=previous.device_name,
+                model=previous.model,
+                mac_address=previous.mac_address,
+                serial_number=previous.serial_number,
+                firmware_update_available=previous.firmware_update_available,
+            )
+
+        fields.update(DEVICE_INFO_SCHEMA.read(result))
+        fields.update(FIRMWARE_SCHEMA.read(result))
+        fields.update(CLIENT_COUNT_SCHEMA.read(result))
+
+        monitor_stats = get_path(result, "system", "monitor", "stats", default={})
+        stats = {lan: intern(STAT_SCHEMA.decode(monitor_stats[lan]))
+                 for lan in ["lan", "wlan0", "wlan1", "wlan2"] if lan in monitor_stats}
+        fields["stats"] = share(previous.stats if previous is not None else None, StatMap(stats))
+
+        if get_path(result, "system", "monitor", "connectedClients") is not None:
+            fields["stations"] = share(previous.stations if previous is not None else None,
+                                       NetgearWaxClient.parse_stations(result))
+
+        radios = NetgearWaxClient.parse_radios(result)
+        if radios:
+            fields["radios"] = share(previous.radios if previous is not None else None, radios)
+        elif previous is not None:
+            fields["radios"] = previous.radios
+
+        return share(previous, DeviceState(**fields))
+
+    @staticmethod
+    def parse_stations(result: dict) -> Tuple[Station, ...]:
+        """ Returns the connected clients found in a socketCommunication response. The rows are either a list or a
+        dictionary keyed by row number depending on the firmware, rows without a MAC address are skipped """
+        rows = get_path(result, "system", "monitor", "connectedClients")
+        # Not interned, the byte counters change on every poll so the rows are hardly ever shared. The StationTable
+        # keeps them compact instead.
+        return tuple(STATION_SCHEMA.decode_rows(rows))
+
+    @staticmethod
+    def parse_radios(result: dict) -> Tuple[Radio, ...]:
+        """ Returns the radios found in a socketCommunication response, empty if it has no radio configuration """
+        table = get_path(result, "system", "wlanSettings", "wlanSettingTable", default={})
+        band_steering = BAND_STEERING_FIELD.read(result)
+        return tuple(
+            intern(RADIO_SCHEMA.decode(table[wlan_id], wlan_id=sys.intern(wlan_id), band_steering=band_steering))
+            for wlan_id in sorted(table)
+            if wlan_id.startswith("wlan") and isinstance(table[wlan_id], dict)
+        )
+
+    @classmethod
+    def parse_ssids(cls, result: dict) -> List[Ssid]:
+        """ Returns the SSIDs found in a socketCommunication response """
         details = result["system"]["wlanSettings"]["wlanSettingTable"]["ssidGetDetails"]
 
         ssids = []
@@ -138,37 +466,44 @@ class NetgearWaxClient(NetgearClient):
             for i in range(4):
                 wlan_id = "wlan" + str(i)
                 if wlan_id in ssid_value:
-                    ssids.extend(self.load_wlan(ssid_index, wlan_id, ssid_value[wlan_id]))
+                    ssids.extend(cls.load_wlan(ssid_index, wlan_id, ssid_value[wlan_id]))
 
         return ssids
 
-    async def async_enable_ssid(self, ssids: List[Ssid], enable: bool):
-        """ async_enable_ssid will turn an ssid on or off. All supplied ssids but be the same ssid, but there
-        can be more than one, for example 2.5 GHz and 5.0 GHz"""
+    async def async_enable_ssid(self, ssids: List[Ssid], enable: bool) -> dict:
+        """ async_enable_ssid will turn ssids on or off. Usually all supplied ssids are the same ssid on different
+        radios, for example 2.5 GHz and 5.0 GHz, but they may span several ssid ids. They're all set in one request.
+        Returns the device response """
         if len(ssids) == 0:
             _LOGGER.warning("No ssids supplied")
-            return
+            return {}
 
-        ssid_id = ssids[0].ssid_id
         status = "1" if enable else "0"
         details = {}
 
         for ssid in ssids:
-            details[ssid.wlan_id] = {ssid.vap: {"vapProfileStatus": status, "ssid": ssid.ssid}}
+            wlans = details.setdefault(ssid.ssid_id, {})
+            wlans.setdefault(ssid.wlan_id, {})[ssid.vap] = {"vapProfileStatus": status, "ssid": ssid.ssid}
 
-        data = json.dumps({"system": {"wlanSettings": {"wlanSettingTable": {"ssidSetDetails": {ssid_id: details}}}}})
+        data = json.dumps({"system": {"wlanSettings": {"wlanSettingTable": {"ssidSetDetails": details}}}})
 
-        _LOGGER.debug("Setting SSID '%s' enabled state to %s", ssids[0].ssid, enable)
+        _LOGGER.debug("Setting SSIDs %s enabled state to %s", sorted({ssid.ssid for ssid in ssids}), enable)
         result = await self.async_post(data)
         _LOGGER.debug("result=%s", result)
+        return result
 
     async def check_for_firmware_updates(self):
         """ check_for_firmware_updates tells the device to check for firmware updates"""
         _LOGGER.debug("Checking for firmware updates")
-        data = json.dumps({"method": 5, "upgradeCheck": 0})
-        response = await self._session.post(url=self._base_url + "/LogFile", data=data,
-                                            cookies=self.get_auth_cookie(), headers=self.get_auth_header())
-        response.raise_for_status()
+
+        async def check():
+            await self._async_ensure_session()
+            data = json.dumps({"method": 5, "upgradeCheck": 0})
+            response, _ = await self._async_request(hdrs.METH_POST, ENDPOINT_LOG_FILE, data,
+                                                    cookies=self.get_auth_cookie(), headers=self.get_auth_header())
+            response.raise_for_status()
+
+        await self._async_call(check)
 
     @staticmethod
     def load_wlan(ssid_index: str, wlan_id: str, vaps) -> List[Ssid]:
@@ -181,39 +516,79 @@ class NetgearWaxClient(NetgearClient):
         """
         ssids = []
         for vid, vap in vaps.items():
-            ssid = Ssid()
-
-            ssid.ssid_id = ssid_index
-            ssid.ssid = vap["ssid"]
-            ssid.vap = vid
-            ssid.wlan_id = wlan_id
-            ssid.enabled = "vapProfileStatus" in vap and vap["vapProfileStatus"] == 1
-            ssid.ssid_index = ssid_index
-            ssid.unique_id = f"{ssid_index}_{wlan_id}_{vid}_{ssid.ssid}"
-            if ssid is not None:
-                ssids.append(ssid)
+            values = SSID_SCHEMA.read(vap)
+            ssids.append(intern(Ssid(
+                ssid_id=sys.intern(ssid_index),
+                vap=sys.intern(vid),
+                wlan_id=sys.intern(wlan_id),
+                ssid_index=ssid_index,
+                unique_id=f"{ssid_index}_{wlan_id}_{vid}_{values['ssid']}",
+                **values,
+            )))
 
         return ssids
 
-    async def async_post(self, data: {}):
+    async def async_post(self, data: Union[bytes, str]):
+        """ Sends a socketCommunication request, logging in first if needed, and returns the decoded response """
+        return await self._async_call(lambda: self._async_post(data))
+
+    async def _async_post(self, data: Union[bytes, str]):
         async def call():
-            return await self._session.post(url=self._base_url + "/socketCommunication", data=data,
-                                            cookies=self.get_auth_cookie(), headers=self.get_auth_header())
+            return await self._async_request(hdrs.METH_POST, ENDPOINT_SOCKET_COMMUNICATION, data,
+                                             cookies=self.get_auth_cookie(), headers=self.get_auth_header())
 
-        response = await call()
-        text = await response.text()
-        result = json.loads(text)
+        await self._async_ensure_session()
+        generation = self._session_generation
+
+        response, body = await call()
+        if response.status >= 500:
+            # The device is restarting or overloaded, the retry policy deals with it
+            response.raise_for_status()
+        result = self._decode(body)
 
         if response.status == 401 or ("status" in result and result["status"] == 100):
-            await self.async_login()
-            response = await call()
+            await self._async_ensure_session(generation)
+            response, body = await call()
             response.raise_for_status()
-            text = await response.text()
-            result = json.loads(text)
+            result = self._decode(body)
 
         if result["status"] != 0:
-            _LOGGER.warning("Invalid response fetching state: %s", text)
+            _LOGGER.warning("Invalid response fetching state: %s", result)
+
+        return result
 
+    async def _async_request(self, method: str, endpoint: str, data: Union[bytes, str, None] = None,
+                             sensitive: bool = False, **kwargs) -> Tuple[ClientResponse, bytearray]:
+        """ Sends a request and reads the whole body, which hands the connection back to the pool. The body is read
+        in chunks into one buffer, there's no second full copy as a str like response.text() makes. The bodies are kept
+        for diagnostics while metrics are on, except the request body of a sensitive request (one with credentials) """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        started = time.perf_counter()
+        response = await self.session.request(method, self._base_url + endpoint, data=data, **kwargs)
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_BYTES):
+            body += chunk
+        duration = time.perf_counter() - started
+
+        metrics = self.metrics
+        if metrics is None:
+            self.exchanges.append(Exchange(time.time(), method, endpoint, response.status, duration))
+        else:
+            self.exchanges.append(Exchange(time.time(), method, endpoint, response.status, duration,
+                                           None if sensitive else data, body))
+            metrics.record_request(endpoint, duration, len(data) if data else 0, len(body))
+        return response, body
+
+    def _decode(self, body: bytearray) -> dict:
+        metrics = self.metrics
+        if metrics is None:
+            return json.loads(body)
+
+        started = time.perf_counter()
+        result = json.loads(body)
+        metrics.record_decode(time.perf_counter() - started)
         return result
 
     def get_auth_cookie(self) -> dict:
@@ -5,7 +5,7 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.util.ssl import get_default_no_verify_context
 
 from .client_wax import NetgearWaxClient
 from .const import (
@@ -15,7 +15,16 @@ from .const import (
     CONF_PORT,
     DOMAIN,
     PLATFORMS,
+    PLATFORMS_DISABLED_BY_DEFAULT,
     CONF_MAC,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_METRICS,
+    CONF_SYSLOG,
+    CONF_SYSLOG_PORT,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_SYSLOG_PORT,
 )
 
 # https://developers.home-assistant.io/docs/data_entry_flow_index
@@ -81,9 +90,8 @@ class NetgearFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _test_credentials(self, username, password, address, port):
         """Return true if credentials is valid."""
+        client = NetgearWaxClient(username, password, address, port, ssl_context=get_default_no_verify_context())
         try:
-            session = async_create_clientsession(self.hass, verify_ssl=False)
-            client = NetgearWaxClient(username, password, address, port, session)
             state = await client.async_get_state()
             # Log out is important, the device limits concurrent logins
             await client.async_logout()
@@ -93,6 +101,8 @@ class NetgearFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         except Exception as exception:  # pylint: disable=broad-except
             _LOGGER.error("Failed: %s", exception, exc_info=exception)
             pass
+        finally:
+            await client.async_close()
 
 
 class NetgearOptionsFlowHandler(config_entries.OptionsFlow):
@@ -113,14 +123,24 @@ class NetgearOptionsFlowHandler(config_entries.OptionsFlow):
             self.options.update(user_input)
             return await self._update_options()
 
+        schema = {
+            vol.Required(x, default=self.options.get(x, x not in PLATFORMS_DISABLED_BY_DEFAULT)): bool
+            for x in sorted(PLATFORMS)
+        }
+        schema[vol.Required(CONF_MIN_SCAN_INTERVAL,
+                            default=self.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL))] = \
+            vol.All(vol.Coerce(int), vol.Range(min=5))
+        schema[vol.Required(CONF_MAX_SCAN_INTERVAL,
+                            default=self.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL))] = \
+            vol.All(vol.Coerce(int), vol.Range(min=5))
+        schema[vol.Required(CONF_METRICS, default=self.options.get(CONF_METRICS, False))] = bool
+        schema[vol.Required(CONF_SYSLOG, default=self.options.get(CONF_SYSLOG, False))] = bool
+        schema[vol.Required(CONF_SYSLOG_PORT, default=self.options.get(CONF_SYSLOG_PORT, DEFAULT_SYSLOG_PORT))] = \
+            vol.All(vol.Coerce(int), vol.Range(min=1, max=65535))
+
         return self.async_show_form(
             step_id="user",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(x, default=self.options.get(x, True)): bool
-                    for x in sorted(PLATFORMS)
-                }
-            ),
+            data_schema=vol.Schema(schema),
         )
 
     async def _update_options(self):
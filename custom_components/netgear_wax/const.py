@@ -1,4 +1,6 @@
 """Constants for Netgear."""
+from .utils import freeze
+
 # Base component constants
 NAME = "Netgear WAX"
 DOMAIN = "netgear_wax"
@@ -12,6 +14,8 @@ UPDATE_ICON = "mdi:update"
 CHART_DONUT_ICON = "mdi:chart-donut"
 ROUTER_NETWORK_ICON = "mdi:router-network"
 LAN_ICON = "mdi:lan"
+CONNECTION_ICON = "mdi:lan-connect"
+METRICS_ICON = "mdi:timer-outline"
 
 # Device classes - https://www.home-assistant.io/integrations/binary_sensor/#device-class
 CONNECTIVITY_DEVICE_CLASS = "connectivity"
@@ -21,7 +25,10 @@ SAFETY_DEVICE_CLASS = "safety"
 BINARY_SENSOR = "binary_sensor"
 SENSOR = "sensor"
 SWITCH = "switch"
-PLATFORMS = [BINARY_SENSOR, SENSOR, SWITCH]
+DEVICE_TRACKER = "device_tracker"
+PLATFORMS = [BINARY_SENSOR, SENSOR, SWITCH, DEVICE_TRACKER]
+# Platforms that are off until turned on in the options. Tracking stations adds the connected clients to every poll.
+PLATFORMS_DISABLED_BY_DEFAULT = [DEVICE_TRACKER]
 
 # Configuration and options
 CONF_ENABLED = "enabled"
@@ -30,6 +37,170 @@ CONF_PASSWORD = "password"
 CONF_ADDRESS = "address"
 CONF_PORT = "port"
 CONF_MAC = "mac"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_METRICS = "metrics"
+CONF_SYSLOG = "syslog"
+CONF_SYSLOG_PORT = "syslog_port"
+
+# Adaptive polling. Each access point is polled somewhere between the min and max scan interval (in seconds). The
+# interval shrinks by the speedup factor when the connected client count, channel utilization (percentage points) or
+# traffic changes by at least the thresholds below between polls, and grows by the slowdown factor when nothing moves
+# or when a poll takes longer than the latency ratio of the interval.
+DEFAULT_MIN_SCAN_INTERVAL = 15
+DEFAULT_MAX_SCAN_INTERVAL = 300
+ADAPTIVE_SPEEDUP_FACTOR = 0.5
+ADAPTIVE_SLOWDOWN_FACTOR = 1.25
+ADAPTIVE_LATENCY_RATIO = 0.25
+ADAPTIVE_UTILIZATION_DELTA = 5
+ADAPTIVE_TRAFFIC_BYTES_PER_SECOND = 125000
+
+# Key in hass.data[DOMAIN] for the NetgearFleetScheduler shared by all config entries
+DATA_FLEET = "fleet"
+
+# Fleet polling. Polls and SSID commands of all access points share a number of request slots that grows with the
+# fleet: one for every FLEET_ACCESS_POINTS_PER_SLOT access points, and at least FLEET_MIN_CONCURRENT_REQUESTS. Each
+# poll start time is moved by up to FLEET_JITTER_SECONDS in either direction so access points added at the same time
+# don't poll in lockstep.
+FLEET_MIN_CONCURRENT_REQUESTS = 4
+FLEET_ACCESS_POINTS_PER_SLOT = 4
+FLEET_JITTER_SECONDS = 2.0
+
+# How long the device info fetched with QUERY_DEVICE_INFO is reused before it's fetched again
+DEVICE_INFO_TTL_SECONDS = 21600
+# Same for the radio configuration fetched with QUERY_RADIOS. Automatic channel selection moves radios now and then,
+# and radio syslog messages make the next poll fetch it right away.
+RADIOS_TTL_SECONDS = 900
+
+# SSID commands. Commands for the same ssid_id within the coalesce window are merged into one. The device takes 20-30
+# seconds to apply a change, so completion is checked with ssidGetDetails reads, starting after the initial delay and
+# doubling up to the max delay, until the timeout.
+SSID_COMMAND_COALESCE_SECONDS = 1.0
+SSID_VERIFY_INITIAL_DELAY_SECONDS = 4.0
+SSID_VERIFY_MAX_DELAY_SECONDS = 16.0
+SSID_VERIFY_TIMEOUT_SECONDS = 90.0
+
+# Throughput rates are measured across this many traffic samples per interface and smoothed with this weight for
+# the newest rate (see rates.TrafficRateTracker)
+RATE_SAMPLES = 10
+RATE_SMOOTHING = 0.3
+
+# Change tracking field for the SSID list. DeviceState fields are tracked by their attribute name and stats by
+# utils.stat_field.
+FIELD_SSIDS = "ssids"
+# Change tracking field for stations joining or leaving. Changes to one station are tracked by utils.station_field.
+FIELD_STATIONS = "stations"
+FIELD_BREAKER = "breaker"
+
+# Events fired when a station joins or leaves an access point
+EVENT_STATION_JOINED = "netgear_wax_station_joined"
+EVENT_STATION_LEFT = "netgear_wax_station_left"
+# Event fired for every syslog message that was understood, see syslog.parse_syslog
+EVENT_RECEIVED = "netgear_event_received"
+
+# Services
+SERVICE_SET_SSIDS = "set_ssids"
+SERVICE_PROFILE = "profile"
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_GET_FLEET_ANALYTICS = "get_fleet_analytics"
+ATTR_RESOLUTION = "resolution"
+ATTR_DURATION = "duration"
+ATTR_SSIDS = "ssids"
+ATTR_ENABLED = "enabled"
+ATTR_ACCESS_POINTS = "access_points"
+
+# Outcome of the last SSID command, exposed on the switch entity and returned by the set_ssids service
+TOGGLE_PENDING = "pending"
+TOGGLE_CONFIRMED = "confirmed"
+TOGGLE_FAILED = "failed"
+
+# Sessions older than this are replaced before the device expires them
+SESSION_REFRESH_SECONDS = 1800
+
+# Device endpoints
+ENDPOINT_INDEX = "/"
+ENDPOINT_SOCKET_COMMUNICATION = "/socketCommunication"
+ENDPOINT_LOGOUT = "/logout"
+ENDPOINT_LOG_FILE = "/LogFile"
+
+# Upper bounds, in milliseconds, of the latency histogram buckets. Only used when the metrics option is on.
+METRICS_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# How many requests and polls the diagnostics download shows
+DIAGNOSTICS_EXCHANGES = 10
+DIAGNOSTICS_POLLS = 50
+
+# The sampling profiler samples the event loop this often while a poll runs, and keeps this many distinct stacks
+PROFILER_INTERVAL_SECONDS = 0.005
+PROFILER_MAX_STACKS = 200
+PROFILER_DEFAULT_SECONDS = 300
+
+# Response bodies are read in chunks of this many bytes
+RESPONSE_CHUNK_BYTES = 65536
+
+# Connection pool of each access point. The embedded web server is slow at TLS handshakes, so a few connections are
+# kept open and reused across polls. Idle connections are closed after the keep-alive time.
+CONNECTION_LIMIT = 2
+CONNECTION_KEEPALIVE_SECONDS = 60
+CONNECT_TIMEOUT_SECONDS = 10
+REQUEST_TIMEOUT_SECONDS = 15
+
+# Deadline for one attempt at a call, including the login it may need
+CALL_DEADLINE_SECONDS = 30
+# Transient failures (connection errors, timeouts, 5xx) are retried with exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 8.0
+
+# Circuit breaker of each access point. After this many failed calls in a row requests are paused, then a single
+# cheap probe is sent once the pause is over. The pause doubles after every failed probe.
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_SECONDS = 30
+BREAKER_MAX_OPEN_SECONDS = 600
+PROBE_TIMEOUT_SECONDS = 5
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# The last known device info, stats and SSIDs of each access point are stored in .storage/netgear_wax.<entry_id>, so
+# entities can be created at startup before the access point answers. Saves wait this many seconds so a burst of
+# changes is written once.
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY_SECONDS = 10
+
+# Channel utilization history kept in memory for every radio, as (bucket seconds, buckets kept): 6 hours by the
+# minute, 4 days by the quarter hour and 14 days by the hour. The hourly buckets are also added to Home Assistant's
+# long-term statistics.
+HISTORY_TIERS = ((60, 360), (900, 384), (3600, 336))
+HISTORY_RESOLUTIONS = {"1m": 60, "15m": 900, "1h": 3600}
+
+# Syslog receiver. Access points can send their syslog to Home Assistant on this port, over UDP or TCP. It's above
+# 1024 so Home Assistant doesn't need root to listen on it. The listener is shared by every config entry using the
+# same port, and events arriving within the refresh delay are answered with one poll.
+DEFAULT_SYSLOG_PORT = 5514
+DATA_SYSLOG = "syslog"
+SYSLOG_REFRESH_DELAY_SECONDS = 0.5
+SYSLOG_MAX_MESSAGE_BYTES = 8192
+# Kinds of syslog events
+SYSLOG_STATION_JOINED = "station_joined"
+SYSLOG_STATION_LEFT = "station_left"
+SYSLOG_RADIO = "radio"
+SYSLOG_CONFIG = "config"
+
+# Bands, and the band of each radio. wlan2 is the second 5 GHz radio of the tri-band models.
+BAND_2_4_GHZ = "2.4GHz"
+BAND_5_GHZ = "5GHz"
+BAND_6_GHZ = "6GHz"
+RADIO_BANDS = {"wlan0": BAND_2_4_GHZ, "wlan1": BAND_5_GHZ, "wlan2": BAND_5_GHZ}
+
+# Fleet analytics (see analytics.FleetAnalytics). The congestion score of a radio is a moving average of its channel
+# utilization over the window, the hottest access points are the ones with the highest score, and radios that haven't
+# reported for the max age are left out. The signal is sent whenever the analytics change.
+ANALYTICS_WINDOW_SECONDS = 900
+ANALYTICS_HOTTEST = 5
+ANALYTICS_MAX_AGE_SECONDS = 1800
+SIGNAL_FLEET_ANALYTICS = f"{DOMAIN}_fleet_analytics"
+FLEET_DEVICE_ID = "fleet"
 
 STARTUP_MESSAGE = f"""
 -------------------------------------------------------------------
@@ -40,35 +211,132 @@ If you have any issues with this you need to open an issue here:
 -------------------------------------------------------------------
 """
 
-STATE_REQUEST_DATA = {
-    "system": {
-        "monitor": {
-            "productId": "",
-            "totalNumberOfDevices": "",
-            "sysSerialNumber": "",
-            "ethernetMacAddress": "",
-            "sysVersion": "",
-            "FiveGhzSupport": {},
-            "stats": {
-                "lan": {
-                    "traffic": "",
+# Query fragments. Each fragment is a piece of the socketCommunication request tree, the client merges the
+# fragments it needs for a request into one tree. The fragments are frozen, use build_query in client_wax to
+# get the serialized request for a combination of fragments.
+QUERY_DEVICE_INFO = "device_info"
+QUERY_CLIENT_COUNT = "client_count"
+QUERY_STATS = "stats"
+QUERY_FIRMWARE = "firmware"
+QUERY_CONNECTIVITY = "connectivity"
+QUERY_SSIDS = "ssids"
+QUERY_STATIONS = "stations"
+QUERY_RADIOS = "radios"
+
+QUERY_FRAGMENTS = freeze({
+    QUERY_DEVICE_INFO: {
+        "system": {
+            "monitor": {
+                "productId": "",
+                "sysSerialNumber": "",
+                "ethernetMacAddress": "",
+                "sysVersion": "",
+                "FiveGhzSupport": {},
+            },
+            "basicSettings": {
+                "apName": "",
+            },
+        }
+    },
+    QUERY_CLIENT_COUNT: {
+        "system": {
+            "monitor": {
+                "totalNumberOfDevices": "",
+            },
+        }
+    },
+    QUERY_STATS: {
+        "system": {
+            "monitor": {
+                "stats": {
+                    "lan": {
+                        "traffic": "",
+                    },
+                    "wlan0": {
+                        "traffic": "",
+                        "channelUtil": "",
+                    },
+                    "wlan1": {
+                        "traffic": "",
+                        "channelUtil": "",
+                    },
+                    "wlan2": {
+                        "traffic": "",
+                        "channelUtil": "",
+                    }
                 },
-                "wlan0": {
-                    "traffic": "",
-                    "channelUtil": "",
+            },
+        }
+    },
+    QUERY_FIRMWARE: {
+        "system": {
+            "FwUpdate": {
+                "ImageAvailable": "",
+                "ImageVersion": "",
+            },
+        }
+    },
+    QUERY_CONNECTIVITY: {
+        "system": {
+            "monitor": {
+                "internetConnectivityStatus": "",
+            },
+        }
+    },
+    QUERY_SSIDS: {
+        "system": {
+            "wlanSettings": {
+                "wlanSettingTable": {
+                    "ssidGetDetails": "",
                 },
-                "wlan1": {
-                    "traffic": "",
-                    "channelUtil": "",
+            },
+        }
+    },
+    QUERY_STATIONS: {
+        "system": {
+            "monitor": {
+                "connectedClients": "",
+            },
+        }
+    },
+    # The radio settings (channel, width, transmit power, on/off) of each radio and the band steering switch
+    QUERY_RADIOS: {
+        "system": {
+            "wlanSettings": {
+                "wlanSettingTable": {
+                    "wlan0": "",
+                    "wlan1": "",
+                    "wlan2": "",
                 },
-                "wlan2": {
-                    "traffic": "",
-                    "channelUtil": "",
-                }
+                "bandSteeringSt": "",
+                "bandSteering": "",
             },
-        },
-        "basicSettings": {
-            "apName": "",
-        },
-    }
-}
+        }
+    },
+})
+
+# Precompiled fragment combinations. The device info (name, model, serial, MAC, firmware version) practically never
+# changes, so polls use FAST_STATE_QUERY and the client adds QUERY_DEVICE_INFO every DEVICE_INFO_TTL_SECONDS, and
+# QUERY_RADIOS every RADIOS_TTL_SECONDS.
+STATE_QUERY = frozenset({QUERY_DEVICE_INFO, QUERY_CLIENT_COUNT, QUERY_STATS})
+FAST_STATE_QUERY = frozenset({QUERY_CLIENT_COUNT, QUERY_STATS})
+SSIDS_QUERY = frozenset({QUERY_SSIDS})
+STATIONS_QUERY = frozenset({QUERY_STATIONS})
+RADIOS_QUERY = frozenset({QUERY_RADIOS})
+
+# Keys of a connectedClients row. Firmware versions differ in naming, the first key found wins.
+STATION_MAC_KEYS = ("MacAddress", "macAddress", "mac")
+STATION_SSID_KEYS = ("Ssid", "ssid", "SSID")
+STATION_RADIO_KEYS = ("Radio", "radio", "wlan", "band")
+STATION_RSSI_KEYS = ("Rssi", "rssi", "RSSI", "signal")
+STATION_RATE_KEYS = ("Rate", "rate", "txRate")
+STATION_TX_KEYS = ("TxBytes", "txBytes", "tx")
+STATION_RX_KEYS = ("RxBytes", "rxBytes", "rx")
+
+# Keys of a wlanSettingTable radio and of the band steering switch, the first key found wins. The operating channel
+# is preferred over the configured one, which is 0 when the channel is picked automatically.
+RADIO_STATUS_KEYS = ("radioStatus", "wlanStatus", "status")
+RADIO_CHANNEL_KEYS = ("currentChannel", "operatingChannel", "channel")
+RADIO_WIDTH_KEYS = ("channelWidth", "channelBandwidth", "bandwidth")
+RADIO_TX_POWER_KEYS = ("txPower", "transmitPower", "txPwr")
+BAND_STEERING_KEYS = ("bandSteeringSt", "bandSteering")
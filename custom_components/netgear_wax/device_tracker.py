@@ -0,0 +1,88 @@
+"""Device tracker platform for netgear_wax."""
+import logging
+from typing import Set
+
+from homeassistant.components.device_tracker import ScannerEntity, SourceType
+from homeassistant.core import HomeAssistant, callback
+from custom_components.netgear_wax import NetgearDataUpdateCoordinator
+
+from .const import DOMAIN, FIELD_STATIONS, WIFI_ICON
+from .entity import NetgearBaseEntity
+from .utils import station_field
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
+    """Setup device_tracker platform."""
+    coordinator: NetgearDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    tracked: Set[str] = set()
+
+    @callback
+    def add_new_stations():
+        # Stations are added as they're first seen. Ones that leave keep their entity and show as away.
+        if not coordinator.has_changed(frozenset({FIELD_STATIONS})):
+            return
+        trackers = [
+            NetgearStationTracker(coordinator, entry, mac) for mac in coordinator.stations if mac not in tracked
+        ]
+        tracked.update(tracker.mac_address for tracker in trackers)
+        if trackers:
+            async_add_devices(trackers)
+
+    add_new_stations()
+    entry.async_on_unload(coordinator.async_add_listener(add_new_stations))
+
+
+class NetgearStationTracker(ScannerEntity, NetgearBaseEntity):
+    """ Shows whether a station (Wi-Fi client) is connected to the access point. ScannerEntity comes first so its
+    device_info is used, trackers don't belong to the access point's device """
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, mac: str):
+        NetgearBaseEntity.__init__(self, coordinator, config_entry)
+        self._coordinator = coordinator
+        self._mac = mac
+        self._name = f"{coordinator.get_device_name()} {mac}"
+        self._unique_id = f"{coordinator.get_mac()}_{mac}"
+        self._watched_fields = frozenset({station_field(mac)})
+
+    @property
+    def unique_id(self):
+        """Return the entity unique ID."""
+        return self._unique_id
+
+    @property
+    def name(self):
+        """Return the name of the tracker"""
+        return self._name
+
+    @property
+    def source_type(self) -> SourceType:
+        return SourceType.ROUTER
+
+    @property
+    def mac_address(self) -> str:
+        return self._mac
+
+    @property
+    def is_connected(self) -> bool:
+        return self._mac in self._coordinator.stations
+
+    @property
+    def extra_state_attributes(self):
+        """ Return the ssid, radio, signal, link rate and byte counts of the connected station """
+        station = self._coordinator.stations.get(self._mac)
+        if station is None:
+            return None
+        return {
+            "ssid": station.ssid,
+            "radio": station.wlan_id,
+            "rssi": station.rssi,
+            "rate": station.rate,
+            "tx_bytes": station.tx_bytes,
+            "rx_bytes": station.rx_bytes,
+        }
+
+    @property
+    def icon(self) -> str:
+        return WIFI_ICON
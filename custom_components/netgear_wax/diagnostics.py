@@ -0,0 +1,162 @@
+"""Diagnostics support for netgear_wax."""
+from datetime import datetime, timezone
+import json
+from typing import Any, Dict, Optional, Union
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import NetgearDataUpdateCoordinator
+from .const import CONF_PASSWORD, CONF_USERNAME, DOMAIN, STATION_MAC_KEYS
+from .metrics import Exchange, SetupTiming
+from .schema import get_path
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+# Keys redacted from recorded request and response bodies: credentials, the serial number and the MAC addresses of
+# connected clients
+BODY_TO_REDACT = {"adminName", "adminPasswd", "security_token", "sysSerialNumber", *STATION_MAC_KEYS}
+
+# Fields of the ssidGetDetails VAP records that are kept. The rest carry the Wi-Fi passphrases and keys, under names
+# that differ between firmwares, so everything the integration doesn't read is redacted
+VAP_FIELDS = {"vapProfileStatus", "ssid"}
+SSID_TABLES = ("ssidGetDetails", "ssidSetDetails")
+
+REDACTED = "**REDACTED**"
+
+# Bodies that aren't JSON, like the login page, are cut to this many characters
+TEXT_LIMIT = 2000
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: NetgearDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    metrics = coordinator.get_metrics()
+    breaker = coordinator.get_breaker()
+    ssids = coordinator.get_ssid_index()
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        # What tests/replay.py needs to rebuild the device in the simulator
+        "device": {
+            "model": coordinator.get_model() if coordinator.data is not None else None,
+            "firmware_version": coordinator.get_firmware_version() if coordinator.data is not None else None,
+            "device_name": coordinator.get_device_name() if coordinator.data is not None else None,
+            "mac": coordinator.get_mac(),
+        },
+        "client": {
+            "session_age": client.session_age,
+            "login_count": client.login_count,
+            "relogin_count": client.relogin_count,
+            "session_refresh_count": client.session_refresh_count,
+            "last_login_latency": client.last_login_latency,
+            "retries": client.retries,
+            "connections_created": client.connections_created,
+            "connections_reused": client.connections_reused,
+            "breaker": {
+                "state": breaker.state,
+                "consecutive_failures": breaker.consecutive_failures,
+                "times_opened": breaker.times_opened,
+                "retry_in": breaker.retry_in,
+            },
+            "exchanges": [_exchange(exchange) for exchange in client.exchanges],
+        },
+        "coordinator": {
+            "setup": _setup(coordinator.setup_timing),
+            "poll_interval": coordinator.poll_interval.total_seconds(),
+            "last_poll_latency": coordinator.last_poll_latency,
+            "last_update_success": coordinator.last_update_success,
+            "polls": [
+                {
+                    "time": _timestamp(poll.time),
+                    "duration_ms": round(poll.duration * 1000, 1),
+                    "success": poll.success,
+                    "poll_interval": poll.poll_interval,
+                }
+                for poll in coordinator.poll_history
+            ],
+        },
+        "ssid_index": {
+            "ssids": len(ssids.ssids),
+            "by_ssid_id": len(ssids.by_ssid_id),
+            "by_name": len(ssids.by_name),
+            "by_wlan_id": len(ssids.by_wlan_id),
+            "by_unique_id": len(ssids.by_unique_id),
+        },
+        "stations": len(coordinator.stations),
+        # Only when the syslog option is on
+        "syslog": {
+            "port": coordinator.syslog.port,
+            "listening": coordinator.syslog.listening,
+            "received": coordinator.syslog.received,
+            "dropped": coordinator.syslog.dropped,
+            "events": coordinator.syslog_events,
+        } if coordinator.syslog is not None else None,
+        "memory_bytes": coordinator.get_memory_usage(),
+        # Only collected when the metrics option is on
+        "metrics": metrics.as_dict() if metrics is not None else None,
+        # Only collected during a window started with the netgear_wax.profile service
+        "profile": coordinator.profiler.as_dict(),
+    }
+
+
+def _exchange(exchange: Exchange) -> dict:
+    result = {
+        "time": _timestamp(exchange.time),
+        "method": exchange.method,
+        "endpoint": exchange.endpoint,
+        "status": exchange.status,
+        "duration_ms": round(exchange.duration * 1000, 1),
+    }
+    # The bodies are only kept while the metrics option is on
+    if exchange.response is not None:
+        # Requests with credentials (login, logout) aren't recorded
+        result["request"] = REDACTED if exchange.request is None else _body(exchange.request)
+        result["response"] = _body(exchange.response)
+    return result
+
+
+def _setup(timing: Optional[SetupTiming]) -> Optional[dict]:
+    if timing is None:
+        return None
+    return {
+        "time": _timestamp(timing.time),
+        "duration_ms": round(timing.duration * 1000, 1),
+        "restore_ms": round(timing.restore * 1000, 1),
+        # None when the state was restored and the first poll ran in the background
+        "first_refresh_ms": None if timing.first_refresh is None else round(timing.first_refresh * 1000, 1),
+        "platforms_ms": round(timing.platforms * 1000, 1),
+    }
+
+
+def _body(body: Union[bytes, bytearray]) -> Union[dict, list, str]:
+    """ Returns the body as JSON with the keys in BODY_TO_REDACT and the VAP fields not in VAP_FIELDS redacted, or as
+    text if it isn't JSON """
+    try:
+        data = async_redact_data(json.loads(body), BODY_TO_REDACT)
+    except ValueError:
+        return bytes(body[:TEXT_LIMIT]).decode("utf-8", "replace")
+    _redact_vaps(data)
+    return data
+
+
+def _redact_vaps(data: Any):
+    """ Redacts the fields of the VAP records in data that aren't in VAP_FIELDS, in place """
+    table = get_path(data, "system", "wlanSettings", "wlanSettingTable", default=None)
+    if not isinstance(table, dict):
+        return
+    for name in SSID_TABLES:
+        details = table.get(name)
+        if not isinstance(details, dict):
+            continue
+        for wlans in details.values():
+            for vaps in (wlans.values() if isinstance(wlans, dict) else ()):
+                for vap in (vaps.values() if isinstance(vaps, dict) else ()):
+                    if isinstance(vap, dict):
+                        vap.update({key: REDACTED for key in vap if key not in VAP_FIELDS})
+
+
+def _timestamp(value: float) -> str:
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
@@ -1,5 +1,8 @@
 """NetgearBaseEntity class"""
+from typing import FrozenSet, Optional
+
 from custom_components.netgear_wax import NetgearDataUpdateCoordinator
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import DOMAIN
 
@@ -7,8 +10,13 @@ from .const import DOMAIN
 class NetgearBaseEntity(CoordinatorEntity):
     """
     NetgearBaseEntity is the base entity for all Netgear entities
+
+    Entities that set _watched_fields only write their state when one of those coordinator fields changed (see
+    NetgearDataUpdateCoordinator.has_changed). None means the state is written on every update.
     """
 
+    _watched_fields: Optional[FrozenSet[str]] = None
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry):
         super().__init__(coordinator)
         self.config_entry = config_entry
@@ -33,7 +41,8 @@ class NetgearBaseEntity(CoordinatorEntity):
         }
     # See extra_state_attributes  for extra data
 
-    @property
-    def should_poll(self) -> bool:
-        """Return True if entity has to be polled for state.  False if entity pushes its state to HA"""
-        return True
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._watched_fields is not None and not self._coordinator.has_changed(self._watched_fields):
+            return
+        super()._handle_coordinator_update()
@@ -0,0 +1,138 @@
+"""Channel utilization history for netgear_wax."""
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .const import HISTORY_TIERS
+
+
+class Bucket(NamedTuple):
+    """ Summary of the samples in one period. start is the period start in seconds since the epoch """
+    start: float
+    count: int
+    total: float
+    min: float
+    max: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+
+class Rollup:
+    """
+    A fixed size ring of buckets of one resolution, stored in flat arrays so memory is allocated once. Samples (or the
+    closed buckets of a finer rollup) are added to the open bucket until one for a later period arrives, then the
+    open bucket is written to the ring, overwriting the oldest one once the ring is full.
+    """
+
+    __slots__ = ("period", "capacity", "_starts", "_counts", "_totals", "_mins", "_maxs", "_next", "_size", "_open")
+
+    def __init__(self, period: int, capacity: int) -> None:
+        self.period = period
+        self.capacity = capacity
+        self._starts = array("d", bytes(8 * capacity))
+        self._counts = array("I", bytes(4 * capacity))
+        self._totals = array("f", bytes(4 * capacity))
+        self._mins = array("f", bytes(4 * capacity))
+        self._maxs = array("f", bytes(4 * capacity))
+        # Index the next closed bucket is written to, and how many are stored
+        self._next = 0
+        self._size = 0
+        self._open: Optional[Bucket] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, bucket: Bucket) -> Optional[Bucket]:
+        """ Adds the samples of bucket, returns the bucket that was closed if they belong to a later period """
+        start = bucket.start - bucket.start % self.period
+        current = self._open
+        if current is not None and current.start == start:
+            self._open = Bucket(start, current.count + bucket.count, current.total + bucket.total,
+                                min(current.min, bucket.min), max(current.max, bucket.max))
+            return None
+
+        self._open = bucket._replace(start=start)
+        if current is None or current.start > start:
+            # First sample, or the clock went back, drop what was open
+            return None
+        self._write(current)
+        return current
+
+    def _write(self, bucket: Bucket):
+        index = self._next
+        self._starts[index] = bucket.start
+        self._counts[index] = bucket.count
+        self._totals[index] = bucket.total
+        self._mins[index] = bucket.min
+        self._maxs[index] = bucket.max
+        self._next = (index + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __iter__(self) -> Iterator[Bucket]:
+        """ The closed buckets, oldest first """
+        first = (self._next - self._size) % self.capacity
+        for offset in range(self._size):
+            index = (first + offset) % self.capacity
+            yield Bucket(self._starts[index], self._counts[index], self._totals[index], self._mins[index],
+                         self._maxs[index])
+
+    @property
+    def current(self) -> Optional[Bucket]:
+        """ The bucket still collecting samples """
+        return self._open
+
+
+class TimeSeries:
+    """ One value (example: wlan1 channel utilization) kept at every resolution of HISTORY_TIERS """
+
+    __slots__ = ("rollups",)
+
+    def __init__(self, tiers: Tuple[Tuple[int, int], ...] = HISTORY_TIERS) -> None:
+        self.rollups = tuple(Rollup(period, capacity) for period, capacity in tiers)
+
+    def add(self, timestamp: float, value: float) -> Optional[Bucket]:
+        """ Adds a sample. Closed buckets of each rollup are added to the next coarser one, the bucket closed by the
+        coarsest rollup is returned """
+        value = float(value)
+        bucket: Optional[Bucket] = Bucket(timestamp, 1, value, value, value)
+        for rollup in self.rollups:
+            bucket = rollup.add(bucket)
+            if bucket is None:
+                return None
+        return bucket
+
+    def get_rollup(self, period: int) -> Optional[Rollup]:
+        for rollup in self.rollups:
+            if rollup.period == period:
+                return rollup
+        return None
+
+
+class StatHistory:
+    """ The time series of one access point, keyed by interface (wlan0, wlan1, etc) """
+
+    def __init__(self, tiers: Tuple[Tuple[int, int], ...] = HISTORY_TIERS) -> None:
+        self._tiers = tiers
+        self._series: Dict[str, TimeSeries] = {}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._series)
+
+    def add(self, lan: str, timestamp: float, value: float) -> Optional[Bucket]:
+        """ Adds a sample for the interface, returns a bucket if the coarsest resolution closed one """
+        series = self._series.get(lan)
+        if series is None:
+            series = self._series[lan] = TimeSeries(self._tiers)
+        return series.add(timestamp, value)
+
+    def get_buckets(self, lan: str, period: int) -> List[Bucket]:
+        """ Returns the buckets of the interface at the resolution, oldest first, including the open one """
+        series = self._series.get(lan)
+        rollup = series.get_rollup(period) if series is not None else None
+        if rollup is None:
+            return []
+        buckets = list(rollup)
+        if rollup.current is not None:
+            buckets.append(rollup.current)
+        return buckets
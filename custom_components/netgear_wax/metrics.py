@@ -0,0 +1,148 @@
+"""Request and poll metrics for netgear_wax."""
+from array import array
+from bisect import bisect_left
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from .const import METRICS_BUCKETS_MS
+
+
+class Exchange(NamedTuple):
+    """ One request to the device and its response, kept for the diagnostics download. The bodies are only kept while
+    the metrics option is on """
+    time: float
+    method: str
+    endpoint: str
+    status: int
+    duration: float
+    # None when the request carried credentials or the bodies aren't kept
+    request: Optional[Union[bytes, bytearray]] = None
+    response: Optional[Union[bytes, bytearray]] = None
+
+
+class PollTiming(NamedTuple):
+    """ Timing of one coordinator poll, kept for the diagnostics download """
+    time: float
+    duration: float
+    success: bool
+    poll_interval: float
+
+
+class SetupTiming(NamedTuple):
+    """ Timing of the config entry setup, kept for the diagnostics download. first_refresh is None when the state was
+    restored from the cache and the first poll ran in the background """
+    time: float
+    duration: float
+    restore: float
+    first_refresh: Optional[float]
+    platforms: float
+
+
+class LatencyHistogram:
+    """
+    Counts durations into fixed buckets (upper bounds in milliseconds, see METRICS_BUCKETS_MS, plus an overflow
+    bucket). Recording is a bisect and an increment, and the memory used never grows.
+    """
+
+    __slots__ = ("_bounds", "_counts", "count", "total", "max")
+
+    def __init__(self, bounds: Tuple[float, ...] = METRICS_BUCKETS_MS) -> None:
+        self._bounds = bounds
+        self._counts = array("q", [0] * (len(bounds) + 1))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        milliseconds = seconds * 1000
+        self._counts[bisect_left(self._bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.max:
+            self.max = milliseconds
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """ Returns the upper bound of the bucket holding the percentile, in milliseconds. The overflow bucket
+        reports the largest duration seen """
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                return self._bounds[index] if index < len(self._bounds) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        mean = self.mean
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self._bounds, self._counts)}
+        buckets["overflow"] = self._counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": None if mean is None else round(mean, 1),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max, 1),
+            "buckets": buckets,
+        }
+
+
+class EndpointMetrics:
+    """ Latency and traffic of one device endpoint, example: /socketCommunication """
+
+    __slots__ = ("latency", "request_bytes", "response_bytes")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "latency": self.latency.as_dict(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+
+class NetgearMetrics:
+    """
+    Metrics of one access point, shared by its client and coordinator. Only created when the metrics option is on.
+    Without it the client still times each request and the coordinator each poll, for the short histories in the
+    diagnostics download (see Exchange and PollTiming), but nothing is bucketed, JSON decoding isn't timed and no
+    bodies are kept.
+    """
+
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.decode = LatencyHistogram()
+        self.poll = LatencyHistogram()
+
+    def record_request(self, endpoint: str, seconds: float, request_bytes: int, response_bytes: int):
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.latency.observe(seconds)
+        metrics.request_bytes += request_bytes
+        metrics.response_bytes += response_bytes
+
+    def record_decode(self, seconds: float):
+        self.decode.observe(seconds)
+
+    def record_poll(self, seconds: float):
+        self.poll.observe(seconds)
+
+    def get_endpoint(self, endpoint: str) -> EndpointMetrics:
+        return self.endpoints.get(endpoint) or EndpointMetrics()
+
+    def as_dict(self) -> dict:
+        return {
+            "endpoints": {endpoint: metrics.as_dict() for endpoint, metrics in sorted(self.endpoints.items())},
+            "decode": self.decode.as_dict(),
+            "poll": self.poll.as_dict(),
+        }
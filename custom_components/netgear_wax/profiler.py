@@ -0,0 +1,93 @@
+"""Sampling profiler for netgear_wax polls."""
+from collections import Counter
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+from typing import Iterator, Optional
+
+from .const import PROFILER_INTERVAL_SECONDS, PROFILER_MAX_STACKS
+
+
+class PollProfiler:
+    """
+    Samples the event loop thread while polls run, during a window started with start(). Outside the window sample()
+    does nothing.
+
+    A background thread reads the stack of the event loop thread every interval and counts each distinct stack, in
+    the collapsed "outer;inner;innermost" format flame graph tools read. The loop runs other work while a poll waits
+    on the network, so those samples show up too, and samples sitting in the selector mean the poll was waiting on
+    the device.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL_SECONDS, max_stacks: int = PROFILER_MAX_STACKS) -> None:
+        self._interval = interval
+        self._max_stacks = max_stacks
+        self._lock = threading.Lock()
+        self._stacks: Counter = Counter()
+        self._until: Optional[float] = None
+        self.samples = 0
+        self.polls = 0
+
+    @property
+    def active(self) -> bool:
+        return self._until is not None and time.monotonic() < self._until
+
+    def start(self, duration: float):
+        """ Profiles the polls that start in the next duration seconds, dropping what an earlier window collected """
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.polls = 0
+        self._until = time.monotonic() + duration
+
+    @contextmanager
+    def sample(self) -> Iterator[None]:
+        """ Samples the current thread while the block runs, if the profiling window is open """
+        if not self.active:
+            yield
+            return
+
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._run, args=(threading.get_ident(), stop), daemon=True,
+                                   name="netgear_wax profiler")
+        sampler.start()
+        self.polls += 1
+        try:
+            yield
+        finally:
+            # The thread stops at its next wake up, there's no need to block the loop joining it
+            stop.set()
+
+    def _run(self, thread_id: int, stop: threading.Event):
+        while not stop.wait(self._interval):
+            frame = sys._current_frames().get(thread_id)  # pylint: disable=protected-access
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if not stack:
+                continue
+
+            key = ";".join(reversed(stack))
+            with self._lock:
+                self.samples += 1
+                # Once the table is full only stacks already in it are counted, so memory stays bounded
+                if key in self._stacks or len(self._stacks) < self._max_stacks:
+                    self._stacks[key] += 1
+
+    def as_dict(self) -> dict:
+        until = self._until
+        with self._lock:
+            stacks = self._stacks.most_common()
+            samples = self.samples
+        return {
+            "active": self.active,
+            "remaining_seconds": max(0.0, until - time.monotonic()) if until is not None else None,
+            "interval_seconds": self._interval,
+            "polls": self.polls,
+            "samples": samples,
+            "stacks": [f"{stack} {count}" for stack, count in stacks],
+        }
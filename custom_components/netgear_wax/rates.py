@@ -0,0 +1,71 @@
+"""Traffic rate computation for netgear_wax."""
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+from .client import Stat
+from .const import RATE_SAMPLES, RATE_SMOOTHING
+
+
+class TrafficSample(NamedTuple):
+    timestamp: float
+    bytes_transferred: int
+    bytes_resolution: int
+
+
+class TrafficRateTracker:
+    """
+    Turns the cumulative, rounded traffic counters the device reports into smoothed bytes/second rates.
+
+    The device rounds traffic to one decimal of its unit, so two polls a minute apart usually show the same value or
+    a jump of one digit (up to 100 MB once past 1 GB). A rate from consecutive polls is mostly noise. Instead each
+    interface keeps a bounded ring buffer of samples and the rate is measured across the whole buffer, where the
+    rounding error is small compared to the change, then smoothed with an exponential moving average.
+
+    A counter that drops by more than the rounding error was reset (the device rebooted) and starts a new buffer.
+    """
+
+    def __init__(self, samples: int = RATE_SAMPLES, smoothing: float = RATE_SMOOTHING) -> None:
+        self._max_samples = samples
+        self._smoothing = smoothing
+        self._samples: Dict[str, Deque[TrafficSample]] = {}
+        self._rates: Dict[str, float] = {}
+
+    def add(self, lan: str, timestamp: float, stat: Stat) -> Optional[float]:
+        """ Records a sample for the interface and returns its updated rate in bytes/second """
+        samples = self._samples.get(lan)
+        if samples is None:
+            samples = self._samples[lan] = deque(maxlen=self._max_samples)
+
+        sample = TrafficSample(timestamp, stat.bytes_transferred, stat.bytes_resolution)
+        if samples:
+            last = samples[-1]
+            tolerance = max(last.bytes_resolution, sample.bytes_resolution)
+            if sample.bytes_transferred < last.bytes_transferred - tolerance:
+                # Counter reset
+                samples.clear()
+                self._rates.pop(lan, None)
+            elif sample.bytes_transferred < last.bytes_transferred:
+                # Rounded down when the unit changed (999.9 MB to 1.0 GB), the counter didn't go backwards
+                sample = sample._replace(bytes_transferred=last.bytes_transferred)
+
+        samples.append(sample)
+        if len(samples) < 2:
+            return self._rates.get(lan)
+
+        first = samples[0]
+        elapsed = sample.timestamp - first.timestamp
+        if elapsed <= 0:
+            return self._rates.get(lan)
+
+        rate = (sample.bytes_transferred - first.bytes_transferred) / elapsed
+        previous = self._rates.get(lan)
+        self._rates[lan] = rate if previous is None else previous + self._smoothing * (rate - previous)
+        return self._rates[lan]
+
+    def get_rate(self, lan: str) -> Optional[float]:
+        """ Returns the smoothed rate in bytes/second, or None until there are two samples """
+        return self._rates.get(lan)
+
+    def reset(self):
+        self._samples.clear()
+        self._rates.clear()
@@ -0,0 +1,201 @@
+"""Retries, circuit breaking and request limits for netgear_wax."""
+import asyncio
+from collections import deque
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+import aiohttp
+
+from .const import (
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_OPEN_SECONDS,
+    BREAKER_OPEN,
+    BREAKER_OPEN_SECONDS,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """ Raised instead of sending a request to an access point that's been failing """
+
+
+def is_transient(exception: BaseException) -> bool:
+    """ Returns true for errors that mean the access point is unreachable or overloaded (connection errors, timeouts
+    and 5xx responses), as opposed to errors a retry won't fix """
+    if isinstance(exception, aiohttp.ClientResponseError):
+        return exception.status >= 500
+    return isinstance(exception, (aiohttp.ClientConnectionError, asyncio.TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """
+    Tracks whether an access point is answering.
+
+    After failure_threshold transient failures in a row the breaker opens and requests fail fast without touching
+    the network. Once the open time has passed it goes half open and lets a single probe through: success closes it,
+    failure opens it again for twice as long, up to max_open_seconds.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS,
+                 max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS) -> None:
+        self._failure_threshold = failure_threshold
+        self._base_open_seconds = open_seconds
+        self._max_open_seconds = max_open_seconds
+        self._state = BREAKER_CLOSED
+        self._open_seconds = open_seconds
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.consecutive_failures = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """ closed, open or half_open. An open breaker whose open time has passed reports half_open """
+        if self._state == BREAKER_OPEN and self.retry_in == 0:
+            return BREAKER_HALF_OPEN
+        return self._state
+
+    @property
+    def retry_in(self) -> Optional[float]:
+        """ Seconds until an open breaker lets a probe through, None when it isn't open """
+        if self._state != BREAKER_OPEN:
+            return None
+        return max(0.0, self._opened_at + self._open_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """ Returns true if a request may be sent. A half open breaker allows one request, the probe, at a time """
+        state = self.state
+        if state == BREAKER_CLOSED:
+            return True
+        if state == BREAKER_HALF_OPEN and not self._probing:
+            self._state = BREAKER_HALF_OPEN
+            self._probing = True
+            return True
+        return False
+
+    @property
+    def probing(self) -> bool:
+        """ True while the probe of a half open breaker is in flight """
+        return self._probing
+
+    def record_success(self):
+        if self._state != BREAKER_CLOSED:
+            _LOGGER.info("Access point is reachable again, resuming requests")
+        self._state = BREAKER_CLOSED
+        self._open_seconds = self._base_open_seconds
+        self._opened_at = None
+        self._probing = False
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._state == BREAKER_HALF_OPEN:
+            # The probe failed, wait longer before the next one
+            self._open_seconds = min(self._open_seconds * 2, self._max_open_seconds)
+            self._open()
+        elif self._state == BREAKER_CLOSED and self.consecutive_failures >= self._failure_threshold:
+            _LOGGER.warning("Access point failed %s requests in a row, pausing requests for %s seconds",
+                            self.consecutive_failures, self._open_seconds)
+            self.times_opened += 1
+            self._open()
+
+    def abort_probe(self):
+        """ The probe was cancelled before it finished, let the next request probe instead """
+        if self._probing:
+            self._state = BREAKER_OPEN
+            self._probing = False
+
+    def _open(self):
+        self._state = BREAKER_OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class RequestSlots:
+    """
+    Limits how many requests run at once, use it as an async context manager. Unlike asyncio.Semaphore the limit can
+    be changed while requests hold or wait for slots: raising it lets waiters in right away, lowering it lets nobody
+    new in until enough requests finished. Waiters get their slot first come, first served.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._in_use = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @limit.setter
+    def limit(self, limit: int):
+        self._limit = limit
+        self._wake()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    async def __aenter__(self) -> None:
+        if not self._waiters and self._in_use < self._limit:
+            self._in_use += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled, pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    async def __aexit__(self, *args) -> None:
+        self._release()
+
+    def _release(self):
+        self._in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        """ Hands free slots to the waiters, a slot is taken as soon as it's handed over """
+        while self._waiters and self._in_use < self._limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_use += 1
+                waiter.set_result(None)
+
+
+async def async_retry(call: Callable[[], Awaitable[T]], attempts: int = RETRY_ATTEMPTS,
+                      base_delay: float = RETRY_BASE_DELAY_SECONDS, max_delay: float = RETRY_MAX_DELAY_SECONDS,
+                      on_retry: Optional[Callable[[BaseException], None]] = None) -> T:
+    """ Calls call until it succeeds, up to attempts times. Only transient errors are retried, with exponential
+    backoff and full jitter between attempts """
+    attempt = 1
+    while True:
+        try:
+            return await call()
+        except Exception as exception:  # pylint: disable=broad-except
+            if attempt >= attempts or not is_transient(exception):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            _LOGGER.debug("Request failed (attempt %s of %s), retrying in %.1f seconds: %r", attempt, attempts,
+                          delay, exception)
+            if on_retry is not None:
+                on_retry(exception)
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,218 @@
+"""Declarative response schemas for netgear_wax.
+
+A schema maps paths in a socketCommunication response tree to the fields of a model class, converts and validates
+the values, and builds the model. The paths the client reads are declared once here instead of being walked by hand
+in every parse function.
+"""
+import re
+import sys
+from typing import Any, Callable, Dict, Generic, Iterable, Mapping, Optional, Tuple, Type, TypeVar
+
+from .client import DeviceState, Radio, Ssid, Stat, Station
+from .const import (
+    BAND_STEERING_KEYS,
+    RADIO_CHANNEL_KEYS,
+    RADIO_STATUS_KEYS,
+    RADIO_TX_POWER_KEYS,
+    RADIO_WIDTH_KEYS,
+    STATION_MAC_KEYS,
+    STATION_RADIO_KEYS,
+    STATION_RATE_KEYS,
+    STATION_RSSI_KEYS,
+    STATION_RX_KEYS,
+    STATION_SSID_KEYS,
+    STATION_TX_KEYS,
+)
+from .utils import parse_human_resolution, parse_human_string
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def get_path(tree: Mapping, *path: str, default: Optional[Any] = None) -> Any:
+    """ Returns the value at path, or default if any key along it is missing """
+    for key in path:
+        if not isinstance(tree, Mapping) or key not in tree:
+            return default
+        tree = tree[key]
+    return tree
+
+
+class SchemaError(ValueError):
+    """ Raised when a required field is missing from a response or its value can't be converted """
+
+
+class Field:
+    """
+    A model field read from a response tree.
+
+    paths: one or more key paths, the first one present in the tree is used. Firmware versions name some keys
+    differently.
+    convert: turns the raw value into the field value. Conversion errors raise SchemaError unless there's a default.
+    default: used when no path is present or the conversion fails. Without one the field is left out.
+    required: raise SchemaError when no path is present.
+    """
+    __slots__ = ("name", "paths", "convert", "default", "required")
+
+    def __init__(self, name: str, *paths: Tuple[str, ...], convert: Callable[[Any], Any] = str,
+                 default: Any = _MISSING, required: bool = False) -> None:
+        self.name = name
+        self.paths = paths
+        self.convert = convert
+        self.default = default
+        self.required = required
+
+    def read(self, tree: Mapping) -> Any:
+        """ Returns the converted value, or _MISSING if the field isn't in the tree and has no default """
+        for path in self.paths:
+            value = tree
+            for key in path:
+                if not isinstance(value, Mapping) or key not in value:
+                    value = _MISSING
+                    break
+                value = value[key]
+            if value is _MISSING:
+                continue
+
+            try:
+                return self.convert(value)
+            except (ValueError, TypeError, OverflowError) as exception:
+                if self.default is not _MISSING:
+                    return self.default
+                raise SchemaError(f"Invalid value {value!r} for {self.name} at {'.'.join(path)}") from exception
+
+        if self.required:
+            raise SchemaError(f"Missing {self.name}, looked for {', '.join('.'.join(path) for path in self.paths)}")
+        return self.default
+
+
+class Schema(Generic[T]):
+    """
+    Reads a model from a response tree.
+
+    when: a path that must be in the tree for the schema to apply. Responses only carry the query fragments that
+    were asked for, so a schema for an optional fragment reads nothing when its fragment is absent.
+    """
+    __slots__ = ("model", "fields", "when")
+
+    def __init__(self, model: Type[T], fields: Iterable[Field], when: Tuple[str, ...] = ()) -> None:
+        self.model = model
+        self.fields = tuple(fields)
+        self.when = when
+
+    def read(self, tree: Mapping) -> Dict[str, Any]:
+        """ Returns the values of the fields present in the tree """
+        if self.when and get_path(tree, *self.when) is None:
+            return {}
+
+        values = {}
+        for field in self.fields:
+            value = field.read(tree)
+            if value is not _MISSING:
+                values[field.name] = value
+        return values
+
+    def decode(self, tree: Mapping, **values) -> T:
+        """ Builds the model from the tree. values fill in the fields the tree doesn't have """
+        values.update(self.read(tree))
+        return self.model(**values)
+
+    def decode_rows(self, rows: Any, skip_invalid: bool = True) -> Tuple[T, ...]:
+        """ Builds a model for every row of a table, which is either a list or a dictionary keyed by row id """
+        if isinstance(rows, Mapping):
+            rows = rows.values()
+        elif not isinstance(rows, (list, tuple)):
+            return ()
+
+        models = []
+        for row in rows:
+            try:
+                models.append(self.decode(row))
+            except (SchemaError, TypeError):
+                if not skip_invalid:
+                    raise
+        return tuple(models)
+
+
+def number(value: Any) -> int:
+    """ Converts a device number to an int. Values may carry a unit, example: -52 dBm or 866.7 Mbps """
+    return int(float(str(value).split(" ")[0]))
+
+
+def flag(value: Any) -> bool:
+    """ Converts a device flag (1, "1", 0, "0") to a bool """
+    return int(value) == 1
+
+
+def text(value: Any) -> str:
+    """ Converts to an interned str. The same SSID, radio and firmware names come back on every poll """
+    return sys.intern(str(value))
+
+
+def megahertz(value: Any) -> int:
+    """ Converts a channel width to MHz, example: 80, 80MHz, HT40 or VHT80 """
+    match = re.search(r"\d+", str(value))
+    if match is None:
+        raise ValueError(f"No width in {value!r}")
+    return int(match.group())
+
+
+def mac(value: Any) -> str:
+    """ Converts to an upper case, interned MAC address. Rows without one are skipped """
+    if not value:
+        raise ValueError("Empty MAC address")
+    return sys.intern(str(value).upper())
+
+
+# Paths are from the root of the response, see the query fragments in const.py
+DEVICE_INFO_SCHEMA: Schema[DeviceState] = Schema(DeviceState, [
+    Field("firmware_version", ("system", "monitor", "sysVersion"), convert=text, required=True),
+    Field("device_name", ("system", "basicSettings", "apName"), required=True),
+    Field("model", ("system", "monitor", "productId"), convert=text, required=True),
+    Field("mac_address", ("system", "monitor", "ethernetMacAddress"), required=True),
+    Field("serial_number", ("system", "monitor", "sysSerialNumber"), required=True),
+], when=("system", "monitor", "sysVersion"))
+
+FIRMWARE_SCHEMA: Schema[DeviceState] = Schema(DeviceState, [
+    Field("firmware_update_available", ("system", "FwUpdate", "ImageAvailable"),
+          convert=lambda value: int(value) > 0, default=False),
+], when=("system", "FwUpdate"))
+
+CLIENT_COUNT_SCHEMA: Schema[DeviceState] = Schema(DeviceState, [
+    Field("total_number_of_devices", ("system", "monitor", "totalNumberOfDevices"), convert=number, required=True),
+])
+
+# Paths below are relative to one row: monitor.stats.<lan>, an ssidGetDetails vap, a connectedClients row or a
+# wlanSettingTable radio
+STAT_SCHEMA: Schema[Stat] = Schema(Stat, [
+    Field("utilization", ("channelUtil",), convert=number, default=0),
+    Field("bytes_transferred", ("traffic",), convert=parse_human_string, default=0),
+    Field("bytes_resolution", ("traffic",), convert=parse_human_resolution, default=0),
+])
+
+SSID_SCHEMA: Schema[Ssid] = Schema(Ssid, [
+    Field("ssid", ("ssid",), convert=text, required=True),
+    Field("enabled", ("vapProfileStatus",), convert=flag, default=False),
+])
+
+STATION_SCHEMA: Schema[Station] = Schema(Station, [
+    Field("mac", *[(key,) for key in STATION_MAC_KEYS], convert=mac, required=True),
+    Field("ssid", *[(key,) for key in STATION_SSID_KEYS], convert=text, default=""),
+    Field("wlan_id", *[(key,) for key in STATION_RADIO_KEYS], convert=text, default=""),
+    Field("rssi", *[(key,) for key in STATION_RSSI_KEYS], convert=number, default=0),
+    Field("rate", *[(key,) for key in STATION_RATE_KEYS], convert=number, default=0),
+    Field("tx_bytes", *[(key,) for key in STATION_TX_KEYS], convert=number, default=0),
+    Field("rx_bytes", *[(key,) for key in STATION_RX_KEYS], convert=number, default=0),
+])
+
+RADIO_SCHEMA: Schema[Radio] = Schema(Radio, [
+    Field("enabled", *[(key,) for key in RADIO_STATUS_KEYS], convert=flag, default=True),
+    Field("channel", *[(key,) for key in RADIO_CHANNEL_KEYS], convert=number, default=0),
+    Field("channel_width", *[(key,) for key in RADIO_WIDTH_KEYS], convert=megahertz, default=0),
+    Field("tx_power", *[(key,) for key in RADIO_TX_POWER_KEYS], convert=text, default=""),
+])
+
+# The band steering switch applies to every radio, its path is from the root of the response
+BAND_STEERING_FIELD = Field("band_steering", *[("system", "wlanSettings", key) for key in BAND_STEERING_KEYS],
+                            convert=flag, default=False)
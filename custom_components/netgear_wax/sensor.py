@@ -1,15 +1,22 @@
 """Sensor platform for netgear_wax."""
 import logging
-from typing import List
+from typing import Callable, List, Optional, Set
 
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.core import HomeAssistant
-from custom_components.netgear_wax import NetgearDataUpdateCoordinator
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from custom_components.netgear_wax import NetgearDataUpdateCoordinator, get_fleet_scheduler
 
+from .analytics import FleetAnalytics
 from .const import (
-    DOMAIN, SAFETY_DEVICE_CLASS, DEVICES_ICON, UPDATE_ICON, CHART_DONUT_ICON, ROUTER_NETWORK_ICON, LAN_ICON,
+    DOMAIN, NAME, SAFETY_DEVICE_CLASS, DEVICES_ICON, UPDATE_ICON, CHART_DONUT_ICON, ROUTER_NETWORK_ICON, LAN_ICON,
+    RADIO_BANDS, BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, FIELD_BREAKER, CONNECTION_ICON, METRICS_ICON,
+    WIFI_ICON, ENDPOINT_SOCKET_COMMUNICATION, FLEET_DEVICE_ID, SIGNAL_FLEET_ANALYTICS,
 )
 from .entity import NetgearBaseEntity
+from .metrics import LatencyHistogram, NetgearMetrics
+from .utils import stat_field
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -22,6 +29,7 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
         NetgearTotalDevicesSensor(coordinator, entry, "Connected Clients"),
         NetgearAddressSensor(coordinator, entry, "IP"),
         NetgearMacSensor(coordinator, entry, "MAC"),
+        NetgearConnectionSensor(coordinator, entry, "Connection"),
     ]
 
     stats = coordinator.get_stats()
@@ -32,9 +40,67 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
         for lan in ["lan", "wlan0", "wlan1", "wlan2"]:
             if lan in stats:
                 sensors.append(NetgearInterfaceTrafficSensor(coordinator, entry, f"{lan} traffic", lan))
+                sensors.append(NetgearInterfaceThroughputSensor(coordinator, entry, f"{lan} throughput", lan))
+
+    if coordinator.get_metrics() is not None:
+        sensors.extend([
+            NetgearLatencySensor(coordinator, entry, "request latency",
+                                 lambda metrics: metrics.get_endpoint(ENDPOINT_SOCKET_COMMUNICATION).latency),
+            NetgearLatencySensor(coordinator, entry, "decode time", lambda metrics: metrics.decode),
+            NetgearLatencySensor(coordinator, entry, "poll duration", lambda metrics: metrics.poll),
+            NetgearByteCountSensor(coordinator, entry, "bytes sent",
+                                   lambda metrics: sum(e.request_bytes for e in metrics.endpoints.values())),
+            NetgearByteCountSensor(coordinator, entry, "bytes received",
+                                   lambda metrics: sum(e.response_bytes for e in metrics.endpoints.values())),
+            NetgearReloginSensor(coordinator, entry, "relogins"),
+        ])
 
     async_add_devices(sensors)
 
+    radios: Set[str] = set()
+
+    @callback
+    def add_radio_sensors():
+        # The radio configuration is read every few polls rather than on each one, so radios get their sensor when
+        # they're first reported
+        if not coordinator.has_changed(NetgearRadioChannelSensor._watched_fields):
+            return
+        radio_sensors = [
+            NetgearRadioChannelSensor(coordinator, entry, f"{radio.wlan_id} channel", radio.wlan_id)
+            for radio in coordinator.get_radios() if radio.wlan_id not in radios
+        ]
+        radios.update(sensor.wlan_id for sensor in radio_sensors)
+        if radio_sensors:
+            async_add_devices(radio_sensors)
+
+    add_radio_sensors()
+    entry.async_on_unload(coordinator.async_add_listener(add_radio_sensors))
+
+    # The fleet sensors are added by one entry's sensor platform, and by another one if that entry is unloaded.
+    # Sensors for bands and channel overlap are added once the access points report them.
+    scheduler = get_fleet_scheduler(hass)
+    fleet_sensors: Set[str] = set()
+
+    @callback
+    def add_fleet_sensors():
+        if hass.data[DOMAIN].get(entry.entry_id) is not coordinator or not scheduler.claim_analytics(coordinator):
+            return
+        analytics = scheduler.analytics
+        fleet: List[SensorEntity] = []
+        if "hottest" not in fleet_sensors:
+            fleet.append(NetgearFleetHottestSensor(analytics, "hottest"))
+        for band in analytics.bands:
+            if band not in fleet_sensors:
+                fleet.append(NetgearFleetUtilizationSensor(analytics, band))
+        if "co_channel" not in fleet_sensors and analytics.summary()["co_channel"]["overlaps"] is not None:
+            fleet.append(NetgearFleetOverlapSensor(analytics, "co_channel"))
+        if fleet:
+            fleet_sensors.update(sensor.key for sensor in fleet)
+            async_add_devices(fleet)
+
+    add_fleet_sensors()
+    entry.async_on_unload(async_dispatcher_connect(hass, SIGNAL_FLEET_ANALYTICS, add_fleet_sensors))
+
 
 class NetgearSensor(NetgearBaseEntity, SensorEntity):
     """ netgear_wax sensor """
@@ -66,6 +132,8 @@ class NetgearSensor(NetgearBaseEntity, SensorEntity):
 class NetgearUpdateSensor(NetgearSensor):
     """ Sensor to report when there's a firmware update available """
 
+    _watched_fields = frozenset({"firmware_update_available"})
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
         NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
 
@@ -85,6 +153,8 @@ class NetgearUpdateSensor(NetgearSensor):
 class NetgearTotalDevicesSensor(NetgearSensor):
     """ Sensor to report how many devices are connected """
 
+    _watched_fields = frozenset({"total_number_of_devices"})
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
         NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
         self._coordinator = coordinator
@@ -106,6 +176,7 @@ class NetgearWlanUtilizationSensor(NetgearSensor):
         self._coordinator = coordinator
         self._lan = lan
         self._attr_unit_of_measurement = "%"
+        self._watched_fields = frozenset({stat_field(lan, "utilization")})
 
     @property
     def state(self):
@@ -127,6 +198,7 @@ class NetgearInterfaceTrafficSensor(NetgearSensor):
         self._coordinator = coordinator
         self._lan = lan
         self._attr_unit_of_measurement = "B"
+        self._watched_fields = frozenset({stat_field(lan, "bytes_transferred")})
 
     @property
     def state(self):
@@ -140,9 +212,73 @@ class NetgearInterfaceTrafficSensor(NetgearSensor):
         return ROUTER_NETWORK_ICON
 
 
+class NetgearInterfaceThroughputSensor(NetgearSensor):
+    """ Sensor to report the smoothed traffic rate of an interface """
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str, lan: str):
+        NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._coordinator = coordinator
+        self._lan = lan
+        self._attr_unit_of_measurement = "B/s"
+        self._watched_fields = frozenset({stat_field(lan, "throughput")})
+
+    @property
+    def state(self):
+        rate = self._coordinator.get_throughput(self._lan)
+        if rate is None:
+            return None
+        return round(rate)
+
+    @property
+    def icon(self) -> str:
+        return ROUTER_NETWORK_ICON
+
+
+class NetgearRadioChannelSensor(NetgearSensor):
+    """ Sensor to show the channel a radio operates on, the rest of the radio configuration is in the attributes """
+
+    _watched_fields = frozenset({"radios"})
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str, wlan_id: str):
+        NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._wlan_id = wlan_id
+        self._device_class = None
+
+    @property
+    def wlan_id(self) -> str:
+        return self._wlan_id
+
+    @property
+    def state(self):
+        radio = self._coordinator.get_radio(self._wlan_id)
+        if radio is None or not radio.channel:
+            return None
+        return radio.channel
+
+    @property
+    def extra_state_attributes(self):
+        radio = self._coordinator.get_radio(self._wlan_id)
+        if radio is None:
+            return None
+        return {
+            "band": RADIO_BANDS.get(self._wlan_id),
+            "enabled": radio.enabled,
+            "channel_width": radio.channel_width or None,
+            "tx_power": radio.tx_power or None,
+            "band_steering": radio.band_steering,
+        }
+
+    @property
+    def icon(self) -> str:
+        return WIFI_ICON
+
+
 class NetgearAddressSensor(NetgearSensor):
     """ Sensor to show the IP address of the device """
 
+    # Comes from the config entry, only availability changes need a write
+    _watched_fields = frozenset()
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
         NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
 
@@ -158,6 +294,9 @@ class NetgearAddressSensor(NetgearSensor):
 class NetgearMacSensor(NetgearSensor):
     """ Sensor to show the IP address of the device """
 
+    # Comes from the config entry, only availability changes need a write
+    _watched_fields = frozenset()
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
         NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
 
@@ -168,3 +307,193 @@ class NetgearMacSensor(NetgearSensor):
     @property
     def icon(self) -> str:
         return LAN_ICON
+
+
+class NetgearConnectionSensor(NetgearSensor):
+    """ Diagnostic sensor showing the circuit breaker state: closed (healthy), open (requests paused) or half_open
+    (the next request probes the device) """
+
+    _watched_fields = frozenset({FIELD_BREAKER})
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_options = [BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN]
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
+        NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._device_class = SensorDeviceClass.ENUM
+
+    @property
+    def available(self) -> bool:
+        # Reports on the connection, so it stays available while the access point isn't
+        return True
+
+    @property
+    def state(self):
+        return self._coordinator.get_breaker().state
+
+    @property
+    def extra_state_attributes(self):
+        breaker = self._coordinator.get_breaker()
+        retry_in = breaker.retry_in
+        return {
+            "consecutive_failures": breaker.consecutive_failures,
+            "times_opened": breaker.times_opened,
+            "retry_in": None if retry_in is None else round(retry_in),
+        }
+
+    @property
+    def icon(self) -> str:
+        return CONNECTION_ICON
+
+
+class NetgearMetricSensor(NetgearSensor):
+    """ Base of the diagnostic sensors that are added when the metrics option is on """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str):
+        NetgearSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._device_class = None
+
+    @property
+    def icon(self) -> str:
+        return METRICS_ICON
+
+
+class NetgearLatencySensor(NetgearMetricSensor):
+    """ Shows the 95th percentile of a duration histogram, the other percentiles are attributes """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str,
+                 histogram: Callable[[NetgearMetrics], LatencyHistogram]):
+        NetgearMetricSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._histogram = histogram
+        self._attr_unit_of_measurement = "ms"
+
+    @property
+    def state(self):
+        return self._histogram(self._coordinator.get_metrics()).percentile(95)
+
+    @property
+    def extra_state_attributes(self):
+        histogram = self._histogram(self._coordinator.get_metrics()).as_dict()
+        del histogram["buckets"]
+        return histogram
+
+
+class NetgearByteCountSensor(NetgearMetricSensor):
+    """ Shows a running total of bytes sent to or received from the device """
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, sensor_type: str,
+                 total: Callable[[NetgearMetrics], int]):
+        NetgearMetricSensor.__init__(self, coordinator, config_entry, sensor_type)
+        self._total = total
+        self._attr_unit_of_measurement = "B"
+
+    @property
+    def state(self):
+        return self._total(self._coordinator.get_metrics())
+
+
+class NetgearReloginSensor(NetgearMetricSensor):
+    """ Shows how many times the device dropped the session and the client had to log in again """
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def state(self):
+        return self._coordinator.get_relogin_count()
+
+
+class NetgearFleetSensor(SensorEntity):
+    """ Base of the sensors summarizing every access point, on their own device. Updated when the fleet analytics
+    change rather than by one coordinator """
+
+    _attr_should_poll = False
+
+    def __init__(self, analytics: FleetAnalytics, key: str):
+        SensorEntity.__init__(self)
+        self.key = key
+        self._analytics = analytics
+        self._attr_unique_id = f"{DOMAIN}_{FLEET_DEVICE_ID}_{key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, FLEET_DEVICE_ID)},
+            "name": f"{NAME} fleet",
+            "manufacturer": "Netgear",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(async_dispatcher_connect(self.hass, SIGNAL_FLEET_ANALYTICS, self._handle_analytics_update))
+
+    @callback
+    def _handle_analytics_update(self) -> None:
+        self.async_write_ha_state()
+
+
+class NetgearFleetUtilizationSensor(NetgearFleetSensor):
+    """ Shows the 95th percentile of the channel utilization of the band's radios, the other aggregates are
+    attributes """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, analytics: FleetAnalytics, band: str):
+        NetgearFleetSensor.__init__(self, analytics, band)
+        self._attr_name = f"{NAME} fleet {band} util"
+        self._attr_unit_of_measurement = "%"
+
+    @property
+    def state(self):
+        band = self._analytics.summary()["bands"].get(self.key)
+        return None if band is None else band["p95"]
+
+    @property
+    def extra_state_attributes(self):
+        return self._analytics.summary()["bands"].get(self.key)
+
+    @property
+    def icon(self) -> str:
+        return CHART_DONUT_ICON
+
+
+class NetgearFleetHottestSensor(NetgearFleetSensor):
+    """ Shows the access point whose busiest radio has the highest congestion score, the ranking is an attribute """
+
+    def __init__(self, analytics: FleetAnalytics, key: str):
+        NetgearFleetSensor.__init__(self, analytics, key)
+        self._attr_name = f"{NAME} fleet hottest access point"
+
+    @property
+    def state(self) -> Optional[str]:
+        hottest = self._analytics.summary()["hottest"]
+        return hottest[0]["name"] if hottest else None
+
+    @property
+    def extra_state_attributes(self):
+        return {"access_points": self._analytics.summary()["hottest"]}
+
+    @property
+    def icon(self) -> str:
+        return WIFI_ICON
+
+
+class NetgearFleetOverlapSensor(NetgearFleetSensor):
+    """ Shows how many pairs of radios of different access points are on overlapping channels """
+
+    def __init__(self, analytics: FleetAnalytics, key: str):
+        NetgearFleetSensor.__init__(self, analytics, key)
+        self._attr_name = f"{NAME} fleet co-channel overlaps"
+
+    @property
+    def state(self):
+        return self._analytics.summary()["co_channel"]["overlaps"]
+
+    @property
+    def extra_state_attributes(self):
+        co_channel = self._analytics.summary()["co_channel"]
+        return {"access_points": co_channel["access_points"], "channels": co_channel["channels"]}
+
+    @property
+    def icon(self) -> str:
+        return WIFI_ICON
@@ -0,0 +1,182 @@
+"""Services for netgear_wax."""
+import asyncio
+from datetime import datetime, timezone
+import logging
+from typing import List, Set
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    ATTR_ACCESS_POINTS,
+    ATTR_DURATION,
+    ATTR_ENABLED,
+    ATTR_RESOLUTION,
+    ATTR_SSIDS,
+    DATA_FLEET,
+    DOMAIN,
+    HISTORY_RESOLUTIONS,
+    PROFILER_DEFAULT_SECONDS,
+    SERVICE_GET_FLEET_ANALYTICS,
+    SERVICE_GET_HISTORY,
+    SERVICE_PROFILE,
+    SERVICE_SET_SSIDS,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+SET_SSIDS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SSIDS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_ENABLED): cv.boolean,
+        vol.Optional(ATTR_ACCESS_POINTS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=PROFILER_DEFAULT_SECONDS):
+            vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+        vol.Optional(ATTR_ACCESS_POINTS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_RESOLUTION, default="15m"): vol.In(list(HISTORY_RESOLUTIONS)),
+        vol.Optional(ATTR_ACCESS_POINTS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+GET_FLEET_ANALYTICS_SCHEMA = vol.Schema({})
+
+
+def async_setup_services(hass: HomeAssistant):
+    """ Registers the netgear_wax services """
+
+    async def async_set_ssids(call: ServiceCall) -> ServiceResponse:
+        return await _async_set_ssids(hass, call)
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        return _async_profile(hass, call)
+
+    async def async_get_history(call: ServiceCall) -> ServiceResponse:
+        return _async_get_history(hass, call)
+
+    async def async_get_fleet_analytics(call: ServiceCall) -> ServiceResponse:
+        return _async_get_fleet_analytics(hass)
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_SSIDS, async_set_ssids, schema=SET_SSIDS_SCHEMA,
+                                 supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA,
+                                 supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_GET_HISTORY, async_get_history, schema=GET_HISTORY_SCHEMA,
+                                 supports_response=SupportsResponse.ONLY)
+    hass.services.async_register(DOMAIN, SERVICE_GET_FLEET_ANALYTICS, async_get_fleet_analytics,
+                                 schema=GET_FLEET_ANALYTICS_SCHEMA, supports_response=SupportsResponse.ONLY)
+
+
+def _get_coordinators(hass: HomeAssistant, targets: Set[str]) -> list:
+    """ Returns the coordinators of the access points with one of the MACs, IPs or names, or all of them """
+    fleet = hass.data.get(DOMAIN, {}).get(DATA_FLEET)
+    return [
+        coordinator for coordinator in (fleet.coordinators if fleet is not None else [])
+        if not targets or targets & {coordinator.get_mac(), coordinator.get_ip_address(),
+                                     coordinator.get_device_name()}
+    ]
+
+
+def _async_profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """ Starts a sampling profiler window on access points. The samples are in the diagnostics download """
+    duration = call.data[ATTR_DURATION]
+    coordinators = _get_coordinators(hass, set(call.data.get(ATTR_ACCESS_POINTS, [])))
+    for coordinator in coordinators:
+        coordinator.profiler.start(duration)
+    _LOGGER.info("Profiling polls of %s access points for %s seconds", len(coordinators), duration)
+    return {"profiling": {coordinator.get_mac(): coordinator.get_device_name() for coordinator in coordinators}}
+
+
+def _async_get_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """ Returns the channel utilization history of each radio at the resolution, oldest bucket first """
+    period = HISTORY_RESOLUTIONS[call.data[ATTR_RESOLUTION]]
+    coordinators = _get_coordinators(hass, set(call.data.get(ATTR_ACCESS_POINTS, [])))
+    return {
+        "history": {
+            coordinator.get_mac(): {
+                "name": coordinator.get_device_name(),
+                "radios": {
+                    lan: [
+                        {
+                            "start": datetime.fromtimestamp(bucket.start, timezone.utc).isoformat(),
+                            "mean": round(bucket.mean, 1),
+                            "min": bucket.min,
+                            "max": bucket.max,
+                            "samples": bucket.count,
+                        }
+                        for bucket in coordinator.history.get_buckets(lan, period)
+                    ]
+                    for lan in sorted(coordinator.history)
+                },
+            }
+            for coordinator in coordinators
+        }
+    }
+
+
+def _async_get_fleet_analytics(hass: HomeAssistant) -> ServiceResponse:
+    """ Returns the channel utilization aggregates per band, the hottest access points and the co-channel overlap """
+    fleet = hass.data.get(DOMAIN, {}).get(DATA_FLEET)
+    if fleet is None:
+        return {"bands": {}, "hottest": [], "co_channel": {"overlaps": None, "access_points": [], "channels": {}}}
+    return fleet.analytics.summary()
+
+
+async def _async_set_ssids(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """
+    Turns SSIDs on or off across access points. SSIDs can be given by name (My Guest Wi-Fi) or id (SSID3). Each access
+    point gets one request with all of its matching SSIDs, sent through its SSID command pipeline, the same one the
+    switches use, which then verifies the change in the background. The status per access point is sent, failed (with
+    the error) or already_set when its SSIDs are already in the requested state.
+    """
+    names = set(call.data[ATTR_SSIDS])
+    enabled = call.data[ATTR_ENABLED]
+
+    async def async_set(coordinator) -> dict:
+        ssids = list(dict.fromkeys(
+            ssid for name in names
+            for ssid in coordinator.get_ssids_by_name(name) + coordinator.get_ssids_by_ssid_id(name)
+        ))
+        result = {"name": coordinator.get_device_name(), "ssids": _names(ssids)}
+        if not ssids:
+            result["status"] = "no_match"
+            return result
+
+        pipeline = coordinator.ssid_commands
+        ssid_ids = [
+            ssid_id for ssid_id in dict.fromkeys(ssid.ssid_id for ssid in ssids)
+            if pipeline.get_pending_state(ssid_id) is not None
+            or not all(ssid.enabled == enabled for ssid in coordinator.get_ssids_by_ssid_id(ssid_id))
+        ]
+        if not ssid_ids:
+            result["status"] = "already_set"
+            return result
+
+        try:
+            await pipeline.async_submit_many(ssid_ids, enabled)
+            result["status"] = "sent"
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Failed to set ssids %s enabled state to %s on %s", ", ".join(ssid_ids), enabled,
+                            coordinator.get_device_name(), exc_info=exception)
+            result["status"] = "failed"
+            result["error"] = str(exception)
+        return result
+
+    coordinators = _get_coordinators(hass, set(call.data.get(ATTR_ACCESS_POINTS, [])))
+    results = await asyncio.gather(*(async_set(coordinator) for coordinator in coordinators))
+    return {"results": {coordinator.get_mac(): result for coordinator, result in zip(coordinators, results)}}
+
+
+def _names(ssids) -> List[str]:
+    return sorted({ssid.ssid for ssid in ssids})
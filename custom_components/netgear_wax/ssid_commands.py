@@ -0,0 +1,203 @@
+"""SSID command pipeline for netgear_wax."""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from homeassistant.core import HomeAssistant
+
+from .client import NetgearClient, Ssid
+from .const import (
+    DOMAIN,
+    FIELD_SSIDS,
+    SSID_COMMAND_COALESCE_SECONDS,
+    SSID_VERIFY_INITIAL_DELAY_SECONDS,
+    SSID_VERIFY_MAX_DELAY_SECONDS,
+    SSID_VERIFY_TIMEOUT_SECONDS,
+    TOGGLE_CONFIRMED,
+    TOGGLE_FAILED,
+    TOGGLE_PENDING,
+)
+from .resilience import RequestSlots
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class SsidCommandRejected(Exception):
+    """ Raised when the access point answers an SSID change with an error status """
+
+
+class SsidCommandPipeline:
+    """
+    Applies SSID enable/disable commands in the background. The device takes 20-30 seconds to apply a change, so
+    commands are queued per ssid_id, rapid flips of the same ssid_id are coalesced into the last requested state, and
+    completion is verified with ssidGetDetails reads (with backoff) instead of full state refreshes. Several ssid_ids
+    submitted together (see async_submit_many) are sent in one request and verified by one series of reads.
+
+    coordinator is the NetgearDataUpdateCoordinator that owns the SSIDs. Each request to the device waits for one of
+    request_slots, which the fleet's polls share, so toggling SSIDs on many access points at once stays bounded.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: NetgearClient, coordinator,
+                 request_slots: RequestSlots) -> None:
+        self._hass = hass
+        self._client = client
+        self._coordinator = coordinator
+        self._request_slots = request_slots
+        # ssid_id to the state the user last asked for
+        self._desired: Dict[str, bool] = {}
+        # ssid_id to one of TOGGLE_PENDING, TOGGLE_CONFIRMED, TOGGLE_FAILED
+        self._status: Dict[str, str] = {}
+        # ssid_id to the task applying it, ssid_ids submitted together share one
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    def submit(self, ssid_id: str, enable: bool):
+        """ Queues turning the ssid on or off. A command that's still pending for the same ssid_id is replaced. Fails
+        right away if the access point has no ssid with the id """
+        self._desired[ssid_id] = enable
+        if not self._coordinator.get_ssids_by_ssid_id(ssid_id):
+            _LOGGER.warning("Can't set ssid %s enabled state to %s, the access point doesn't have it", ssid_id, enable)
+            self._status[ssid_id] = TOGGLE_FAILED
+            self._coordinator.async_publish_changes({FIELD_SSIDS})
+            return
+        self._status[ssid_id] = TOGGLE_PENDING
+        if ssid_id not in self._workers:
+            self._workers[ssid_id] = self._hass.async_create_background_task(
+                self._async_work((ssid_id,)), name=f"{DOMAIN} set {ssid_id}")
+        self._coordinator.async_publish_changes({FIELD_SSIDS})
+
+    async def async_submit_many(self, ssid_ids: Sequence[str], enable: bool):
+        """ Turns the ssids on or off with one request, then verifies them together in the background. Ids the access
+        point doesn't have are marked failed. Raises if the request fails or is rejected, the ssids are marked failed
+        then """
+        ssid_ids = list(dict.fromkeys(ssid_ids))
+        known = [ssid_id for ssid_id in ssid_ids if self._coordinator.get_ssids_by_ssid_id(ssid_id)]
+        for ssid_id in ssid_ids:
+            self._desired[ssid_id] = enable
+            self._status[ssid_id] = TOGGLE_PENDING if ssid_id in known else TOGGLE_FAILED
+        self._coordinator.async_publish_changes({FIELD_SSIDS})
+        if not known:
+            return
+
+        try:
+            await self._async_send(known, enable)
+        except Exception:
+            for ssid_id in known:
+                # Unless a command that's already in flight takes care of it
+                if ssid_id not in self._workers and self._desired[ssid_id] == enable:
+                    self._status[ssid_id] = TOGGLE_FAILED
+            self._coordinator.async_publish_changes({FIELD_SSIDS})
+            raise
+
+        # Commands already in flight for some of the ssids apply the new state themselves
+        batch = tuple(ssid_id for ssid_id in known if ssid_id not in self._workers)
+        if batch:
+            worker = self._hass.async_create_background_task(
+                self._async_work(batch, sent=enable), name=f"{DOMAIN} set {', '.join(batch)}")
+            for ssid_id in batch:
+                self._workers[ssid_id] = worker
+
+    def get_pending_state(self, ssid_id: str) -> Optional[bool]:
+        """ Returns the state we're putting the ssid in, or None if there's no command in flight """
+        if self._status.get(ssid_id) != TOGGLE_PENDING:
+            return None
+        return self._desired.get(ssid_id)
+
+    def get_status(self, ssid_id: str) -> Optional[str]:
+        """ Returns the outcome of the last command for the ssid: pending, confirmed, failed or None """
+        return self._status.get(ssid_id)
+
+    def cancel(self):
+        """ Cancels all commands in flight """
+        for worker in set(self._workers.values()):
+            worker.cancel()
+        self._workers.clear()
+
+    async def _async_work(self, ssid_ids: Tuple[str, ...], sent: Optional[bool] = None):
+        """ Applies and verifies the commands for the ssids. sent is the state that was already requested for all of
+        them, None if nothing was sent yet """
+        try:
+            if sent is None:
+                # Give the user a moment to change their mind so on/off/on only sends one command
+                await asyncio.sleep(SSID_COMMAND_COALESCE_SECONDS)
+
+            pending = list(ssid_ids)
+            while pending:
+                # Ssids submitted together share a state, unless some were flipped again since
+                groups: Dict[bool, List[str]] = {}
+                for ssid_id in pending:
+                    groups.setdefault(self._desired[ssid_id], []).append(ssid_id)
+
+                pending = []
+                for enable, group in groups.items():
+                    applied = await self._async_apply(group, enable, send=sent != enable)
+                    for ssid_id in group:
+                        if self._desired[ssid_id] != enable:
+                            # Flipped again while we were working, apply the latest request
+                            pending.append(ssid_id)
+                        else:
+                            self._status[ssid_id] = TOGGLE_CONFIRMED if ssid_id in applied else TOGGLE_FAILED
+                sent = None
+        finally:
+            for ssid_id in ssid_ids:
+                self._workers.pop(ssid_id, None)
+            self._coordinator.async_publish_changes({FIELD_SSIDS})
+
+    async def _async_apply(self, ssid_ids: List[str], enable: bool, send: bool) -> Set[str]:
+        """ Sends the state for the ssids if send is set and waits for the device to apply it. Returns the ssid_ids
+        that report the state """
+        known = [ssid_id for ssid_id in ssid_ids if self._coordinator.get_ssids_by_ssid_id(ssid_id)]
+        if len(known) < len(ssid_ids):
+            # Gone since they were queued, there's nothing to send or to wait for
+            _LOGGER.warning("Can't set ssids %s enabled state to %s, the access point doesn't have them",
+                            ", ".join(sorted(set(ssid_ids) - set(known))), enable)
+        if not known:
+            return set()
+
+        try:
+            if send:
+                await self._async_send(known, enable)
+            return await self._async_verify(known, enable)
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Failed to set ssids %s enabled state to %s", ", ".join(known), enable,
+                            exc_info=exception)
+            return set()
+
+    async def _async_send(self, ssid_ids: List[str], enable: bool):
+        """ Sets all the ssids with the ids in one request """
+        ssids = [ssid for ssid_id in ssid_ids for ssid in self._coordinator.get_ssids_by_ssid_id(ssid_id)]
+        async with self._request_slots:
+            result = await self._client.async_enable_ssid(ssids, enable)
+        if result.get("status", 0) != 0:
+            raise SsidCommandRejected(f"The access point rejected the change with status {result.get('status')}")
+
+    async def _async_verify(self, ssid_ids: List[str], enable: bool) -> Set[str]:
+        """ Reads the SSIDs with backoff until the ssids report the state we asked for. Stops waiting for an ssid when
+        a newer command for it supersedes this one, and for all of them on timeout. Returns the ssid_ids that report
+        the state """
+        delay = SSID_VERIFY_INITIAL_DELAY_SECONDS
+        deadline = time.monotonic() + SSID_VERIFY_TIMEOUT_SECONDS
+        waiting = set(ssid_ids)
+        applied: Set[str] = set()
+
+        while True:
+            await asyncio.sleep(delay)
+
+            async with self._request_slots:
+                ssids = await self._client.async_get_ssids()
+            self._coordinator.async_set_ssids(ssids)
+
+            for ssid_id in list(waiting):
+                if self._is_applied(self._coordinator.get_ssids_by_ssid_id(ssid_id), enable):
+                    applied.add(ssid_id)
+                    waiting.discard(ssid_id)
+                elif self._desired[ssid_id] != enable:
+                    waiting.discard(ssid_id)
+            if not waiting or time.monotonic() + delay > deadline:
+                return applied
+
+            delay = min(delay * 2, SSID_VERIFY_MAX_DELAY_SECONDS)
+
+    @staticmethod
+    def _is_applied(ssids: Sequence[Ssid], enable: bool) -> bool:
+        return len(ssids) > 0 and all(ssid.enabled == enable for ssid in ssids)
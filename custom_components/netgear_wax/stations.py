@@ -0,0 +1,111 @@
+"""Connected client (station) table for netgear_wax."""
+from array import array
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from .client import Station
+
+
+class StationChanges(NamedTuple):
+    joined: Set[str]
+    # MAC to the last known details of the stations that left
+    left: Dict[str, Station]
+    # Stations that stayed but whose ssid, radio, rssi, rate or byte counts changed
+    updated: Set[str]
+
+
+class StationTable:
+    """
+    The stations connected to one access point, keyed by MAC.
+
+    Rows are stored column-wise: numbers in typed arrays and strings (interned, so the handful of distinct SSID and
+    radio names are shared) in lists, with a dictionary from MAC to row. Removing a station moves the last row into
+    its place, so joins and leaves are O(1) and the table stays dense. Station objects are only built on demand.
+    """
+
+    __slots__ = ("_rows", "_macs", "_ssids", "_wlan_ids", "_rssi", "_rate", "_tx_bytes", "_rx_bytes")
+
+    def __init__(self) -> None:
+        self._rows: Dict[str, int] = {}
+        self._macs: List[str] = []
+        self._ssids: List[str] = []
+        self._wlan_ids: List[str] = []
+        self._rssi = array("i")
+        self._rate = array("i")
+        self._tx_bytes = array("q")
+        self._rx_bytes = array("q")
+
+    def __len__(self) -> int:
+        return len(self._macs)
+
+    def __contains__(self, mac: str) -> bool:
+        return mac in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._macs))
+
+    def get(self, mac: str) -> Optional[Station]:
+        row = self._rows.get(mac)
+        if row is None:
+            return None
+        return Station(self._macs[row], self._ssids[row], self._wlan_ids[row], self._rssi[row], self._rate[row],
+                       self._tx_bytes[row], self._rx_bytes[row])
+
+    def update(self, stations: Iterable[Station]) -> StationChanges:
+        """ Replaces the table with the stations from a poll and returns who joined, left or changed """
+        seen: Set[str] = set()
+        joined: Set[str] = set()
+        updated: Set[str] = set()
+
+        for station in stations:
+            mac = station.mac
+            seen.add(mac)
+            row = self._rows.get(mac)
+            if row is None:
+                self._append(station)
+                joined.add(mac)
+            elif self._set(row, station):
+                updated.add(mac)
+
+        left = {mac: self.get(mac) for mac in set(self._rows) - seen}
+        for mac in left:
+            self._remove(mac)
+
+        return StationChanges(joined, left, updated)
+
+    def _append(self, station: Station):
+        self._rows[station.mac] = len(self._macs)
+        self._macs.append(sys.intern(station.mac))
+        self._ssids.append(sys.intern(station.ssid))
+        self._wlan_ids.append(sys.intern(station.wlan_id))
+        self._rssi.append(station.rssi)
+        self._rate.append(station.rate)
+        self._tx_bytes.append(station.tx_bytes)
+        self._rx_bytes.append(station.rx_bytes)
+
+    def _set(self, row: int, station: Station) -> bool:
+        """ Overwrites the row, returns true if anything changed """
+        changed = (self._ssids[row] != station.ssid or self._wlan_ids[row] != station.wlan_id
+                   or self._rssi[row] != station.rssi or self._rate[row] != station.rate
+                   or self._tx_bytes[row] != station.tx_bytes or self._rx_bytes[row] != station.rx_bytes)
+        if changed:
+            self._ssids[row] = sys.intern(station.ssid)
+            self._wlan_ids[row] = sys.intern(station.wlan_id)
+            self._rssi[row] = station.rssi
+            self._rate[row] = station.rate
+            self._tx_bytes[row] = station.tx_bytes
+            self._rx_bytes[row] = station.rx_bytes
+        return changed
+
+    def _remove(self, mac: str):
+        row = self._rows.pop(mac)
+        last = len(self._macs) - 1
+        if row != last:
+            # Move the last row into the hole
+            self._rows[self._macs[last]] = row
+            for column in (self._macs, self._ssids, self._wlan_ids, self._rssi, self._rate, self._tx_bytes,
+                           self._rx_bytes):
+                column[row] = column[last]
+        for column in (self._macs, self._ssids, self._wlan_ids, self._rssi, self._rate, self._tx_bytes,
+                       self._rx_bytes):
+            column.pop()
@@ -1,13 +1,12 @@
 """Switch platform for netgear_wax."""
 import logging
-import time
 from typing import List
 
 from homeassistant.core import HomeAssistant
 from homeassistant.components.switch import SwitchEntity
 from custom_components.netgear_wax import NetgearDataUpdateCoordinator, Ssid
 
-from .const import DOMAIN, CONNECTIVITY_DEVICE_CLASS, WIFI_ICON
+from .const import DOMAIN, CONNECTIVITY_DEVICE_CLASS, WIFI_ICON, FIELD_SSIDS
 from .entity import NetgearBaseEntity
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -17,12 +16,10 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     """Setup switch platform."""
     coordinator: NetgearDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    added = set()
     switches: List[NetgearSsidBinarySwitch] = []
-    for ssid in coordinator.get_ssids():
-        if ssid.ssid is not None and ssid.ssid not in added:
-            added.add(ssid.ssid)
-            switches.append(NetgearSsidBinarySwitch(coordinator, entry, ssid))
+    for name in coordinator.get_ssid_names():
+        if name is not None:
+            switches.append(NetgearSsidBinarySwitch(coordinator, entry, coordinator.get_ssids_by_name(name)[0]))
 
     if switches:
         async_add_devices(switches)
@@ -31,6 +28,8 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
 class NetgearSsidBinarySwitch(NetgearBaseEntity, SwitchEntity):
     """netgear_wax SSID switch class. Used to enable or disable Wi-Fi SSIDs"""
 
+    _watched_fields = frozenset({FIELD_SSIDS})
+
     def __init__(self, coordinator: NetgearDataUpdateCoordinator, config_entry, ssid: Ssid):
         NetgearBaseEntity.__init__(self, coordinator, config_entry)
         SwitchEntity.__init__(self)
@@ -40,26 +39,14 @@ class NetgearSsidBinarySwitch(NetgearBaseEntity, SwitchEntity):
         self._ssid_id = ssid.ssid_id
         self._name = f"{coordinator.get_device_name()} {ssid.ssid}"
         self._unique_id = f"{coordinator.get_mac()}_{ssid.ssid_index}"
-        self._last_flipped_time: int = 0
-        self._last_flipped_state: bool = False
 
     async def async_turn_on(self, **kwargs):  # pylint: disable=unused-argument
         """Turn on the ssid"""
-        self._last_flipped_time = time.time()
-        self._last_flipped_state = True
-        self.hass.async_create_task(self.work_on(True))
+        self._coordinator.ssid_commands.submit(self._ssid_id, True)
 
     async def async_turn_off(self, **kwargs):  # pylint: disable=unused-argument
         """Turn off the ssid"""
-        self._last_flipped_time = time.time()
-        self._last_flipped_state = False
-        self.hass.async_create_task(self.work_on(False))
-
-    async def work_on(self, enabled: bool):
-        ssids = self._coordinator.get_ssids_by_ssid_id(self._ssid_id)
-        await self._coordinator.client.async_enable_ssid(ssids, enabled)
-        await self._coordinator.async_refresh()
-
+        self._coordinator.ssid_commands.submit(self._ssid_id, False)
 
     @property
     def name(self):
@@ -78,19 +65,26 @@ class NetgearSsidBinarySwitch(NetgearBaseEntity, SwitchEntity):
     @property
     def is_on(self):
         """ Return true if the ssid is enabled """
-        ssids = self._coordinator.get_ssids_by_ssid_id(self._ssid_id)
-
         # The API to enable or disable an ssid is very slow. It can take 20 seconds to complete.
-        # During that time the switch in the UI might jump back to the oposite state. So for for the
-        # time below, we'll just assume the state we attempted to put it in to avoid a weird UI issue
-        if time.time() - self._last_flipped_time <= 30:
-            _LOGGER.debug("Returning assumed state %s", self._last_flipped_state)
-            return self._last_flipped_state
+        # While the command is in flight, report the state we're putting the ssid in so the switch
+        # in the UI doesn't jump back to the old state
+        pending = self._coordinator.ssid_commands.get_pending_state(self._ssid_id)
+        if pending is not None:
+            return pending
 
+        ssids = self._coordinator.get_ssids_by_ssid_id(self._ssid_id)
         if len(ssids) > 0:
             return ssids[0].enabled
         return False
 
+    @property
+    def extra_state_attributes(self):
+        """ Return the outcome of the last toggle: pending, confirmed or failed """
+        status = self._coordinator.ssid_commands.get_status(self._ssid_id)
+        if status is None:
+            return None
+        return {"toggle_status": status}
+
     @property
     def icon(self):
         """Return the icon of this switch."""
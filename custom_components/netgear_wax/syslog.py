@@ -0,0 +1,184 @@
+"""Syslog receiver for netgear_wax."""
+import asyncio
+import logging
+import re
+import socket
+import sys
+from typing import Callable, Dict, NamedTuple, Optional, Pattern, Set, Tuple
+
+from .const import (
+    SYSLOG_CONFIG,
+    SYSLOG_MAX_MESSAGE_BYTES,
+    SYSLOG_RADIO,
+    SYSLOG_STATION_JOINED,
+    SYSLOG_STATION_LEFT,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+_INTERFACE = r"(?:(?P<interface>[\w.-]+): )?"
+_MAC = r"(?P<mac>[0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5})"
+
+# The access points log through hostapd, which names the radio interface first. The first pattern found wins.
+SYSLOG_PATTERNS: Tuple[Tuple[str, Pattern], ...] = tuple((kind, re.compile(pattern)) for kind, pattern in [
+    (SYSLOG_STATION_JOINED, _INTERFACE + r"AP-STA-CONNECTED " + _MAC),
+    (SYSLOG_STATION_JOINED, _INTERFACE + r"STA " + _MAC + r" IEEE 802\.11: associated"),
+    (SYSLOG_STATION_LEFT, _INTERFACE + r"AP-STA-DISCONNECTED " + _MAC),
+    (SYSLOG_STATION_LEFT, _INTERFACE + r"STA " + _MAC + r" IEEE 802\.11: (?:disassociated|deauthenticated)"),
+    (SYSLOG_RADIO, _INTERFACE + r"(?:AP-CSA-FINISHED|CTRL-EVENT-CHANNEL-SWITCH|DFS-RADAR-DETECTED|DFS-NOP-FINISHED"
+                                r"|ACS-COMPLETED|AP-ENABLED|AP-DISABLED|INTERFACE-ENABLED|INTERFACE-DISABLED)\b"),
+    (SYSLOG_CONFIG, r"(?i)\bconfig(?:uration)?\s+(?:changed|applied|saved|updated)\b"),
+])
+
+_PRIORITY = re.compile(r"<\d{1,3}>")
+
+
+class SyslogEvent(NamedTuple):
+    """ A syslog message that says something about the access point changed """
+    kind: str
+    # Radio interface named by the message, empty when there's none
+    interface: str
+    # Station MAC address of station events, upper case. Empty for other kinds.
+    mac: str
+    message: str
+
+
+def parse_syslog(data: bytes) -> Optional[SyslogEvent]:
+    """ Returns the event in an RFC 3164 or RFC 5424 syslog message, None if it isn't one we know """
+    message = data.decode("utf-8", "replace").strip().lstrip("\ufeff")
+    priority = _PRIORITY.match(message)
+    if priority is not None:
+        message = message[priority.end():]
+
+    for kind, pattern in SYSLOG_PATTERNS:
+        match = pattern.search(message)
+        if match is None:
+            continue
+        groups = match.groupdict()
+        interface = groups.get("interface") or ""
+        mac = groups.get("mac") or ""
+        return SyslogEvent(kind, sys.intern(interface), sys.intern(mac.upper()), message)
+    return None
+
+
+def _host(address) -> str:
+    host = address[0] if address else ""
+    # IPv4 clients of a dual stack socket show up as IPv4 mapped IPv6 addresses
+    return host[7:] if host.startswith("::ffff:") else host
+
+
+class NetgearSyslogListener:
+    """
+    Receives syslog from the access points over UDP and TCP on one port. Shared by every config entry that turned the
+    syslog option on with that port.
+
+    Messages are handed to the handler registered for the address they came from. Messages from other addresses are
+    counted and dropped. The sockets are opened with the first handler and closed with the last.
+    """
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+        # Source IP address to handler
+        self._handlers: Dict[str, Callable[[bytes], None]] = {}
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._streams: Set[asyncio.StreamWriter] = set()
+        self.received = 0
+        self.dropped = 0
+
+    @property
+    def listening(self) -> bool:
+        return self._transport is not None or self._server is not None
+
+    async def async_register(self, address: str, handler: Callable[[bytes], None]):
+        """ Routes messages from address, an IP address or a host name, to handler """
+        for host in await self._async_resolve(address):
+            self._handlers[host] = handler
+        if not self.listening:
+            await self._async_start()
+
+    def unregister(self, handler: Callable[[bytes], None]):
+        """ Stops routing messages to handler, closing the sockets if it was the last one """
+        for host in [host for host, registered in self._handlers.items() if registered == handler]:
+            del self._handlers[host]
+        if not self._handlers:
+            self.close()
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        # Closing the server doesn't close the connections it accepted
+        for writer in self._streams:
+            writer.close()
+
+    @staticmethod
+    async def _async_resolve(address: str) -> Set[str]:
+        hosts = {address}
+        try:
+            for info in await asyncio.get_running_loop().getaddrinfo(address, None, type=socket.SOCK_DGRAM):
+                hosts.add(info[4][0])
+        except OSError as exception:
+            _LOGGER.debug("Failed to resolve %s, only messages from that exact address are accepted: %r", address,
+                          exception)
+        return hosts
+
+    async def _async_start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self._transport, _ = await loop.create_datagram_endpoint(lambda: _SyslogDatagramProtocol(self),
+                                                                     local_addr=("0.0.0.0", self.port))
+            self._server = await asyncio.start_server(self._async_handle_stream, port=self.port,
+                                                      limit=SYSLOG_MAX_MESSAGE_BYTES)
+        except OSError as exception:
+            # Polling carries on without the push path
+            _LOGGER.error("Failed to listen for syslog on port %s: %s", self.port, exception)
+            self.close()
+            return
+        _LOGGER.info("Listening for syslog on port %s", self.port)
+
+    async def _async_handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Reads messages framed by octet counting ("<length> <message>") or by new lines (RFC 6587) """
+        host = _host(writer.get_extra_info("peername"))
+        if host not in self._handlers:
+            self.dropped += 1
+            writer.close()
+            return
+        self._streams.add(writer)
+        try:
+            while True:
+                first = await reader.readexactly(1)
+                if first.isdigit():
+                    length = int(first + (await reader.readuntil(b" "))[:-1])
+                    if length > SYSLOG_MAX_MESSAGE_BYTES:
+                        break
+                    self.dispatch(host, await reader.readexactly(length))
+                else:
+                    self.dispatch(host, first + await reader.readuntil(b"\n"))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+        finally:
+            self._streams.discard(writer)
+            writer.close()
+
+    def dispatch(self, host: str, data: bytes):
+        handler = self._handlers.get(host)
+        if handler is None:
+            self.dropped += 1
+            return
+        self.received += 1
+        try:
+            handler(data)
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to handle a syslog message from %s", host, exc_info=exception)
+
+
+class _SyslogDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: NetgearSyslogListener) -> None:
+        self._listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        self._listener.dispatch(_host(addr), data)
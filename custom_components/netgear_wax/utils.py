@@ -1,4 +1,8 @@
+from collections import deque
 import logging
+import sys
+from types import MappingProxyType
+from typing import Mapping, Optional, Set
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -54,8 +58,88 @@ def parse_human_string(traffic: str) -> int:
     return 0
 
 
+def parse_human_resolution(traffic: str) -> int:
+    """ Returns how many bytes the last digit of the human string is worth. Example input: 12.2 GB returns
+    0.1 GB in bytes """
+    try:
+        parts = traffic.split(" ")
+        decimals = len(parts[0].split(".")[1]) if "." in parts[0] else 0
+        units = {"B": 1, "Bytes": 1, "Byte": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+        return int(units.get(parts[1], 0) / 10 ** decimals)
+    except Exception as exception:
+        _LOGGER.debug("Failed to parse %s", traffic, exc_info=exception)
+        pass
+
+    return 0
+
+
 def safe_cast(val, to_type, default=None):
     try:
         return to_type(val)
     except (ValueError, TypeError):
         return default
+
+
+def merge_dicts(a: Mapping, b: Mapping) -> dict:
+    """ Returns a new dictionary with b recursively merged into a. Neither input is modified and all nested
+    mappings in the result are plain dictionaries """
+    merged = {key: thaw(value) for key, value in a.items()}
+    for key, value in b.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = thaw(value)
+    return merged
+
+
+def freeze(value):
+    """ Returns a read only copy of value where every nested dictionary is a MappingProxyType """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(v) for key, v in value.items()})
+    return value
+
+
+def thaw(value):
+    """ Returns a copy of value where every nested mapping is a plain dictionary. The opposite of freeze """
+    if isinstance(value, Mapping):
+        return {key: thaw(v) for key, v in value.items()}
+    return value
+
+
+def stat_field(lan: str, name: str) -> str:
+    """ Returns the change tracking field name for a Stat value, example: stats.wlan0.utilization """
+    return f"stats.{lan}.{name}"
+
+
+def station_field(mac: str) -> str:
+    """ Returns the change tracking field name for a station, example: stations.AA:BB:CC:DD:EE:FF """
+    return f"stations.{mac}"
+
+
+def deep_getsizeof(value, seen: Optional[Set[int]] = None) -> int:
+    """ Returns the size in bytes of value and everything it references. Objects reached more than once, like interned
+    strings and models, are counted once """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+
+    if isinstance(value, Mapping):
+        size += sum(deep_getsizeof(k, seen) + deep_getsizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_getsizeof(item, seen) for item in value)
+
+    for cls in type(value).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__weakref__", "__dict__") and hasattr(value, name):
+                size += deep_getsizeof(getattr(value, name), seen)
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        size += deep_getsizeof(vars(value), seen)
+
+    return size
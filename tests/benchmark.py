@@ -0,0 +1,95 @@
+"""Benchmarks the netgear_wax client against simulated access points.
+
+Run from the repository root:
+
+    python -m tests.benchmark --aps 1 10 100 --polls 20 --latency 0.05
+
+For each fleet size it reports the login cost, poll latency percentiles, socketCommunication requests and new
+connections per poll and poll throughput, all measured against local WaxSimulator instances.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from .simulator import WaxSimulator
+from .test_client import create_client
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def benchmark_fleet(aps: int, polls: int, latency: float, session_expiry: float) -> dict:
+    simulators = [WaxSimulator(latency=latency, session_expiry=session_expiry) for _ in range(aps)]
+    for simulator in simulators:
+        await simulator.__aenter__()
+
+    # Each client has its own connection pool, like in Home Assistant
+    clients = [create_client(simulator) for simulator in simulators]
+    try:
+        login_times = []
+
+        async def login(client):
+            started = time.perf_counter()
+            await client.async_login()
+            login_times.append(time.perf_counter() - started)
+
+        await asyncio.gather(*[login(client) for client in clients])
+        requests_before = sum(simulator.socket_requests for simulator in simulators)
+        connections_before = sum(client.connections_created for client in clients)
+
+        poll_times = []
+
+        async def poll(client):
+            for _ in range(polls):
+                started = time.perf_counter()
+                await client.async_get_state_and_ssids()
+                poll_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[poll(client) for client in clients])
+        elapsed = time.perf_counter() - started
+
+        requests = sum(simulator.socket_requests for simulator in simulators) - requests_before
+        connections = sum(client.connections_created for client in clients) - connections_before
+        return {
+            "aps": aps,
+            "login_ms": statistics.mean(login_times) * 1000,
+            "p50_ms": percentile(poll_times, 50) * 1000,
+            "p95_ms": percentile(poll_times, 95) * 1000,
+            "p99_ms": percentile(poll_times, 99) * 1000,
+            "requests_per_poll": requests / len(poll_times),
+            "connections_per_poll": connections / len(poll_times),
+            "polls_per_second": len(poll_times) / elapsed,
+        }
+    finally:
+        for client in clients:
+            await client.async_close()
+        for simulator in simulators:
+            await simulator.__aexit__(None, None, None)
+
+
+async def main(args: argparse.Namespace):
+    print(f"{'APs':>5} {'login ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/poll':>9} {'conn/poll':>9} "  # noqa: T201
+          f"{'polls/s':>9}")
+    for aps in args.aps:
+        result = await benchmark_fleet(aps, args.polls, args.latency, args.session_expiry)
+        print(  # noqa: T201
+            f"{result['aps']:>5} {result['login_ms']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['requests_per_poll']:>9.2f} {result['connections_per_poll']:>9.2f} "
+            f"{result['polls_per_second']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--aps", type=int, nargs="+", default=[1, 10, 100], help="fleet sizes to benchmark")
+    parser.add_argument("--polls", type=int, default=20, help="polls per access point")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated device latency in seconds")
+    parser.add_argument("--session-expiry", type=float, default=300.0,
+                        help="seconds of inactivity before the simulator drops a session")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""Replays a diagnostics download against the simulator.
+
+Download the diagnostics of an access point in Home Assistant with the metrics option on, so the responses are in
+it (ideally after running the netgear_wax.profile service while polls were slow), then run from the repository root:
+
+    python -m tests.replay config_entry-netgear_wax-....json --polls 50
+
+The simulator answers with the recorded responses at the recorded median latency, so client side costs (parsing,
+decoding, change tracking) can be measured and profiled locally. The recorded poll timings and the replayed ones are
+printed side by side.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from custom_components.netgear_wax.metrics import NetgearMetrics
+
+from .benchmark import percentile
+from .simulator import WaxSimulator
+from .test_client import create_client
+
+
+def summary(durations_ms: List[float]) -> str:
+    if not durations_ms:
+        return "no samples"
+    return (f"p50 {percentile(durations_ms, 50):8.1f} ms  p95 {percentile(durations_ms, 95):8.1f} ms  "
+            f"mean {statistics.mean(durations_ms):8.1f} ms  n {len(durations_ms)}")
+
+
+async def replay(diagnostics: dict, polls: int, latency: float = None):
+    data = diagnostics.get("data", diagnostics)
+    kwargs = {} if latency is None else {"latency": latency}
+    async with WaxSimulator.from_diagnostics(diagnostics, **kwargs) as simulator:
+        client = create_client(simulator)
+        client.metrics = NetgearMetrics()
+        try:
+            durations = []
+            for _ in range(polls):
+                started = time.perf_counter()
+                await client.async_get_state_and_ssids()
+                durations.append((time.perf_counter() - started) * 1000)
+        finally:
+            await client.async_close()
+
+    recorded = [poll["duration_ms"] for poll in data.get("coordinator", {}).get("polls", []) if poll.get("success")]
+    print(f"simulated latency {simulator.latency * 1000:.1f} ms")  # noqa: T201
+    print(f"recorded  {summary(recorded)}")  # noqa: T201
+    print(f"replayed  {summary(durations)}")  # noqa: T201
+    decode = client.metrics.decode.as_dict()
+    print(f"decode    p50 {decode['p50_ms']:>8} ms  p95 {decode['p95_ms']:>8} ms  mean {decode['mean_ms']:8.1f} ms  "  # noqa: T201
+          f"n {decode['count']} (bucketed)")
+
+    profile = data.get("profile") or {}
+    if profile.get("stacks"):
+        print(f"\nrecorded profile, {profile['samples']} samples over {profile['polls']} polls:")  # noqa: T201
+        for stack in profile["stacks"][:10]:
+            print(f"  {stack}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("diagnostics", help="diagnostics download of an access point")
+    parser.add_argument("--polls", type=int, default=20, help="polls to replay")
+    parser.add_argument("--latency", type=float, default=None,
+                        help="simulated device latency in seconds, defaults to the recorded median")
+    args = parser.parse_args()
+    with open(args.diagnostics, encoding="utf-8") as file:
+        asyncio.run(replay(json.load(file), args.polls, args.latency))
@@ -0,0 +1,266 @@
+"""A local Netgear WAX access point simulator for tests and benchmarks.
+
+It implements the parts of the device web API the integration uses: the lhttpdsid cookie and security token login,
+/socketCommunication queries and ssidSetDetails updates, /logout and /LogFile. Latency, the concurrent session limit
+and session expiry are configurable so client behaviour against slow or busy devices can be checked offline.
+"""
+import asyncio
+import copy
+import json
+import secrets
+import statistics
+import time
+from typing import Dict, Optional
+
+from aiohttp import web
+
+USERNAME = "admin"
+PASSWORD = "password"
+# The WPA passphrase of every simulated SSID
+PASSPHRASE = "correct horse battery staple"
+
+
+def default_device() -> dict:
+    """ Returns the device tree the simulator answers queries from """
+    ssids = {}
+    for index, name in enumerate(["Home", "Guest", "IoT"], start=1):
+        ssids[f"SSID{index}"] = {
+            wlan: {"vap" + str(index - 1): {"vapProfileStatus": 1 if name != "Guest" else 0, "ssid": name,
+                                            "authenticationType": "WPA2-PSK", "presharedKey": PASSPHRASE,
+                                            "wpa2PersonalKey": PASSPHRASE}}
+            for wlan in ("wlan0", "wlan1")
+        }
+
+    return {
+        "system": {
+            "monitor": {
+                "productId": "WAX610",
+                "totalNumberOfDevices": 12,
+                "sysSerialNumber": "6LA1234567890",
+                "ethernetMacAddress": "AA:BB:CC:DD:EE:FF",
+                "sysVersion": "V10.8.8.1",
+                "FiveGhzSupport": {"wlan1": 1},
+                "internetConnectivityStatus": "1",
+                "connectedClients": [
+                    {"MacAddress": "11:22:33:44:55:66", "Ssid": "Home", "Radio": "wlan1", "Rssi": "-52",
+                     "Rate": "866", "TxBytes": "1000", "RxBytes": "2000"},
+                    {"MacAddress": "aa:bb:cc:00:11:22", "Ssid": "IoT", "Radio": "wlan0", "Rssi": "-70",
+                     "Rate": "72", "TxBytes": "10", "RxBytes": "20"},
+                ],
+                "stats": {
+                    "lan": {"traffic": "12.2 GB"},
+                    "wlan0": {"traffic": "3.4 GB", "channelUtil": "23"},
+                    "wlan1": {"traffic": "8.1 GB", "channelUtil": "41"},
+                },
+            },
+            "basicSettings": {"apName": "Office AP"},
+            "FwUpdate": {"ImageAvailable": "0", "ImageVersion": ""},
+            "wlanSettings": {
+                "wlanSettingTable": {
+                    "ssidGetDetails": ssids,
+                    "wlan0": {"radioStatus": "1", "channel": "0", "currentChannel": "6", "channelWidth": "20MHz",
+                              "txPower": "Full"},
+                    "wlan1": {"radioStatus": "1", "channel": "36", "channelWidth": "80MHz", "txPower": "Half"},
+                },
+                "bandSteeringSt": "1",
+            },
+        }
+    }
+
+
+def tri_band_radios() -> dict:
+    """ Returns the wlanSettings of a tri-band access point whose firmware uses the other radio key names: the 2.4 GHz
+    radio off, the 5 GHz one on an automatically picked channel and a 6 GHz one, with band steering off """
+    return {
+        "bandSteering": "0",
+        "wlanSettingTable": {
+            "wlan0": {"wlanStatus": "0", "channel": "0", "channelBandwidth": "HT20", "transmitPower": "Quarter"},
+            "wlan1": {"wlanStatus": "1", "channel": "0", "operatingChannel": "44", "channelBandwidth": "VHT160",
+                      "transmitPower": "Full"},
+            "wlan2": {"status": "1", "operatingChannel": "37 (6 GHz)", "bandwidth": "320 MHz", "txPwr": "20 dBm"},
+        },
+    }
+
+
+class WaxSimulator:
+    """
+    Serves one simulated access point on localhost. Use as an async context manager, url is the base url to give
+    the client.
+
+    latency: seconds added to every response
+    max_sessions: logins beyond this many live sessions are refused, like the real device
+    session_expiry: seconds of inactivity after which a session is dropped and requests get status 100
+    down: when true every request gets a 503, like a device that's rebooting
+    """
+
+    def __init__(self, latency: float = 0.0, max_sessions: int = 5, session_expiry: float = 300.0,
+                 device: Optional[dict] = None) -> None:
+        self.latency = latency
+        self.max_sessions = max_sessions
+        self.session_expiry = session_expiry
+        self.device = device if device is not None else default_device()
+        # lhttpdsid to security token, for cookies handed out by GET /
+        self._cookies: Dict[str, Optional[str]] = {}
+        # lhttpdsid to time of last use, for logged in sessions
+        self._sessions: Dict[str, float] = {}
+        self.requests: Dict[str, int] = {}
+        self.logins = 0
+        self.rejected_logins = 0
+        self.down = False
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> "WaxSimulator":
+        app = web.Application()
+        app.router.add_get("/", self._handle_index)
+        app.router.add_post("/socketCommunication", self._handle_socket_communication)
+        app.router.add_post("/logout", self._handle_logout)
+        app.router.add_post("/LogFile", self._handle_log_file)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self._runner.cleanup()
+
+    @classmethod
+    def from_diagnostics(cls, diagnostics: dict, **kwargs) -> "WaxSimulator":
+        """
+        Returns a simulator that answers like the access point in a diagnostics download (the file, or its data).
+        The device tree is rebuilt from the recorded socketCommunication responses and the device section, and the
+        latency is the median of the recorded socketCommunication requests unless one is passed in.
+        """
+        data = diagnostics.get("data", diagnostics)
+        device_info = data.get("device", {})
+        device = {
+            "system": {
+                "monitor": {
+                    "productId": device_info.get("model") or "WAX610",
+                    "sysVersion": device_info.get("firmware_version") or "V0.0.0.0",
+                    "ethernetMacAddress": device_info.get("mac") or "AA:BB:CC:DD:EE:FF",
+                    "sysSerialNumber": "REPLAY",
+                    "totalNumberOfDevices": 0,
+                },
+                "basicSettings": {"apName": device_info.get("device_name") or "Replay AP"},
+            }
+        }
+
+        durations = []
+        for exchange in data.get("client", {}).get("exchanges", []):
+            response = exchange.get("response")
+            # Login requests are redacted and their responses hold nothing but the token
+            if exchange.get("endpoint") != "/socketCommunication" or not isinstance(response, dict) \
+                    or not isinstance(exchange.get("request"), dict):
+                continue
+            durations.append(exchange.get("duration_ms", 0) / 1000)
+            cls._merge(device, {key: value for key, value in response.items() if key != "status"})
+
+        kwargs.setdefault("latency", statistics.median(durations) if durations else 0.0)
+        return cls(device=device, **kwargs)
+
+    @classmethod
+    def _merge(cls, tree: dict, update: dict):
+        for key, value in update.items():
+            if isinstance(value, dict) and isinstance(tree.get(key), dict):
+                cls._merge(tree[key], value)
+            else:
+                tree[key] = copy.deepcopy(value)
+
+    @property
+    def socket_requests(self) -> int:
+        return self.requests.get("/socketCommunication", 0)
+
+    def expire_sessions(self):
+        """ Drops every session, like a device reboot """
+        self._sessions.clear()
+
+    async def _respond(self, request: web.Request, body: dict, **kwargs) -> web.Response:
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.down:
+            return web.Response(status=503)
+        return web.json_response(body, **kwargs)
+
+    def _live_session(self, request: web.Request) -> Optional[str]:
+        """ Returns the lhttpdsid if the request belongs to a logged in, unexpired session """
+        now = time.monotonic()
+        for lhttpdsid, last_used in list(self._sessions.items()):
+            if now - last_used > self.session_expiry:
+                del self._sessions[lhttpdsid]
+
+        lhttpdsid = request.cookies.get("lhttpdsid")
+        if lhttpdsid not in self._sessions or request.headers.get("security") != self._cookies.get(lhttpdsid):
+            return None
+        self._sessions[lhttpdsid] = now
+        return lhttpdsid
+
+    async def _handle_index(self, request: web.Request) -> web.Response:
+        lhttpdsid = secrets.token_hex(16)
+        self._cookies[lhttpdsid] = None
+        response = await self._respond(request, {})
+        response.headers["Set-Cookie"] = f"lhttpdsid={lhttpdsid}; Path=/; HttpOnly; SameSite;"
+        return response
+
+    async def _handle_socket_communication(self, request: web.Request) -> web.Response:
+        query = json.loads(await request.read())
+        settings = query.get("system", {}).get("basicSettings", {})
+        if "adminName" in settings:
+            return await self._login(request, settings)
+
+        if self._live_session(request) is None:
+            return await self._respond(request, {"status": 100})
+
+        table = query.get("system", {}).get("wlanSettings", {}).get("wlanSettingTable", {})
+        if "ssidSetDetails" in table:
+            self._set_ssids(table["ssidSetDetails"])
+            return await self._respond(request, {"status": 0})
+
+        result = self._select(query, self.device)
+        result["status"] = 0
+        return await self._respond(request, result)
+
+    async def _login(self, request: web.Request, settings: dict) -> web.Response:
+        lhttpdsid = request.cookies.get("lhttpdsid")
+        if lhttpdsid not in self._cookies or settings.get("adminName") != USERNAME \
+                or settings.get("adminPasswd") != PASSWORD:
+            return await self._respond(request, {"status": 1}, status=401)
+
+        self._live_session(request)
+        if len(self._sessions) >= self.max_sessions:
+            self.rejected_logins += 1
+            return await self._respond(request, {"status": 2, "message": "Too many sessions"})
+
+        token = secrets.token_hex(16)
+        self._cookies[lhttpdsid] = token
+        self._sessions[lhttpdsid] = time.monotonic()
+        self.logins += 1
+        return await self._respond(request, {"status": 0, "system": {"security_token": token}})
+
+    async def _handle_logout(self, request: web.Request) -> web.Response:
+        self._sessions.pop(request.cookies.get("lhttpdsid"), None)
+        return await self._respond(request, {"status": 0})
+
+    async def _handle_log_file(self, request: web.Request) -> web.Response:
+        return await self._respond(request, {"status": 0})
+
+    def _set_ssids(self, details: dict):
+        ssids = self.device["system"]["wlanSettings"]["wlanSettingTable"]["ssidGetDetails"]
+        for ssid_id, wlans in details.items():
+            for wlan_id, vaps in wlans.items():
+                for vap_id, vap in vaps.items():
+                    target = ssids.setdefault(ssid_id, {}).setdefault(wlan_id, {}).setdefault(vap_id, {})
+                    target["vapProfileStatus"] = int(vap.get("vapProfileStatus", 0))
+                    target["ssid"] = vap.get("ssid", target.get("ssid", ""))
+
+    @classmethod
+    def _select(cls, query, tree):
+        """ Returns the parts of tree asked for by query. An empty value in the query selects the whole subtree """
+        if not isinstance(query, dict) or not query or not isinstance(tree, dict):
+            return copy.deepcopy(tree)
+        return {key: cls._select(value, tree[key]) for key, value in query.items() if key in tree}
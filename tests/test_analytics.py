@@ -0,0 +1,46 @@
+"""Tests for the netgear_wax fleet analytics."""
+from custom_components.netgear_wax.analytics import FleetAnalytics, RadioReading
+
+
+def test_bands_and_hottest_access_points():
+    """Utilization is aggregated per band and access points are ranked by their busiest radio."""
+    analytics = FleetAnalytics(window=60, hottest=5)
+    for index in range(10):
+        analytics.update(f"mac{index}", f"ap{index}", [
+            RadioReading("wlan0", "2.4GHz", 10 * (index + 1)),
+            RadioReading("wlan1", "5GHz", index),
+        ], now=0)
+
+    summary = analytics.summary(now=0)
+    assert summary["bands"]["2.4GHz"] == {"radios": 10, "mean": 55, "p50": 50, "p90": 90, "p95": 100, "max": 100}
+    assert [ap["name"] for ap in summary["hottest"]] == ["ap9", "ap8", "ap7", "ap6", "ap5"]
+    assert summary["co_channel"]["overlaps"] is None
+
+    # A spike on ap0 moves its moving average 1 - 1/e of the way up within one window
+    analytics.update("mac0", "ap0", [RadioReading("wlan0", "2.4GHz", 100)], now=60)
+    hottest = analytics.summary(now=60)["hottest"]
+    assert [ap["name"] for ap in hottest] == ["ap9", "ap8", "ap7", "ap6", "ap0"]
+    assert (hottest[4]["utilization"], hottest[4]["score"]) == (100, 66.9)
+
+    analytics.remove("mac9")
+    assert analytics.summary(now=60)["bands"]["2.4GHz"]["radios"] == 9
+    # Access points that stopped reporting are left out
+    assert analytics.summary(now=10000)["bands"] == {}
+
+
+def test_co_channel_overlap():
+    """Radios of different access points whose channels share spectrum are counted."""
+    analytics = FleetAnalytics()
+    analytics.update("a", "ap-a", [RadioReading("wlan0", "2.4GHz", 10, channel=1),
+                                   RadioReading("wlan1", "5GHz", 10, channel=36, width=80)], now=0)
+    analytics.update("b", "ap-b", [RadioReading("wlan0", "2.4GHz", 10, channel=3),
+                                   RadioReading("wlan1", "5GHz", 10, channel=44, width=20)], now=0)
+    analytics.update("c", "ap-c", [RadioReading("wlan0", "2.4GHz", 10, channel=6),
+                                   RadioReading("wlan1", "5GHz", 10, channel=149, width=80)], now=0)
+
+    co_channel = analytics.summary(now=0)["co_channel"]
+    # 1 and 3 overlap on 2.4 GHz, 44 is inside 36's 80 MHz block. 6 is clear of 1 but not of 3.
+    assert co_channel["overlaps"] == 3
+    assert [(ap["name"], ap["overlaps"]) for ap in co_channel["access_points"]] == \
+        [("ap-b", 3), ("ap-a", 2), ("ap-c", 1)]
+    assert co_channel["channels"]["5GHz"] == {36: ["ap-a"], 44: ["ap-b"], 149: ["ap-c"]}
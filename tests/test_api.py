@@ -1,7 +0,0 @@
-"""Tests for netgear_wax api."""
-
-async def test_api(hass, aioclient_mock, caplog):
-    """Test calls."""
-
-    # TODO: Add tests
-    assert (True and "Expected True")
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""Tests for the netgear_wax client against the local simulator."""
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+import pytest
+
+from custom_components.netgear_wax.client_wax import NetgearWaxClient
+from custom_components.netgear_wax.metrics import NetgearMetrics
+from custom_components.netgear_wax.resilience import CircuitBreaker, CircuitOpenError, RequestSlots
+
+from .simulator import PASSWORD, USERNAME, WaxSimulator, default_device, tri_band_radios
+
+
+def create_client(simulator: WaxSimulator, session: Optional[aiohttp.ClientSession] = None) -> NetgearWaxClient:
+    client = NetgearWaxClient(USERNAME, PASSWORD, "127.0.0.1", 0, session)
+    # The simulator serves plain http
+    client._base_url = simulator.url
+    return client
+
+
+async def test_poll_is_one_request():
+    """A poll reads the state and the SSIDs in one round trip."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+
+        state, ssids = await client.async_get_state_and_ssids()
+
+        assert simulator.logins == 1
+        # One login request and one poll
+        assert simulator.socket_requests == 2
+        assert state.model == "WAX610"
+        assert state.device_name == "Office AP"
+        assert state.total_number_of_devices == 12
+        assert state.stats["wlan1"].utilization == 41
+        assert sorted({ssid.ssid for ssid in ssids}) == ["Guest", "Home", "IoT"]
+
+
+async def test_device_info_is_kept_between_polls():
+    """Polls after the first skip the device info but still report it."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+
+        await client.async_get_state_and_ssids()
+        simulator.device["system"]["monitor"]["totalNumberOfDevices"] = 3
+        state, _ = await client.async_get_state_and_ssids()
+
+        assert state.model == "WAX610"
+        assert state.mac_address == "AA:BB:CC:DD:EE:FF"
+        assert state.total_number_of_devices == 3
+
+
+async def test_concurrent_requests_share_one_login():
+    """Requests that find the session expired wait for a single login."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        await client.async_get_ssids()
+
+        simulator.expire_sessions()
+        await asyncio.gather(*[client.async_get_ssids() for _ in range(5)])
+
+        assert simulator.logins == 2
+        assert client.login_count == 2
+
+
+async def test_stations_are_only_fetched_when_tracked():
+    """Connected clients ride along with the poll once station tracking is on."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+
+        state, _ = await client.async_get_state_and_ssids()
+        assert state.stations is None
+
+        client.track_stations = True
+        state, _ = await client.async_get_state_and_ssids()
+        assert [station.mac for station in state.stations] == ["11:22:33:44:55:66", "AA:BB:CC:00:11:22"]
+        assert state.stations[0].rssi == -52
+        assert state.stations[0].wlan_id == "wlan1"
+
+
+async def test_radios_ride_along_with_polls():
+    """The radio configuration is part of the first poll and then only fetched again once it's stale."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+
+        state, _ = await client.async_get_state_and_ssids()
+        assert [(radio.wlan_id, radio.channel, radio.channel_width, radio.tx_power) for radio in state.radios] == [
+            ("wlan0", 6, 20, "Full"), ("wlan1", 36, 80, "Half")]
+        assert all(radio.band_steering for radio in state.radios)
+
+        simulator.device["system"]["wlanSettings"]["wlanSettingTable"]["wlan1"]["channel"] = "149"
+        state, _ = await client.async_get_state_and_ssids()
+        assert state.radios[1].channel == 36
+
+        client.invalidate_radios()
+        state, _ = await client.async_get_state_and_ssids()
+        assert state.radios[1].channel == 149
+        # Login, then three polls, no extra round trips
+        assert simulator.socket_requests == 4
+        assert (await client.async_get_radios())[1].channel == 149
+
+
+async def test_radios_are_read_whichever_keys_the_firmware_uses():
+    """Each radio field is read from the first of its key names the response has, with units stripped."""
+    device = default_device()
+    wlan_settings = device["system"]["wlanSettings"]
+    del wlan_settings["bandSteeringSt"]
+    for wlan_id in ("wlan0", "wlan1"):
+        del wlan_settings["wlanSettingTable"][wlan_id]
+    radios = tri_band_radios()
+    wlan_settings["bandSteering"] = radios["bandSteering"]
+    wlan_settings["wlanSettingTable"].update(radios["wlanSettingTable"])
+
+    async with WaxSimulator(device=device) as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+
+        state, ssids = await client.async_get_state_and_ssids()
+
+        assert [(radio.wlan_id, radio.enabled, radio.channel, radio.channel_width, radio.tx_power)
+                for radio in state.radios] == [
+            ("wlan0", False, 0, 20, "Quarter"), ("wlan1", True, 44, 160, "Full"), ("wlan2", True, 37, 320, "20 dBm")]
+        assert not any(radio.band_steering for radio in state.radios)
+        # The SSID table next to the radios isn't taken for one
+        assert len(ssids) == 6
+
+
+async def test_firmware_check_overlaps_the_first_poll():
+    """The firmware check runs next to the state read instead of before it, the next poll reads its outcome."""
+    latency = 0.2
+    async with WaxSimulator(latency=latency) as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        simulator.device["system"]["FwUpdate"]["ImageAvailable"] = "1"
+
+        started = time.monotonic()
+        state, _ = await client.async_get_state_and_ssids(check_firmware=True)
+
+        # Two round trips to log in, then the state read and the check side by side
+        assert time.monotonic() - started < 3.5 * latency
+        assert simulator.requests["/LogFile"] == 1
+        assert not state.firmware_update_available
+
+        state, _ = await client.async_get_state_and_ssids()
+        assert state.firmware_update_available
+        state, _ = await client.async_get_state_and_ssids()
+        assert state.firmware_update_available
+
+
+async def test_enable_ssid():
+    """Turning an SSID on updates every radio in one request."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        ssids = [ssid for ssid in await client.async_get_ssids() if ssid.ssid == "Guest"]
+
+        result = await client.async_enable_ssid(ssids, True)
+
+        assert result["status"] == 0
+        assert all(ssid.enabled for ssid in await client.async_get_ssids() if ssid.ssid == "Guest")
+
+
+async def test_malformed_rows_are_skipped():
+    """Station rows without a MAC address or with odd values don't fail the poll."""
+    device = default_device()
+    device["system"]["monitor"]["connectedClients"] = {
+        "0": {"MacAddress": "11:22:33:44:55:66", "Rssi": "-60 dBm", "Rate": "n/a"},
+        "1": {"Ssid": "Home"},
+        "2": "garbage",
+    }
+    async with WaxSimulator(device=device) as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        client.track_stations = True
+
+        state, _ = await client.async_get_state_and_ssids()
+
+        assert [(station.mac, station.rssi, station.rate) for station in state.stations] == [
+            ("11:22:33:44:55:66", -60, 0)]
+
+
+async def test_connections_are_reused():
+    """Without a session the client keeps its own pool and polls reuse the open connection."""
+    async with WaxSimulator() as simulator:
+        client = create_client(simulator)
+        try:
+            for _ in range(5):
+                await client.async_get_state_and_ssids()
+        finally:
+            await client.async_close()
+
+        # Login is two requests, then five polls, all over one connection
+        assert client.connections_created == 1
+        assert client.connections_reused == 6
+
+
+async def test_breaker_pauses_requests_to_a_failing_device():
+    """After repeated failures requests fail fast, then one probe checks the device is back."""
+    async with WaxSimulator() as simulator:
+        client = create_client(simulator)
+        client.retry_attempts = 1
+        client.breaker = CircuitBreaker(failure_threshold=2, open_seconds=0.2)
+        try:
+            simulator.down = True
+            for _ in range(2):
+                with pytest.raises(aiohttp.ClientResponseError):
+                    await client.async_get_ssids()
+            assert client.breaker.state == "open"
+
+            requests = sum(simulator.requests.values())
+            with pytest.raises(CircuitOpenError):
+                await client.async_get_ssids()
+            assert sum(simulator.requests.values()) == requests
+
+            simulator.down = False
+            await asyncio.sleep(0.3)
+            assert client.breaker.state == "half_open"
+            await client.async_get_ssids()
+            assert client.breaker.state == "closed"
+        finally:
+            await client.async_close()
+
+
+async def test_request_slots_follow_the_limit():
+    """Requests past the limit wait. Raising the limit lets them in, lowering it holds new ones back."""
+    slots = RequestSlots(1)
+    running = []
+    done = {name: asyncio.Event() for name in range(4)}
+
+    async def request(name: int):
+        async with slots:
+            running.append(name)
+            await done[name].wait()
+
+    tasks = [asyncio.create_task(request(name)) for name in range(3)]
+    await asyncio.sleep(0)
+    assert running == [0]
+
+    slots.limit = 2
+    await asyncio.sleep(0)
+    assert running == [0, 1]
+
+    slots.limit = 1
+    done[0].set()
+    await asyncio.sleep(0.01)
+    assert running == [0, 1]
+
+    # A waiter that gives up doesn't keep a slot
+    cancelled = asyncio.create_task(request(3))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    done[1].set()
+    await asyncio.sleep(0.01)
+    assert running == [0, 1, 2]
+
+    done[2].set()
+    await asyncio.gather(*tasks)
+    assert slots.in_use == 0
+
+
+async def test_metrics_are_recorded_when_enabled():
+    """Every request lands in its endpoint's histogram and byte counts, every decoded body in the decode one."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        client.metrics = NetgearMetrics()
+
+        await client.async_get_state_and_ssids()
+
+        socket_communication = client.metrics.get_endpoint("/socketCommunication")
+        # The login and the poll
+        assert socket_communication.latency.count == 2
+        assert socket_communication.request_bytes > 0
+        assert socket_communication.response_bytes > 0
+        assert client.metrics.get_endpoint("/").latency.count == 1
+        assert client.metrics.decode.count == 2
+        assert client.metrics.as_dict()["endpoints"]["/socketCommunication"]["latency"]["p50_ms"] is not None
@@ -0,0 +1,28 @@
+"""Tests for the netgear_wax diagnostics redaction."""
+import json
+
+import aiohttp
+
+from custom_components.netgear_wax.diagnostics import REDACTED, _exchange
+from custom_components.netgear_wax.metrics import NetgearMetrics
+
+from .simulator import PASSPHRASE, WaxSimulator
+from .test_client import create_client
+
+
+async def test_wifi_secrets_are_redacted():
+    """The recorded SSID reads keep the fields the integration reads and redact the passphrases and keys."""
+    async with WaxSimulator() as simulator, aiohttp.ClientSession() as session:
+        client = create_client(simulator, session)
+        # Bodies are only recorded with metrics on
+        client.metrics = NetgearMetrics()
+
+        await client.async_get_ssids()
+
+        exchanges = [_exchange(exchange) for exchange in client.exchanges]
+        assert PASSPHRASE not in json.dumps(exchanges)
+        # The login comes first, the SSID read last
+        details = exchanges[-1]["response"]["system"]["wlanSettings"]["wlanSettingTable"]["ssidGetDetails"]
+        vap = details["SSID1"]["wlan0"]["vap0"]
+        assert vap == {"vapProfileStatus": 1, "ssid": "Home", "authenticationType": REDACTED,
+                       "presharedKey": REDACTED, "wpa2PersonalKey": REDACTED}
@@ -0,0 +1,40 @@
+"""Tests for the netgear_wax utilization history."""
+from custom_components.netgear_wax.history import StatHistory, TimeSeries
+
+
+def test_samples_are_downsampled_to_each_resolution():
+    """Minute buckets roll up into quarter hours and hours, keeping min, max and mean."""
+    history = StatHistory()
+    closed = []
+    start = 1_800_000_000 - 1_800_000_000 % 3600
+    # Utilization 10, 20, 30, ... one sample every 30 seconds for two hours
+    for index in range(240):
+        bucket = history.add("wlan1", start + index * 30, 10 * (index % 10 + 1))
+        if bucket is not None:
+            closed.append(bucket)
+
+    minutes = history.get_buckets("wlan1", 60)
+    assert len(minutes) == 120
+    assert (minutes[0].min, minutes[0].max, minutes[0].mean) == (10, 20, 15)
+
+    quarters = history.get_buckets("wlan1", 900)
+    assert len(quarters) == 8
+    assert quarters[0].count == 30
+
+    # The first hour is closed once the second hour's first quarter hour is
+    assert len(closed) == 1
+    assert closed[0].start == start
+    assert closed[0].count == 120
+    assert (closed[0].min, closed[0].max, closed[0].mean) == (10, 100, 55)
+    assert history.get_buckets("wlan0", 60) == []
+
+
+def test_ring_keeps_the_newest_buckets():
+    """A full ring overwrites its oldest bucket."""
+    series = TimeSeries(tiers=((60, 3),))
+    for minute in range(5):
+        series.add(minute * 60, minute)
+
+    rollup = series.get_rollup(60)
+    assert [bucket.start for bucket in rollup] == [60, 120, 180]
+    assert rollup.current.start == 240
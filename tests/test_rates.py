@@ -0,0 +1,46 @@
+"""Tests for the netgear_wax traffic rates."""
+from custom_components.netgear_wax.client import Stat
+from custom_components.netgear_wax.rates import TrafficRateTracker
+from custom_components.netgear_wax.schema import STAT_SCHEMA
+
+
+def traffic(value: str) -> Stat:
+    """ Returns the Stat for a traffic counter as the device shows it, example: 12.2 GB """
+    return STAT_SCHEMA.decode({"traffic": value})
+
+
+def test_rate_is_measured_across_the_samples():
+    """The rate spans the whole buffer, so polls that show the same rounded counter don't read as zero."""
+    tracker = TrafficRateTracker(samples=10, smoothing=1.0)
+    assert tracker.add("lan", 0, traffic("12.2 GB")) is None
+    assert tracker.add("lan", 60, traffic("12.2 GB")) == 0
+    rate = tracker.add("lan", 120, traffic("12.3 GB"))
+    assert rate == (traffic("12.3 GB").bytes_transferred - traffic("12.2 GB").bytes_transferred) / 120
+    assert tracker.get_rate("lan") == rate
+    assert tracker.get_rate("wlan0") is None
+
+
+def test_counter_reset_starts_over():
+    """A counter that drops by more than its rounding error was reset, the rate starts over from the new value."""
+    tracker = TrafficRateTracker(smoothing=1.0)
+    tracker.add("lan", 0, traffic("12.2 GB"))
+    assert tracker.add("lan", 60, traffic("12.4 GB")) > 0
+
+    # The device rebooted
+    assert tracker.add("lan", 120, traffic("512.0 KB")) is None
+    assert tracker.get_rate("lan") is None
+
+    rate = tracker.add("lan", 180, traffic("1.5 MB"))
+    assert rate == (traffic("1.5 MB").bytes_transferred - traffic("512.0 KB").bytes_transferred) / 60
+
+
+def test_round_down_at_a_unit_boundary_is_not_a_reset():
+    """A counter that drops by less than its rounding error, like 1.0 GB shown as 1023.9 MB, holds its value."""
+    tracker = TrafficRateTracker(smoothing=1.0)
+    tracker.add("lan", 0, traffic("1023.8 MB"))
+    tracker.add("lan", 60, traffic("1.0 GB"))
+
+    assert tracker.add("lan", 120, traffic("1023.9 MB")) >= 0
+    rate = tracker.add("lan", 180, traffic("1.1 GB"))
+    # Still measured from the first sample
+    assert rate == (traffic("1.1 GB").bytes_transferred - traffic("1023.8 MB").bytes_transferred) / 180
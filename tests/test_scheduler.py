@@ -0,0 +1,120 @@
+"""Tests for the netgear_wax fleet scheduler."""
+import asyncio
+from datetime import timedelta
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import custom_components.netgear_wax as netgear_wax
+from custom_components.netgear_wax import NetgearFleetScheduler
+
+
+class FakeCoordinator:
+    """ The parts of NetgearDataUpdateCoordinator the scheduler uses """
+
+    def __init__(self, mac: str, interval: float = 60, paused: bool = False) -> None:
+        self.poll_interval = timedelta(seconds=interval)
+        self.data = None
+        self.last_update_success = True
+        self.paused = paused
+        self.refreshes = 0
+        self._mac = mac
+
+    def is_paused(self) -> bool:
+        return self.paused
+
+    async def async_refresh(self):
+        self.refreshes += 1
+        await asyncio.sleep(0)
+
+    def get_mac(self) -> str:
+        return self._mac
+
+    def get_device_name(self) -> str:
+        return self._mac
+
+    def get_radio_readings(self) -> list:
+        return []
+
+
+@pytest.fixture
+def timers(monkeypatch) -> list:
+    """ Replaces the scheduler's timer with one that records the delays and never fires """
+    delays = []
+
+    def call_later(hass, delay, action):
+        delays.append(delay)
+        return lambda: None
+
+    monkeypatch.setattr(netgear_wax, "async_call_later", call_later)
+    return delays
+
+
+def create_scheduler(**kwargs) -> NetgearFleetScheduler:
+    loop = asyncio.get_running_loop()
+    hass = SimpleNamespace(data={}, loop=loop,
+                           async_create_background_task=lambda coro, name=None: loop.create_task(coro))
+    return NetgearFleetScheduler(hass, jitter_seconds=0, **kwargs)
+
+
+async def test_polls_are_spread_over_the_interval(timers):
+    """Each access point added spreads the next polls of the whole fleet evenly over one interval."""
+    scheduler = create_scheduler()
+    coordinators = [FakeCoordinator(f"AP{index}") for index in range(4)]
+
+    started = time.monotonic()
+    for coordinator in coordinators:
+        scheduler.register(coordinator)
+
+    offsets = [scheduler._next_poll[coordinator] - started for coordinator in coordinators]
+    assert offsets == pytest.approx([15, 30, 45, 60], abs=0.5)
+    # The timer is set for the first one that's due
+    assert timers[-1] == pytest.approx(15, abs=0.5)
+
+    for coordinator in coordinators:
+        scheduler.unregister(coordinator)
+    assert scheduler.coordinators == []
+
+
+async def test_request_slots_follow_the_fleet_size(timers):
+    """There's a request slot for every few access points, and never fewer than the minimum."""
+    scheduler = create_scheduler(min_concurrent_requests=4, access_points_per_slot=4)
+    coordinators = [FakeCoordinator(f"AP{index}") for index in range(21)]
+
+    for coordinator in coordinators[:16]:
+        scheduler.register(coordinator)
+    assert scheduler.request_slots.limit == 4
+
+    for coordinator in coordinators[16:]:
+        scheduler.register(coordinator)
+    assert scheduler.request_slots.limit == 6
+
+    for coordinator in coordinators[4:]:
+        scheduler.unregister(coordinator)
+    assert scheduler.request_slots.limit == 4
+
+
+async def test_due_polls_skip_paused_access_points(timers):
+    """Access points whose circuit breaker is open aren't polled, but keep their turn."""
+    scheduler = create_scheduler()
+    healthy = FakeCoordinator("AP1")
+    paused = FakeCoordinator("AP2", paused=True)
+    scheduler.register(healthy)
+    scheduler.register(paused)
+
+    now = time.monotonic()
+    for coordinator in (healthy, paused):
+        scheduler._next_poll[coordinator] = now - 1
+    scheduler._async_poll_due(None)
+    # A poll that's still queued or running covers this one
+    scheduler.poll_now(healthy)
+    while scheduler._polling:
+        await asyncio.sleep(0)
+
+    assert healthy.refreshes == 1
+    assert paused.refreshes == 0
+    assert all(due > now for due in scheduler._next_poll.values())
+
+    scheduler.unregister(healthy)
+    scheduler.unregister(paused)
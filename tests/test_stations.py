@@ -0,0 +1,56 @@
+"""Tests for the netgear_wax station table."""
+import dataclasses
+
+from custom_components.netgear_wax.client import Station
+from custom_components.netgear_wax.stations import StationTable
+
+PHONE = Station("11:22:33:44:55:66", "Home", "wlan1", -52, 866, 1000, 2000)
+LAPTOP = Station("22:33:44:55:66:77", "Home", "wlan1", -60, 433, 5000, 6000)
+SENSOR = Station("AA:BB:CC:00:11:22", "IoT", "wlan0", -70, 72, 10, 20)
+
+
+def test_joins_leaves_and_updates_are_reported():
+    """Each poll reports the stations that joined, the ones that left with their last details and the ones that
+    changed."""
+    table = StationTable()
+
+    changes = table.update([PHONE, LAPTOP])
+    assert changes.joined == {PHONE.mac, LAPTOP.mac}
+    assert changes.left == {}
+    assert changes.updated == set()
+
+    roamed = dataclasses.replace(PHONE, wlan_id="wlan0", rssi=-45, rate=144, tx_bytes=1500, rx_bytes=2500)
+    changes = table.update([roamed, SENSOR])
+    assert changes.joined == {SENSOR.mac}
+    assert changes.left == {LAPTOP.mac: LAPTOP}
+    assert changes.updated == {PHONE.mac}
+    assert table.get(PHONE.mac) == roamed
+    assert table.get(LAPTOP.mac) is None
+
+    changes = table.update([roamed, SENSOR])
+    assert changes == (set(), {}, set())
+
+
+def test_removing_a_row_moves_the_last_one_into_its_place():
+    """A station leaving from the middle of the table leaves the others intact, and the table stays dense."""
+    table = StationTable()
+    table.update([PHONE, LAPTOP, SENSOR])
+
+    table.update([LAPTOP, SENSOR])
+    assert len(table) == 2
+    assert PHONE.mac not in table
+    assert list(table) == [SENSOR.mac, LAPTOP.mac]
+    assert table.get(SENSOR.mac) == SENSOR
+    assert table.get(LAPTOP.mac) == LAPTOP
+
+    # The moved row can be updated and removed like any other
+    moved = dataclasses.replace(SENSOR, rssi=-75)
+    assert table.update([LAPTOP, moved]).updated == {SENSOR.mac}
+    assert table.get(SENSOR.mac) == moved
+    assert table.update([LAPTOP]).left == {SENSOR.mac: moved}
+    assert list(table) == [LAPTOP.mac]
+    assert table.get(LAPTOP.mac) == LAPTOP
+
+    table.update([])
+    assert len(table) == 0
+    assert list(table) == []
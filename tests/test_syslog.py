@@ -0,0 +1,64 @@
+"""Tests for the netgear_wax syslog receiver."""
+import asyncio
+import socket
+
+from custom_components.netgear_wax.const import SYSLOG_CONFIG, SYSLOG_RADIO, SYSLOG_STATION_JOINED, SYSLOG_STATION_LEFT
+from custom_components.netgear_wax.syslog import NetgearSyslogListener, parse_syslog
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_messages_are_parsed_into_events():
+    """Station, radio and config messages become events, anything else is ignored."""
+    joined = parse_syslog(b"<30>Oct 17 20:33:56 WAX610 hostapd: wlan1: AP-STA-CONNECTED 11:22:33:aa:bb:cc")
+    assert joined.kind == SYSLOG_STATION_JOINED
+    assert joined.interface == "wlan1"
+    assert joined.mac == "11:22:33:AA:BB:CC"
+
+    left = parse_syslog(b"<30>1 2026-10-17T20:33:56Z WAX610 hostapd - - - "
+                        b"wlan0: STA 11:22:33:aa:bb:cc IEEE 802.11: disassociated")
+    assert left.kind == SYSLOG_STATION_LEFT
+    assert left.mac == "11:22:33:AA:BB:CC"
+
+    assert parse_syslog(b"<30>hostapd: wlan1: DFS-RADAR-DETECTED freq=5500 ht_enabled=1").kind == SYSLOG_RADIO
+    assert parse_syslog(b"<29>WAX610 httpd: Configuration changed by admin").kind == SYSLOG_CONFIG
+    assert parse_syslog(b"<30>WAX610 dnsmasq: DHCPACK(br0) 192.168.1.20") is None
+
+
+async def test_listener_routes_by_source_address():
+    """Messages are handed to the handler of the address they came from, over UDP and TCP."""
+    listener = NetgearSyslogListener(free_port())
+    received = []
+    await listener.async_register("127.0.0.1", received.append)
+    try:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                           remote_addr=("127.0.0.1", listener.port))
+        transport.sendto(b"<30>hostapd: wlan0: AP-STA-CONNECTED 11:22:33:44:55:66")
+        transport.close()
+
+        _, writer = await asyncio.open_connection("127.0.0.1", listener.port)
+        writer.write(b"<30>hostapd: wlan0: AP-ENABLED\n")
+        message = b"<30>hostapd: wlan0: AP-STA-DISCONNECTED 11:22:33:44:55:66"
+        writer.write(str(len(message)).encode() + b" " + message)
+        await writer.drain()
+
+        for _ in range(50):
+            if len(received) == 3:
+                break
+            await asyncio.sleep(0.01)
+        writer.close()
+
+        assert sorted(parse_syslog(data).kind for data in received) == \
+            sorted([SYSLOG_STATION_JOINED, SYSLOG_RADIO, SYSLOG_STATION_LEFT])
+        assert listener.dropped == 0
+    finally:
+        listener.unregister(received.append)
+        # Let the TCP handler see its connection close
+        await asyncio.sleep(0.05)
+
+    assert not listener.listening